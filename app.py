@@ -1,33 +1,203 @@
-from flask import Flask, render_template, jsonify
-import json
+from flask import Blueprint, Flask, abort, current_app, render_template, jsonify, request, send_file
 import os
+import sys
+import threading
 
-app = Flask(__name__)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
 
-# Cargar datos de hoteles desde JSON
+from availability import QUOTE_CACHE_CONTROL, QuoteEngine, QuoteRequestError
+from catalog import load_catalog
+from columns import FilterRequestError, filter_response, listing_context, parse_filter_request
+from geo import GeoRequestError, parse_near_request
+from fragments import install_fragment_cache
+from image_resize import CACHE_CONTROL, ImageRequestError, ImageResizer, UnreadableImageError
+from search import SearchRequestError, parse_search_request, search_response
+
+bp = Blueprint('hoteles', __name__)
+
+_catalogo = None
+_recarga = threading.Lock()
+_imagenes = ImageResizer()
+_cotizaciones = QuoteEngine()
+
+# Cargar el catálogo desde el snapshot binario (mmap), solo la primera vez
+# o cuando data/hotels.json ha cambiado
 def cargar_hoteles():
-    with open('data/hoteles.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+    global _catalogo
+    catalogo = _catalogo
+    if catalogo is not None:
+        # Con preload (gunicorn) se sirve siempre el catálogo del maestro,
+        # compartido copy-on-write: recargarlo en cada worker duplicaría los
+        # índices en todos ellos. Se recarga con SIGHUP (on_reload -> precargar)
+        if current_app.extensions.get('precargado') or not catalogo.is_stale():
+            return catalogo
+    with _recarga:
+        # Un solo hilo recarga; los demás usan el catálogo que ese deja
+        if _catalogo is None or _catalogo.is_stale():
+            anterior = _catalogo
+            _catalogo = load_catalog().warm()
+            if anterior is not None:
+                anterior.close()
+            # Las tarjetas del catálogo anterior ya no se van a pedir
+            current_app.extensions['fragmentos'].clear()
+        return _catalogo
+
+def precargar(app):
+    """Carga el catálogo con todos sus índices y compila las plantillas.
+
+    Con gunicorn en modo preload se ejecuta en el maestro antes del fork, de
+    modo que los workers comparten estos objetos copy-on-write y ninguno
+    construye los índices (búsqueda, similares, columnas...) en su primera
+    petición. Si el catálogo no ha cambiado se conserva el ya cargado, y si el
+    nuevo no se puede cargar, también.
+    """
+    global _catalogo
+    if _catalogo is None or _catalogo.is_stale():
+        try:
+            catalogo = load_catalog().warm()
+        except (OSError, ValueError) as e:
+            if _catalogo is None:
+                raise
+            app.logger.error("No se pudo recargar el catálogo, se mantiene el anterior: %s", e)
+        else:
+            if _catalogo is not None:
+                _catalogo.close()
+            _catalogo = catalogo
+            app.extensions['fragmentos'].clear()
+
+    # Plantillas compiladas en la caché del entorno Jinja2 de Flask
+    env = app.jinja_env
+    env.cache.clear()
+    for name in env.list_templates():
+        env.get_template(name)
+    return _catalogo
 
-@app.route('/')
+@bp.route('/')
 def index():
+    # Filtros y orden opcionales (?pais=&precio_max=&rating_min=&orden=...)
     hoteles = cargar_hoteles()
-    return render_template('index.html', hoteles=hoteles)
+    try:
+        filtro = parse_filter_request(request.args)
+    except FilterRequestError as e:
+        return str(e), 400
+    return render_template('index.html', resumen=hoteles.aggregates(), **listing_context(hoteles, filtro))
 
-@app.route('/hotel/<hotel_id>')
+@bp.route('/hotel/<hotel_id>/')
 def hotel_detalle(hotel_id):
+    # Acepta tanto el id original como el clean_id de las URLs SEO
     hoteles = cargar_hoteles()
-    hotel = next((h for h in hoteles if h['id'] == hotel_id), None)
-    
+    hotel = hoteles.get(hotel_id)
+
     if not hotel:
         return "Hotel no encontrado", 404
-    
-    return render_template('hotel.html', hotel=hotel)
 
-@app.route('/api/hoteles')
+    return render_template('hotel.html', hotel=hotel, cercanos=hoteles.geo_index().nearby(hotel),
+                           similares=hoteles.similar().get(hotel.id))
+
+@bp.route('/api/hoteles')
 def api_hoteles():
     hoteles = cargar_hoteles()
-    return jsonify(hoteles)
+    return jsonify([hotel.to_dict() for hotel in hoteles])
+
+@bp.route('/api/hoteles/filter')
+def api_filtro():
+    # Filtros por rangos (precio, rating, anio), pais y pelicula, con orden y paginación
+    try:
+        filtro = parse_filter_request(request.args)
+    except FilterRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(filter_response(cargar_hoteles(), filtro))
+
+@bp.route('/api/hoteles/near')
+def api_cercanos():
+    # Hoteles más cercanos a ?lat=&lon= (opcional: k=10, radio en km)
+    try:
+        lat, lon, k, radio = parse_near_request(request.args.get('lat'), request.args.get('lon'),
+                                                request.args.get('k'), request.args.get('radio'))
+    except GeoRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    cercanos = cargar_hoteles().geo_index().nearest(lat, lon, k, radio)
+    return jsonify([cercano.to_dict() for cercano in cercanos])
+
+@bp.route('/api/hoteles/<hotel_id>/quote')
+def api_cotizacion(hotel_id):
+    # Disponibilidad y precio total de ?checkin=&checkout=&habitaciones=
+    hotel = cargar_hoteles().get(hotel_id)
+    if not hotel:
+        abort(404)
+    try:
+        cotizacion = _cotizaciones.quote(hotel, request.args.get('checkin'),
+                                         request.args.get('checkout'),
+                                         request.args.get('habitaciones'))
+    except QuoteRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    if cotizacion is None:
+        abort(404)
+
+    response = jsonify(cotizacion.to_dict())
+    response.headers['Cache-Control'] = QUOTE_CACHE_CONTROL
+    return response
+
+@bp.route('/api/hoteles/<hotel_id>/similares')
+def api_similares(hotel_id):
+    # Hoteles similares por descripción, características, precio, valoración y año
+    hoteles = cargar_hoteles()
+    hotel = hoteles.get(hotel_id)
+    if not hotel:
+        abort(404)
+    return jsonify([similar.to_dict() for similar in hoteles.similar().get(hotel.id)])
+
+@bp.route('/api/search')
+def api_busqueda():
+    # Búsqueda de texto completo: ?q=consulta[&k=10]
+    try:
+        q, k = parse_search_request(request.args.get('q'), request.args.get('k'))
+    except SearchRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(search_response(cargar_hoteles().search_index(), q, k))
+
+@bp.route('/api/resumen')
+def api_resumen():
+    # Agregados del catálogo, calculados una vez por versión del snapshot
+    return jsonify(cargar_hoteles().aggregates().to_dict())
+
+@bp.route('/img/<hotel_id>/<name>')
+def imagen(hotel_id, name):
+    # Variante redimensionada (?w=ancho&fmt=webp|jpeg|png), cacheada en disco
+    hotel = cargar_hoteles().get(hotel_id)
+    if not hotel:
+        abort(404)
+    try:
+        variante = _imagenes.get(hotel.id, name, request.args.get('w'), request.args.get('fmt'))
+    except ImageRequestError as e:
+        return str(e), 400
+    except UnreadableImageError as e:
+        return str(e), 422
+    if variante is None:
+        abort(404)
+
+    path, content_type, etag = variante
+    response = send_file(path, mimetype=content_type, etag=etag, conditional=True)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+def create_app(preload=False):
+    """Crea la aplicación; con preload=True precarga catálogo y plantillas.
+
+    En modo preload los workers no recargan el catálogo por su cuenta: los
+    cambios de datos se aplican con SIGHUP al maestro (ver gunicorn.conf.py).
+    """
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    app.extensions['fragmentos'] = install_fragment_cache(app.jinja_env)
+    # Buscador y formulario de disponibilidad (solo cuando se sirve la API)
+    app.jinja_env.globals['server_api'] = True
+    if preload:
+        app.extensions['precargado'] = True
+        precargar(app)
+    return app
+
+app = create_app()
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,391 @@
+"""
+Punto de entrada ASGI alternativo a app.py.
+
+Sirve las mismas rutas (/, /hotel/<id>/, /api/hoteles, /api/hoteles/filter,
+/api/hoteles/near, /api/hoteles/<id>/quote, /api/hoteles/<id>/similares,
+/api/search, /api/resumen, /img/ y /static/) a partir del mismo catálogo (snapshot binario) y las mismas
+plantillas, pero sin bloquear un worker por cliente: cada página se renderiza
+una vez por versión del catálogo y se envía en trozos de forma asíncrona, así
+que un proceso atiende miles de conexiones keep-alive lentas a la vez.
+
+Uso: uvicorn asgi:app --port 8000
+"""
+import asyncio
+import json
+import mimetypes
+import os
+import sys
+import threading
+from functools import partial
+from urllib.parse import parse_qs
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scripts'))
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from availability import QUOTE_CACHE_CONTROL, QuoteEngine, QuoteRequestError
+from catalog import load_catalog
+from columns import FilterRequestError, filter_response, listing_context, parse_filter_request
+from geo import GeoRequestError, parse_near_request
+from fragments import install_fragment_cache
+from image_resize import CACHE_CONTROL, ImageRequestError, ImageResizer, UnreadableImageError
+from search import SearchRequestError, parse_search_request, search_response
+
+STATIC_DIR = os.path.join(ROOT_DIR, 'static')
+TEMPLATES_DIR = os.path.join(ROOT_DIR, 'templates')
+
+# Tamaño de cada trozo enviado al cliente
+CHUNK_SIZE = 64 * 1024
+
+HTML = b'text/html; charset=utf-8'
+JSON = b'application/json'
+
+
+def json_body(data):
+    """JSON con el mismo formato que jsonify() de Flask."""
+    return json.dumps(data, sort_keys=True, separators=(',', ':')).encode() + b'\n'
+
+
+async def run_blocking(func, *args):
+    """Ejecuta trabajo de CPU (render, búsqueda, NumPy...) en un hilo, fuera del bucle."""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+class SiteCache:
+    """Catálogo y páginas renderizadas compartidas por todas las conexiones.
+
+    Las páginas se renderizan bajo demanda y se guardan como bytes hasta que
+    el catálogo cambia (mismo criterio de recarga que app.py: is_stale()).
+    Las recargas del catálogo (con todos sus índices) y los renders se hacen
+    en hilos, así que el bucle de eventos sigue atendiendo mientras tanto.
+    """
+
+    def __init__(self):
+        # Mismo autoescape que Flask para que las páginas sean idénticas
+        self.env = Environment(loader=FileSystemLoader(TEMPLATES_DIR), auto_reload=False,
+                               autoescape=select_autoescape(('html', 'htm', 'xml', 'xhtml', 'svg')))
+        self.fragments = install_fragment_cache(self.env)
+        self.quotes = QuoteEngine()
+        self.env.globals['server_api'] = True
+        self.catalogo = None
+        self.pages = {}
+        self._lock = threading.Lock()
+        # Protege el par (catálogo, páginas): una página renderizada con el
+        # catálogo anterior no debe guardarse en la caché del nuevo
+        self._pages_lock = threading.Lock()
+
+    def preload(self):
+        """Carga el catálogo con todos sus índices y compila todas las plantillas."""
+        for name in self.env.list_templates():
+            self.env.get_template(name)
+        return self.current().warm()
+
+    def current(self):
+        catalogo = self.catalogo
+        if catalogo is None or catalogo.is_stale():
+            with self._lock:
+                # Otro hilo puede haberlo recargado mientras se esperaba
+                if self.catalogo is catalogo:
+                    nuevo = load_catalog().warm()
+                    with self._pages_lock:
+                        self.catalogo = nuevo
+                        self.pages = {}
+                    self.fragments.clear()
+                    self.quotes.clear()
+        return self.catalogo
+
+    async def catalog(self):
+        """current() sin bloquear el bucle: si hay que recargar, se hace en un hilo."""
+        catalogo = self.catalogo
+        if catalogo is not None and not catalogo.is_stale():
+            return catalogo
+        return await run_blocking(self.current)
+
+    async def cached(self, key, build, catalogo=None):
+        """Valor de la caché de páginas; si falta, build(catalogo) se ejecuta en un hilo.
+
+        `catalogo` es el que el llamador ya usó para preparar la petición (por
+        defecto, el vigente). El resultado solo se guarda si sigue siendo el
+        vigente al terminar; key None: sin caché.
+        """
+        if catalogo is None:
+            catalogo = await self.catalog()
+        value = self.pages.get(key) if key is not None else None
+        if value is None:
+            value = await run_blocking(build, catalogo)
+            if key is not None:
+                with self._pages_lock:
+                    if self.catalogo is catalogo:
+                        self.pages[key] = value
+        return value
+
+    async def page(self, catalogo, key, template, context):
+        """Página renderizada (bytes); `context(catalogo)` solo se evalúa si no está en caché."""
+        return await self.cached(key, partial(self.render, template, context), catalogo)
+
+    def render(self, template, context, catalogo):
+        """Renderiza una página con el contexto de `context(catalogo)`."""
+        return self.env.get_template(template).render(**context(catalogo)).encode('utf-8')
+
+    def api_chunks(self, catalogo):
+        """Trozos de /api/hoteles con el mismo JSON que jsonify() de Flask."""
+        chunks, buffer = [], [b'[']
+        size = 1
+        for i, hotel in enumerate(catalogo):
+            item = json.dumps(hotel.to_dict(), sort_keys=True, separators=(',', ':')).encode()
+            buffer.append(b',' + item if i else item)
+            size += len(item) + 1
+            if size >= CHUNK_SIZE:
+                chunks.append(b''.join(buffer))
+                buffer, size = [], 0
+        buffer.append(b']\n')
+        chunks.append(b''.join(buffer))
+        return chunks
+
+    def api_resumen(self, catalogo):
+        """JSON de /api/resumen (agregados del catálogo)."""
+        return json_body(catalogo.aggregates().to_dict())
+
+site = SiteCache()
+imagenes = ImageResizer()
+
+
+async def send_response(send, status, content_type, chunks, head=False, headers=()):
+    """Envía la respuesta en trozos; con una sola pieza incluye Content-Length."""
+    if isinstance(chunks, bytes):
+        body = chunks
+        chunks = [body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)] or [b'']
+        headers = [(b'content-length', str(len(body)).encode())] + list(headers)
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', content_type)] + list(headers)})
+    if head:
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    last = len(chunks) - 1
+    for i, chunk in enumerate(chunks):
+        await send({'type': 'http.response.body', 'body': chunk, 'more_body': i < last})
+
+
+async def send_file(send, full_path, content_type, head=False, headers=()):
+    """Envía un archivo leyéndolo por trozos fuera del bucle de eventos."""
+    size = os.path.getsize(full_path)
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', content_type),
+                            (b'content-length', str(size).encode())] + list(headers)})
+    if head:
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    loop = asyncio.get_running_loop()
+    with open(full_path, 'rb') as f:
+        while True:
+            chunk = await loop.run_in_executor(None, f.read, CHUNK_SIZE)
+            more = bool(chunk) and f.tell() < size
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+            if not more:
+                break
+
+
+async def send_static(send, path, head=False):
+    """Sirve un archivo de static/."""
+    full_path = os.path.realpath(os.path.join(STATIC_DIR, path))
+    if not full_path.startswith(STATIC_DIR + os.sep) or not os.path.isfile(full_path):
+        return await send_response(send, 404, HTML, b'No encontrado', head)
+    content_type = (mimetypes.guess_type(full_path)[0] or 'application/octet-stream').encode()
+    await send_file(send, full_path, content_type, head)
+
+
+async def send_image(send, scope, hotel_id, name, head=False):
+    """Variante redimensionada de una imagen (?w=&fmt=), codificada en un hilo."""
+    hotel = (await site.catalog()).get(hotel_id)
+    if not hotel:
+        return await send_response(send, 404, HTML, b'No encontrado', head)
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    width = query.get('w', [None])[0]
+    fmt = query.get('fmt', [None])[0]
+    loop = asyncio.get_running_loop()
+    try:
+        variante = await loop.run_in_executor(None, imagenes.get, hotel.id, name, width, fmt)
+    except ImageRequestError as e:
+        return await send_response(send, 400, HTML, str(e).encode(), head)
+    except UnreadableImageError as e:
+        return await send_response(send, 422, HTML, str(e).encode(), head)
+    if variante is None:
+        return await send_response(send, 404, HTML, b'No encontrado', head)
+
+    path, content_type, etag = variante
+    etag_header = f'"{etag}"'.encode()
+    headers = [(b'etag', etag_header), (b'cache-control', CACHE_CONTROL.encode())]
+    request_headers = dict(scope.get('headers', ()))
+    if etag_header in request_headers.get(b'if-none-match', b''):
+        await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    await send_file(send, path, content_type.encode(), head, headers)
+
+
+def filter_params(scope):
+    """Parámetros de filtrado de la query string (los vacíos cuentan como ausentes)."""
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True)
+    return parse_filter_request({name: values[0] for name, values in query.items()})
+
+
+async def send_index(send, scope, head=False):
+    """Página principal, con filtros y orden opcionales."""
+    try:
+        filtro = filter_params(scope)
+    except FilterRequestError as e:
+        return await send_response(send, 400, HTML, str(e).encode(), head)
+    catalogo = await site.catalog()
+    # Cada combinación de filtros es una página distinta: solo se guarda la completa
+    body = await site.page(catalogo, None if filtro else 'index', 'index.html',
+                           lambda catalogo: dict(resumen=catalogo.aggregates(),
+                                                 **listing_context(catalogo, filtro)))
+    await send_response(send, 200, HTML, body, head)
+
+
+async def send_filter(send, scope, head=False):
+    """Hoteles filtrados por rangos, país y película (?precio_max=&orden=...)."""
+    try:
+        filtro = filter_params(scope)
+    except FilterRequestError as e:
+        return await send_response(send, 400, JSON, json_body({'error': str(e)}), head)
+    catalogo = await site.catalog()
+    body = await run_blocking(lambda: json_body(filter_response(catalogo, filtro)))
+    await send_response(send, 200, JSON, body, head)
+
+
+async def send_near(send, scope, head=False):
+    """Hoteles más cercanos a ?lat=&lon= (opcional: k, radio en km)."""
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    try:
+        lat, lon, k, radio = parse_near_request(*(query.get(name, [None])[0]
+                                                  for name in ('lat', 'lon', 'k', 'radio')))
+    except GeoRequestError as e:
+        return await send_response(send, 400, JSON, json_body({'error': str(e)}), head)
+    geo_index = (await site.catalog()).geo_index()
+    body = await run_blocking(lambda: json_body([cercano.to_dict() for cercano
+                                                 in geo_index.nearest(lat, lon, k, radio)]))
+    await send_response(send, 200, JSON, body, head)
+
+
+async def send_search(send, scope, head=False):
+    """Búsqueda de texto completo (?q=consulta&k=10)."""
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True)
+    try:
+        q, k = parse_search_request(*(query.get(name, [None])[0] for name in ('q', 'k')))
+    except SearchRequestError as e:
+        return await send_response(send, 400, JSON, json_body({'error': str(e)}), head)
+    search_index = (await site.catalog()).search_index()
+    body = await run_blocking(lambda: json_body(search_response(search_index, q, k)))
+    await send_response(send, 200, JSON, body, head)
+
+
+async def send_quote(send, scope, hotel_id, head=False):
+    """Cotización de una estancia (?checkin=&checkout=&habitaciones=)."""
+    hotel = (await site.catalog()).get(hotel_id)
+    if not hotel:
+        return await send_response(send, 404, HTML, b'No encontrado', head)
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    checkin, checkout, habitaciones = (query.get(name, [None])[0]
+                                       for name in ('checkin', 'checkout', 'habitaciones'))
+    try:
+        cotizacion = site.quotes.quote(hotel, checkin, checkout, habitaciones)
+    except QuoteRequestError as e:
+        return await send_response(send, 400, JSON, json_body({'error': str(e)}), head)
+    if cotizacion is None:
+        return await send_response(send, 404, HTML, b'No encontrado', head)
+    await send_response(send, 200, JSON, json_body(cotizacion.to_dict()), head,
+                        [(b'cache-control', QUOTE_CACHE_CONTROL.encode())])
+
+
+async def send_similar(send, hotel_id, head=False):
+    """Hoteles similares a un hotel (similar.py)."""
+    catalogo = await site.catalog()
+    hotel = catalogo.get(hotel_id)
+    if not hotel:
+        return await send_response(send, 404, HTML, b'No encontrado', head)
+    similares = catalogo.similar().get(hotel.id)
+    await send_response(send, 200, JSON, json_body([similar.to_dict() for similar in similares]), head)
+
+
+async def lifespan(receive, send):
+    """Precarga catálogo y plantillas al arrancar el proceso."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await run_blocking(site.preload)
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """Aplicación ASGI."""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    method = scope['method']
+    if method not in ('GET', 'HEAD'):
+        return await send_response(send, 405, HTML, b'M\xc3\xa9todo no permitido',
+                                   headers=[(b'allow', b'GET, HEAD')])
+    head = method == 'HEAD'
+    path = scope['path']
+
+    if path == '/':
+        return await send_index(send, scope, head)
+
+    if path == '/api/hoteles':
+        return await send_response(send, 200, JSON, await site.cached('api', site.api_chunks), head)
+
+    if path == '/api/hoteles/filter':
+        return await send_filter(send, scope, head)
+
+    if path == '/api/hoteles/near':
+        return await send_near(send, scope, head)
+
+    if path.startswith('/api/hoteles/') and path.endswith(('/quote', '/similares')):
+        hotel_id, _, action = path[len('/api/hoteles/'):].rpartition('/')
+        if not hotel_id or '/' in hotel_id:
+            return await send_response(send, 404, HTML, b'No encontrado', head)
+        if action == 'quote':
+            return await send_quote(send, scope, hotel_id, head)
+        return await send_similar(send, hotel_id, head)
+
+    if path == '/api/search':
+        return await send_search(send, scope, head)
+
+    if path == '/api/resumen':
+        return await send_response(send, 200, JSON, await site.cached('resumen', site.api_resumen), head)
+
+    if path.startswith('/hotel/'):
+        # Acepta tanto el id original como el clean_id, con o sin barra final
+        hotel_id = path[len('/hotel/'):].strip('/')
+        catalogo = await site.catalog()
+        hotel = catalogo.get(hotel_id) if hotel_id and '/' not in hotel_id else None
+        if not hotel:
+            return await send_response(send, 404, HTML, 'Hotel no encontrado'.encode(), head)
+        # Cercanos y similares solo hacen falta si la página no está ya renderizada
+        body = await site.page(catalogo, ('hotel', hotel.id), 'hotel.html',
+                               lambda catalogo: dict(hotel=hotel,
+                                                     cercanos=catalogo.geo_index().nearby(hotel),
+                                                     similares=catalogo.similar().get(hotel.id)))
+        return await send_response(send, 200, HTML, body, head)
+
+    if path.startswith('/img/'):
+        parts = path[len('/img/'):].split('/')
+        if len(parts) != 2 or not all(parts):
+            return await send_response(send, 404, HTML, b'No encontrado', head)
+        return await send_image(send, scope, parts[0], parts[1], head)
+
+    if path.startswith('/static/'):
+        return await send_static(send, path[len('/static/'):], head)
+
+    return await send_response(send, 404, HTML, b'No encontrado', head)
@@ -1,5 +1,5 @@
 import os
-import json
+import sys
 import requests
 import re
 from pathlib import Path
@@ -7,6 +7,10 @@ from urllib.parse import urlparse
 from PIL import Image
 import io
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+
+from store import StoreError, load_hotels, save_hotels
+
 # Configuración de optimización de imágenes
 MAX_WIDTH_LARGE = 1200  # Para imágenes principales
 MAX_WIDTH_MEDIUM = 800   # Para galería
@@ -141,15 +145,13 @@ def optimize_image(image_data, max_width, output_path):
         print(f"Error al optimizar imagen: {e}")
         return False
 
-# Cargar el archivo JSON
+# Cargar los hoteles desde el almacén particionado (data/hotels/)
 def load_hotels_json(file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return load_hotels(file_path)
 
-# Guardar el JSON actualizado
+# Guardar solo los hoteles modificados, cada uno en su archivo (escritura atómica)
 def save_hotels_json(data, file_path):
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    return save_hotels(data, file_path)
 
 # Procesar cada hotel
 def process_hotels(hotels_data, base_dir):
@@ -227,15 +229,20 @@ def main():
     
     # Cargar datos de hoteles
     print("Cargando datos de hoteles...")
-    hotels_data = load_hotels_json(json_path)
+    try:
+        hotels_data = load_hotels_json(json_path)
+    except StoreError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
     
     # Procesar hoteles y descargar imágenes
     print("\nProcesando hoteles y descargando imágenes...")
     updated_hotels = process_hotels(hotels_data, img_base_dir)
     
-    # Guardar JSON actualizado
-    print("\nGuardando JSON actualizado...")
-    save_hotels_json(updated_hotels, json_path)
+    # Guardar hoteles actualizados
+    print("\nGuardando hoteles actualizados...")
+    updated = save_hotels_json(updated_hotels, json_path)
+    print(f"Hoteles modificados: {updated}")
     
     print("\n¡Proceso completado!")
 
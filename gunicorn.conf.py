@@ -0,0 +1,53 @@
+"""
+Configuración de gunicorn para app.py en modo preload.
+
+El maestro crea la aplicación con create_app(preload=True): carga el catálogo
+con todos sus índices (agregados, geográfico, búsqueda, similares y columnas)
+y compila las plantillas una sola vez, y congela esos objetos (gc.freeze) antes
+de hacer fork. Así los workers comparten las páginas de memoria copy-on-write
+y el recolector de basura no las toca, de modo que la memoria por worker se
+mantiene casi constante al añadir workers.
+
+Con SIGHUP (kill -HUP <pid del maestro>) el maestro recarga catálogo y
+plantillas antes de lanzar los workers nuevos; si el catálogo nuevo es
+inválido se mantiene el anterior y los workers siguen atendiendo. Es la única
+forma de aplicar cambios de datos: los workers no recargan por su cuenta.
+
+Uso: gunicorn        (lee este archivo automáticamente)
+"""
+import gc
+import multiprocessing
+import os
+
+wsgi_app = 'app:create_app(preload=True)'
+preload_app = True
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# Sin recolección en el maestro mientras se precarga: una pasada del GC antes
+# del fork dejaría huecos en las páginas que luego se copiarían en cada worker
+gc.disable()
+
+
+def when_ready(server):
+    """Catálogo y plantillas ya cargados: se congelan y se reactiva el GC."""
+    gc.freeze()
+    gc.enable()
+    server.log.info("Catálogo precargado y congelado (%d objetos)", gc.get_freeze_count())
+
+
+def pre_fork(server, worker):
+    """Congela también lo creado desde el último fork (p. ej. tras una recarga)."""
+    gc.freeze()
+
+
+def on_reload(server):
+    """SIGHUP: recarga catálogo y plantillas en el maestro antes de los nuevos workers."""
+    from app import precargar
+
+    precargar(server.app.wsgi())
+    # Releer este archivo en la recarga vuelve a ejecutar gc.disable()
+    gc.freeze()
+    gc.enable()
+    server.log.info("Catálogo y plantillas recargados")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Agregados del catálogo para la página principal.
+
+En una sola pasada sobre los hoteles calcula lo que antes se hardcodeaba o se
+recorría entero en index.html: número de hoteles, países y películas,
+valoración media de los testimonios de cada hotel, percentiles de precio y una
+selección acotada de testimonios destacados (montículo de tamaño fijo). Así el
+índice ya no crece con el número total de testimonios.
+
+Lo usan generate.py (también en modo streaming, hotel a hotel), watch.py y el
+snapshot del catálogo que sirven app.py y asgi.py.
+
+Uso: python scripts/aggregates.py   (muestra los agregados del catálogo)
+"""
+import heapq
+import json
+from array import array
+from itertools import count
+
+# Testimonios destacados en el índice y máximo por hotel
+TOP_TESTIMONIOS = 6
+MAX_POR_HOTEL = 1
+
+# Percentiles de precio publicados
+PERCENTILES = (25, 50, 75, 90)
+
+
+def country_of(ubicacion):
+    """País de una ubicación 'Ciudad, Región, País' (último componente)."""
+    return ubicacion.rsplit(',', 1)[-1].strip() if ubicacion else ''
+
+
+def percentile(sorted_values, q):
+    """Percentil q (0-100) con interpolación lineal; None si no hay valores."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+class FeaturedTestimonial:
+    """Testimonio destacado junto con el hotel al que pertenece."""
+
+    __slots__ = ('testimonio', 'hotel', 'clean_id')
+
+    def __init__(self, testimonio, hotel, clean_id):
+        self.testimonio = testimonio
+        self.hotel = hotel
+        self.clean_id = clean_id
+
+    def to_dict(self):
+        data = self.testimonio.to_dict()
+        data.update({'hotel': self.hotel, 'clean_id': self.clean_id})
+        return data
+
+
+class CatalogAggregates:
+    """Resultado de aggregate_catalog(), listo para las plantillas y la API."""
+
+    __slots__ = ('hoteles', 'paises', 'peliculas', 'valoracion_media',
+                 'valoraciones', 'precios', 'testimonios')
+
+    def valoracion(self, hotel_id):
+        """(media, nº de testimonios) de un hotel, o None si no tiene."""
+        return self.valoraciones.get(hotel_id)
+
+    def to_dict(self):
+        return {
+            'hoteles': self.hoteles,
+            'paises': self.paises,
+            'peliculas': self.peliculas,
+            'valoracion_media': self.valoracion_media,
+            'valoraciones': {hotel_id: {'media': media, 'testimonios': n}
+                             for hotel_id, (media, n) in self.valoraciones.items()},
+            'precios': self.precios,
+            'testimonios': [item.to_dict() for item in self.testimonios],
+        }
+
+
+class AggregateBuilder:
+    """Acumula los agregados hotel a hotel (sirve para el modo streaming).
+
+    Solo guarda conjuntos de países y películas, los precios y un montículo de
+    TOP_TESTIMONIOS entradas, nunca los hoteles completos.
+    """
+
+    def __init__(self, top=TOP_TESTIMONIOS, per_hotel=MAX_POR_HOTEL):
+        self.top = top
+        self.per_hotel = per_hotel
+        self.count = 0
+        self.countries = set()
+        self.films = set()
+        self.prices = array('d')
+        self.ratings = {}
+        self.rating_sum = 0
+        self.rating_count = 0
+        self._heap = []
+        self._order = count()
+
+    def add(self, hotel):
+        self.count += 1
+        country = country_of(hotel.ubicacion)
+        if country:
+            self.countries.add(country.casefold())
+        if hotel.pelicula:
+            self.films.add(hotel.pelicula.strip().casefold())
+        if hotel.precio is not None:
+            self.prices.append(hotel.precio)
+
+        testimonios = hotel.testimonios
+        if testimonios:
+            total = sum(t.rating for t in testimonios)
+            self.ratings[hotel.id] = (round(total / len(testimonios), 1), len(testimonios))
+            self.rating_sum += total
+            self.rating_count += len(testimonios)
+            # Mejor valoración y, a igualdad, el más reciente
+            for t in heapq.nlargest(self.per_hotel, testimonios, key=lambda t: (t.rating, t.fecha)):
+                # El contador desempata sin comparar objetos y prefiere el primero
+                entry = (t.rating, t.fecha, -next(self._order),
+                         FeaturedTestimonial(t, hotel.nombre, hotel.clean_id))
+                if len(self._heap) < self.top:
+                    heapq.heappush(self._heap, entry)
+                elif entry[:3] > self._heap[0][:3]:
+                    heapq.heapreplace(self._heap, entry)
+
+    def result(self):
+        aggregates = CatalogAggregates()
+        aggregates.hoteles = self.count
+        aggregates.paises = len(self.countries)
+        aggregates.peliculas = len(self.films)
+        aggregates.valoracion_media = (round(self.rating_sum / self.rating_count, 1)
+                                       if self.rating_count else None)
+        aggregates.valoraciones = dict(self.ratings)
+        prices = sorted(self.prices)
+        aggregates.precios = {'min': prices[0] if prices else None,
+                              'max': prices[-1] if prices else None}
+        for q in PERCENTILES:
+            aggregates.precios[f'p{q}'] = percentile(prices, q)
+        aggregates.testimonios = [entry[3] for entry in sorted(self._heap, reverse=True,
+                                                                key=lambda e: e[:3])]
+        return aggregates
+
+
+def aggregate_catalog(hotels, top=TOP_TESTIMONIOS):
+    """Agregados de un iterable de hoteles (Hotel del modelo), en una pasada."""
+    builder = AggregateBuilder(top)
+    for hotel in hotels:
+        builder.add(hotel)
+    return builder.result()
+
+
+def main():
+    from catalog import load_catalog
+
+    catalogo = load_catalog()
+    print(json.dumps(aggregate_catalog(catalogo).to_dict(), indent=2, ensure_ascii=False))
+    catalogo.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Cálculo de los recursos estáticos alcanzables desde el catálogo y las plantillas.
+
+Un archivo de static/ se publica solo si algo lo referencia: las rutas de
+`imagenes` de algún hotel, una plantilla, o un CSS/JS que a su vez sea
+alcanzable (url(...), import, cadenas con /static/...). El resto son huérfanos,
+como los `pelicula.webp` sueltos o los directorios de hoteles que ya no están
+en el catálogo.
+
+Uso: python scripts/assets.py [--json]   # lista los huérfanos con su tamaño
+"""
+import json
+import os
+import posixpath
+import re
+import sys
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+STATIC_DIR = Path('static')
+TEMPLATES_DIR = Path('templates')
+
+# Referencias a static/ en plantillas y JS ("/static/css/x.css", 'static/...')
+STATIC_REF_RE = re.compile(r'''(?<![\w.-])/?(static/[^\s"'`()<>{}?#]+)''')
+
+# url(...) e @import de CSS, que pueden ser relativos al propio archivo
+CSS_URL_RE = re.compile(r'''url\(\s*['"]?([^'")]+?)['"]?\s*\)|@import\s+['"]([^'"]+)['"]''')
+
+
+def _local_static_path(ref):
+    """Normaliza una referencia a ruta relativa a static/, o None si es externa."""
+    parsed = urlparse(ref)
+    if parsed.scheme or parsed.netloc:
+        return None
+    path = posixpath.normpath(unquote(parsed.path).lstrip('/'))
+    if not path.startswith('static/'):
+        return None
+    return path[len('static/'):]
+
+
+def hotel_asset_paths(hotel):
+    """Rutas locales (relativas a static/) referenciadas por las imágenes de un hotel."""
+    for ruta in hotel.imagenes:
+        path = _local_static_path(ruta)
+        if path:
+            yield path
+
+
+def _scan_references(text, source=None):
+    """Referencias a static/ dentro de un archivo de texto.
+
+    `source` es la ruta (relativa a static/) de un CSS, para resolver sus url()
+    relativas.
+    """
+    for match in STATIC_REF_RE.finditer(text):
+        path = _local_static_path(match.group(1))
+        if path:
+            yield path
+    if source is not None and source.endswith('.css'):
+        for match in CSS_URL_RE.finditer(text):
+            ref = (match.group(1) or match.group(2)).strip()
+            if ref.startswith(('data:', '#')) or urlparse(ref).scheme:
+                continue
+            if ref.startswith('/'):
+                path = _local_static_path(ref)
+            else:
+                path = posixpath.normpath(posixpath.join(posixpath.dirname(source), unquote(ref)))
+            if path and not path.startswith('..'):
+                yield path
+
+
+def collect_reachable_assets(image_paths, static_dir=STATIC_DIR, templates_dir=TEMPLATES_DIR):
+    """Cierre de los recursos alcanzables a partir de las imágenes y las plantillas.
+
+    Devuelve el conjunto de rutas (relativas a static/, con '/') que existen en
+    disco y están referenciadas directa o indirectamente.
+    """
+    static_dir = Path(static_dir)
+    pending = list(image_paths)
+    templates_dir = Path(templates_dir)
+    if templates_dir.exists():
+        for template in sorted(templates_dir.rglob('*')):
+            if template.is_file():
+                pending.extend(_scan_references(template.read_text(encoding='utf-8', errors='replace')))
+
+    reachable = set()
+    while pending:
+        path = pending.pop()
+        if path in reachable or not (static_dir / path).is_file():
+            continue
+        reachable.add(path)
+        # CSS y JS pueden referenciar más recursos: se recorren también
+        if path.endswith(('.css', '.js')):
+            text = (static_dir / path).read_text(encoding='utf-8', errors='replace')
+            pending.extend(_scan_references(text, source=path))
+    return reachable
+
+
+def iter_static_files(static_dir=STATIC_DIR):
+    """Recorre static/ con scandir como (ruta relativa, tamaño)."""
+    static_dir = str(static_dir)
+    pending = [static_dir]
+    while pending:
+        directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    relative = os.path.relpath(entry.path, static_dir).replace(os.sep, '/')
+                    yield relative, entry.stat().st_size
+
+
+def find_orphans(reachable, static_dir=STATIC_DIR):
+    """Archivos de static/ no alcanzables, como lista ordenada de (ruta, tamaño)."""
+    return sorted((path, size) for path, size in iter_static_files(static_dir)
+                  if path not in reachable)
+
+
+def format_size(size):
+    """Tamaño legible (B, KB, MB)."""
+    for unit in ('B', 'KB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} MB"
+
+
+def print_orphans(orphans):
+    """Muestra los huérfanos y el espacio que ocupan."""
+    total = sum(size for _, size in orphans)
+    print(f"🧹 Recursos huérfanos (no publicados): {len(orphans)} archivos, {format_size(total)}")
+    for path, size in orphans:
+        print(f"  - static/{path} ({format_size(size)})")
+
+
+def main():
+    """Punto de entrada de la línea de comandos."""
+    from catalog import load_catalog
+
+    image_paths = [path for hotel in load_catalog() for path in hotel_asset_paths(hotel)]
+    reachable = collect_reachable_assets(image_paths)
+    orphans = find_orphans(reachable)
+    if '--json' in sys.argv:
+        json.dump({'alcanzables': sorted(reachable),
+                   'huerfanos': [{'ruta': path, 'bytes': size} for path, size in orphans]},
+                  sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print(f"✅ Recursos alcanzables: {len(reachable)}")
+        print_orphans(orphans)
+
+
+if __name__ == "__main__":
+    main()
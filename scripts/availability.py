@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Disponibilidad y cotización de estancias sin salir del proceso.
+
+Cada hotel tiene un calendario de tarifas e inventario por noche (desde hoy y
+HORIZON_DAYS días) guardado en arrays: la suma acumulada de las tarifas da el
+precio total de cualquier rango de fechas con dos lecturas, y una tabla de
+mínimos por potencias de dos (sparse table) da las habitaciones libres en
+todo el rango también en tiempo constante. Así una cotización cuesta unos
+microsegundos, sin recorrer las noches de la estancia.
+
+Los calendarios los proporciona un proveedor de inventario; mientras no haya
+uno real se usa MockInventoryProvider, que genera tarifas y cupos
+deterministas a partir del precio base de cada hotel. QuoteEngine guarda las
+cotizaciones unos segundos (QUOTE_TTL) para absorber las peticiones repetidas
+de la misma búsqueda. La usan las rutas /api/hoteles/<id>/quote de app.py y
+asgi.py.
+
+Uso: python scripts/availability.py <hotel_id> <checkin> <checkout> [--habitaciones 1]
+     python scripts/availability.py --check [--consultas 20000]
+     (--check compara el índice con el cálculo noche a noche y mide el tiempo)
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import date, timedelta
+
+# Días de calendario a partir de hoy y límites de cada consulta
+HORIZON_DAYS = 365
+MAX_NOCHES = 30
+MAX_HABITACIONES = 9
+
+# Segundos que se reutiliza una cotización y número máximo en memoria
+QUOTE_TTL = float(os.environ.get('QUOTE_TTL', 60))
+QUOTE_CACHE_SIZE = 4096
+QUOTE_CACHE_CONTROL = f'private, max-age={int(QUOTE_TTL)}'
+
+# Proveedor simulado: multiplicador por mes, recargo de viernes y sábado,
+# habitaciones por noche y probabilidad de que una noche esté completa
+TEMPORADA = {1: 0.85, 2: 0.85, 3: 0.95, 4: 1.05, 5: 1.0, 6: 1.15,
+             7: 1.3, 8: 1.35, 9: 1.1, 10: 1.0, 11: 0.9, 12: 1.2}
+RECARGO_FIN_DE_SEMANA = 1.15
+HABITACIONES_SIMULADAS = 8
+PROB_COMPLETO = 0.08
+
+
+class QuoteRequestError(ValueError):
+    """Parámetros de una cotización no válidos (respuesta 400)."""
+
+
+def parse_quote_request(checkin, checkout, habitaciones=None, today=None):
+    """Valida fechas ISO y habitaciones; devuelve (checkin, checkout, habitaciones)."""
+    today = today or date.today()
+    try:
+        checkin = date.fromisoformat(checkin or '')
+        checkout = date.fromisoformat(checkout or '')
+    except ValueError:
+        raise QuoteRequestError("Las fechas deben tener el formato AAAA-MM-DD") from None
+    if habitaciones in (None, ''):
+        habitaciones = 1
+    else:
+        try:
+            habitaciones = int(habitaciones)
+        except ValueError:
+            raise QuoteRequestError(f"Número de habitaciones no válido: {habitaciones}") from None
+    if not 1 <= habitaciones <= MAX_HABITACIONES:
+        raise QuoteRequestError(f"Las habitaciones deben estar entre 1 y {MAX_HABITACIONES}")
+    if checkin < today:
+        raise QuoteRequestError("La fecha de entrada ya ha pasado")
+    noches = (checkout - checkin).days
+    if noches < 1:
+        raise QuoteRequestError("La salida debe ser posterior a la entrada")
+    if noches > MAX_NOCHES:
+        raise QuoteRequestError(f"La estancia máxima es de {MAX_NOCHES} noches")
+    return checkin, checkout, habitaciones
+
+
+class RateCalendar:
+    """Tarifas y habitaciones libres por noche de un hotel, indexadas en arrays."""
+
+    __slots__ = ('start', 'rates', 'rooms', '_cumulative', '_min_rooms')
+
+    def __init__(self, start, rates, rooms):
+        self.start = start
+        self.rates = array('d', rates)
+        self.rooms = array('H', rooms)
+        if len(self.rates) != len(self.rooms):
+            raise ValueError("Tarifas e inventario deben cubrir las mismas noches")
+
+        # _cumulative[i] = suma de las tarifas de las noches 0..i-1
+        self._cumulative = array('d', [0.0])
+        running = 0.0
+        for rate in self.rates:
+            running += rate
+            self._cumulative.append(running)
+
+        # _min_rooms[k][i] = mínimo de rooms[i:i + 2**k]
+        self._min_rooms = [self.rooms]
+        span = 1
+        while span * 2 <= len(self.rooms):
+            previous = self._min_rooms[-1]
+            self._min_rooms.append(array('H', map(min, previous[:-span], previous[span:])))
+            span *= 2
+
+    def __len__(self):
+        return len(self.rates)
+
+    @property
+    def end(self):
+        """Primera fecha fuera del calendario."""
+        return self.start + timedelta(days=len(self.rates))
+
+    def _span(self, checkin, checkout):
+        lo = (checkin - self.start).days
+        hi = (checkout - self.start).days
+        if lo < 0 or hi > len(self.rates) or hi <= lo:
+            raise QuoteRequestError(f"Solo hay disponibilidad entre {self.start.isoformat()} "
+                                    f"y {self.end.isoformat()}")
+        return lo, hi
+
+    def total(self, checkin, checkout):
+        """Suma de las tarifas de las noches [checkin, checkout)."""
+        lo, hi = self._span(checkin, checkout)
+        return self._cumulative[hi] - self._cumulative[lo]
+
+    def free_rooms(self, checkin, checkout):
+        """Habitaciones libres todas las noches [checkin, checkout)."""
+        lo, hi = self._span(checkin, checkout)
+        level = (hi - lo).bit_length() - 1
+        table = self._min_rooms[level]
+        return min(table[lo], table[hi - (1 << level)])
+
+
+class Quote:
+    """Resultado de una cotización (total: todas las noches y habitaciones)."""
+
+    __slots__ = ('hotel_id', 'checkin', 'checkout', 'habitaciones', 'libres', 'total')
+
+    def __init__(self, hotel_id, checkin, checkout, habitaciones, libres, total):
+        self.hotel_id = hotel_id
+        self.checkin = checkin
+        self.checkout = checkout
+        self.habitaciones = habitaciones
+        self.libres = libres
+        self.total = total
+
+    @property
+    def noches(self):
+        return (self.checkout - self.checkin).days
+
+    @property
+    def disponible(self):
+        return self.libres >= self.habitaciones
+
+    def to_dict(self):
+        return {
+            'hotel': self.hotel_id,
+            'checkin': self.checkin.isoformat(),
+            'checkout': self.checkout.isoformat(),
+            'noches': self.noches,
+            'habitaciones': self.habitaciones,
+            'disponible': self.disponible,
+            'habitaciones_libres': self.libres,
+            # Sin disponibilidad no se publica un precio que no se puede reservar
+            'total': round(self.total, 2) if self.disponible else None,
+            'precio_medio_noche': (round(self.total / self.noches / self.habitaciones, 2)
+                                   if self.disponible else None),
+        }
+
+
+class MockInventoryProvider:
+    """Inventario simulado y determinista para desarrollo y pruebas.
+
+    La tarifa de cada noche es el precio base del hotel por la temporada del
+    mes (y el recargo de fin de semana); el cupo sale de un generador
+    aleatorio sembrado con el id del hotel, así que el mismo hotel devuelve
+    siempre el mismo calendario para la misma fecha de inicio.
+    """
+
+    def __init__(self, habitaciones=HABITACIONES_SIMULADAS, prob_completo=PROB_COMPLETO):
+        self.habitaciones = habitaciones
+        self.prob_completo = prob_completo
+
+    def calendar(self, hotel, start, days=HORIZON_DAYS):
+        """RateCalendar del hotel desde `start`, o None si no tiene precio."""
+        if hotel.precio is None:
+            return None
+        rng = random.Random(f"{hotel.id}:{start.isoformat()}")
+        rates, rooms = [], []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            rate = hotel.precio * TEMPORADA[day.month]
+            if day.weekday() in (4, 5):
+                rate *= RECARGO_FIN_DE_SEMANA
+            rates.append(round(rate))
+            rooms.append(0 if rng.random() < self.prob_completo
+                         else rng.randint(1, self.habitaciones))
+        return RateCalendar(start, rates, rooms)
+
+
+class QuoteEngine:
+    """Cotizaciones con calendarios por hotel y caché de TTL corto.
+
+    Los calendarios se piden al proveedor la primera vez que se cotiza un
+    hotel (y de nuevo si cambia su precio o el día); las cotizaciones se
+    reutilizan durante `ttl` segundos. Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, provider=None, ttl=QUOTE_TTL, max_entries=QUOTE_CACHE_SIZE,
+                 clock=time.monotonic, today=date.today):
+        self.provider = provider or MockInventoryProvider()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.today = today
+        self.hits = 0
+        self.misses = 0
+        self._calendars = {}
+        self._day = None
+        self._quotes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def calendar(self, hotel):
+        """Calendario vigente del hotel (None si el proveedor no tiene tarifas)."""
+        today = self.today()
+        key = (hotel.id, hotel.precio)
+        with self._lock:
+            if today != self._day:
+                # Cambio de día: los calendarios empiezan siempre hoy
+                self._calendars = {}
+                self._day = today
+            if key in self._calendars:
+                return self._calendars[key]
+        calendar = self.provider.calendar(hotel, today)
+        with self._lock:
+            if today == self._day:
+                self._calendars[key] = calendar
+        return calendar
+
+    def quote(self, hotel, checkin, checkout, habitaciones=None):
+        """Quote de una estancia, o None si el hotel no tiene tarifas.
+
+        Lanza QuoteRequestError si los parámetros no son válidos.
+        """
+        checkin, checkout, habitaciones = parse_quote_request(checkin, checkout, habitaciones,
+                                                              self.today())
+        key = (hotel.id, hotel.precio, checkin, checkout, habitaciones)
+        now = self.clock()
+        with self._lock:
+            entry = self._quotes.get(key)
+            if entry is not None and entry[0] > now:
+                self._quotes.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        calendar = self.calendar(hotel)
+        if calendar is None:
+            return None
+        quote = Quote(hotel.id, checkin, checkout, habitaciones,
+                      calendar.free_rooms(checkin, checkout),
+                      calendar.total(checkin, checkout) * habitaciones)
+        with self._lock:
+            self._quotes[key] = (now + self.ttl, quote)
+            self._quotes.move_to_end(key)
+            while len(self._quotes) > self.max_entries:
+                self._quotes.popitem(last=False)
+        return quote
+
+    def clear(self):
+        """Descarta calendarios y cotizaciones (p. ej. al recargar el catálogo)."""
+        with self._lock:
+            self._calendars = {}
+            self._quotes.clear()
+
+
+def _arg(name, default):
+    """Valor entero de una opción --nombre N."""
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+def check_engine(catalogo, consultas):
+    """Compara el índice con el cálculo noche a noche y mide cada consulta."""
+    provider = MockInventoryProvider()
+    today = date.today()
+    rng = random.Random(0)
+    errores = 0
+    elapsed = 0.0
+    calendars = [c for c in (provider.calendar(hotel, today) for hotel in catalogo) if c]
+    for _ in range(consultas):
+        calendar = rng.choice(calendars)
+        lo = rng.randrange(len(calendar) - 1)
+        hi = rng.randint(lo + 1, min(lo + MAX_NOCHES, len(calendar)))
+        checkin, checkout = today + timedelta(days=lo), today + timedelta(days=hi)
+        start = time.perf_counter()
+        total = calendar.total(checkin, checkout)
+        libres = calendar.free_rooms(checkin, checkout)
+        elapsed += time.perf_counter() - start
+        if abs(total - sum(calendar.rates[lo:hi])) > 1e-6 or libres != min(calendar.rooms[lo:hi]):
+            errores += 1
+    print(f"🏨 Calendarios: {len(calendars)} x {HORIZON_DAYS} noches")
+    print(f"🔎 Consultas: {consultas}, discrepancias con el cálculo noche a noche: {errores}")
+    print(f"⏱️ Tiempo medio por consulta: {elapsed / consultas * 1e6:.2f} µs")
+    return errores == 0
+
+
+def main():
+    from catalog import load_catalog
+
+    catalogo = load_catalog()
+    try:
+        if '--check' in sys.argv:
+            return 0 if check_engine(catalogo, _arg('--consultas', 20000)) else 1
+
+        values = {str(_arg('--habitaciones', None))}
+        positional = [arg for arg in sys.argv[1:] if not arg.startswith('--') and arg not in values]
+        if len(positional) != 3:
+            print("Uso: python scripts/availability.py <hotel_id> <checkin> <checkout> "
+                  "[--habitaciones 1]")
+            return 2
+        hotel = catalogo.get(positional[0])
+        if not hotel:
+            print(f"❌ Hotel no encontrado: {positional[0]}")
+            return 1
+        try:
+            quote = QuoteEngine().quote(hotel, positional[1], positional[2],
+                                        _arg('--habitaciones', None))
+        except QuoteRequestError as e:
+            print(f"❌ {e}")
+            return 1
+        if quote is None:
+            print(f"❌ {hotel.nombre} no tiene tarifas")
+            return 1
+        print(json.dumps(quote.to_dict(), indent=2, ensure_ascii=False))
+        return 0
+    finally:
+        catalogo.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
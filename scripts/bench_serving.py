@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la aplicación servida por WSGI (gunicorn + app.py) frente a ASGI
+(uvicorn + asgi.py).
+
+Arranca cada servidor en un puerto local, abre N conexiones keep-alive que
+piden en bucle /, una página de hotel y /api/hoteles, y mide peticiones por
+segundo y latencias. Con --lentas se mantienen además conexiones abiertas sin
+enviar nada (clientes lentos), que en WSGI síncrono ocupan un worker cada una.
+
+Uso: python scripts/bench_serving.py [--conexiones 200] [--peticiones 20]
+                                     [--lentas 0] [--workers 2]
+"""
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = ('/', '/hotel/ritz-paris/', '/api/hoteles')
+
+
+def _arg(name, default):
+    """Valor entero de una opción --nombre N."""
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def server_commands(port, workers):
+    """Comandos para arrancar cada variante en el puerto indicado."""
+    return {
+        'WSGI (gunicorn, sync)': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                  '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+                                  '--log-level', 'warning'],
+        'ASGI (uvicorn)': [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1',
+                           '--port', str(port), '--workers', str(workers),
+                           '--log-level', 'warning', '--no-access-log'],
+    }
+
+
+def wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+async def read_response(reader):
+    """Lee una respuesta HTTP/1.1 (Content-Length o chunked).
+
+    Devuelve (estado, cierra): los workers síncronos de gunicorn no mantienen
+    keep-alive y responden con Connection: close.
+    """
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get('connection', '').lower() == 'close'
+
+
+async def client(port, requests, latencies, errors):
+    """Un cliente keep-alive que hace `requests` peticiones seguidas.
+
+    Si el servidor cierra la conexión se abre otra, y su coste cuenta en la
+    latencia de la petición.
+    """
+    writer = None
+    try:
+        for i in range(requests):
+            path = PATHS[i % len(PATHS)]
+            start = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+            status, close = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+            if close:
+                writer.close()
+                writer = None
+    except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+        errors.append(type(e).__name__)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def run_load(port, connections, requests, slow):
+    """Lanza la carga y devuelve (segundos, latencias, errores)."""
+    idle = []
+    for _ in range(slow):
+        try:
+            idle.append(await asyncio.open_connection('127.0.0.1', port))
+        except OSError:
+            break
+    latencies, errors = [], []
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(client(port, requests, latencies, errors) for _ in range(connections))),
+            timeout=120)
+    except asyncio.TimeoutError:
+        errors.append('timeout')
+    elapsed = time.perf_counter() - start
+    for _, writer in idle:
+        writer.close()
+    return elapsed, latencies, errors
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float('nan')
+
+
+def main():
+    connections = _arg('--conexiones', 200)
+    requests = _arg('--peticiones', 20)
+    slow = _arg('--lentas', 0)
+    workers = _arg('--workers', 2)
+    print(f"⏱️  {connections} conexiones keep-alive x {requests} peticiones, "
+          f"{slow} clientes lentos, {workers} workers")
+
+    results = []
+    port = _free_port()
+    for name, command in server_commands(port, workers).items():
+        process = subprocess.Popen(command, cwd=ROOT_DIR, start_new_session=True)
+        try:
+            if not wait_for_port(port):
+                print(f"❌ {name}: el servidor no arrancó")
+                continue
+            asyncio.run(run_load(port, 4, 3, 0))  # calentamiento
+            elapsed, latencies, errors = asyncio.run(run_load(port, connections, requests, slow))
+            results.append((name, len(latencies) / elapsed, percentile(latencies, 0.5),
+                            percentile(latencies, 0.99), len(errors)))
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait()
+
+    print(f"\n{'Servidor':<24}{'pet/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errores':>10}")
+    for name, rps, p50, p99, errors in results:
+        print(f"{name:<24}{rps:>10.0f}{p50 * 1000:>10.1f}{p99 * 1000:>10.1f}{errors:>10}")
+
+
+if __name__ == "__main__":
+    main()
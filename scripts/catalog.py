@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Snapshot binario compacto del catálogo de hoteles.
+
+Compila data/hotels.json en data/hotels.bin: una tabla de cadenas internadas
+(cada cadena distinta se guarda una sola vez) y registros codificados con
+offsets, más una huella de cada registro para detectar qué hoteles cambian
+entre dos versiones sin decodificarlos (watch.py). El archivo se mapea en
+memoria (mmap) y cada hotel se decodifica bajo demanda, de modo que el
+arranque y la memoria por worker no crecen con el tamaño del catálogo. El
+snapshot se reconstruye solo cuando cambia hotels.json (o el almacén
+particionado data/hotels/, si existe).
+
+Uso: python scripts/catalog.py [--force]
+"""
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos al recompilar
+    fcntl = None
+
+from aggregates import aggregate_catalog
+from geo import GeoIndex
+from search import SearchIndex
+from model import Hotel
+from store import check_store, has_store, iter_hotels, store_fingerprint
+
+JSON_PATH = Path('data/hotels.json')
+SNAPSHOT_PATH = Path('data/hotels.bin')
+
+MAGIC = b'HCAT'
+FORMAT_VERSION = 4
+
+# magic, versión, origen (JSON o almacén), mtime_ns y tamaño del JSON origen, nº de cadenas,
+# nº de registros y offsets de las secciones (tabla de cadenas, datos de
+# cadenas, tabla de registros, datos de registros, huellas, índice por id)
+HEADER = struct.Struct('<4sHHqqIIQQQQQQ')
+
+# Bytes de la huella (BLAKE2b del registro codificado con las cadenas por su hash)
+DIGEST_SIZE = 16
+
+SOURCE_JSON, SOURCE_STORE = 0, 1
+
+# Etiquetas de tipo de la codificación de valores
+T_NONE, T_FALSE, T_TRUE, T_INT, T_FLOAT, T_STR, T_LIST, T_DICT = range(8)
+
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+_IDX = struct.Struct('<II')
+
+
+class _StringTable:
+    """Interna cadenas asignando a cada una un índice estable.
+
+    Guarda también un hash corto de cada cadena distinta, que sustituye al
+    índice en la huella de los registros (el índice depende del orden de
+    compilación; el hash, solo del contenido).
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+        self.hashes = []
+
+    def intern(self, value):
+        sid = self.ids.get(value)
+        if sid is None:
+            sid = len(self.strings)
+            self.ids[value] = sid
+            self.strings.append(value)
+            self.hashes.append(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest())
+        return sid
+
+
+def _encode_value(value, strings, out, canon):
+    """Codifica un valor JSON en `out` usando la tabla de cadenas.
+
+    En `canon` escribe lo mismo pero con el hash de cada cadena en lugar de su
+    índice: la entrada de la huella del registro.
+    """
+    if value is None:
+        out.append(T_NONE)
+        canon.append(T_NONE)
+    elif value is True:
+        out.append(T_TRUE)
+        canon.append(T_TRUE)
+    elif value is False:
+        out.append(T_FALSE)
+        canon.append(T_FALSE)
+    elif isinstance(value, int):
+        data = _I64.pack(value)
+        out.append(T_INT)
+        out += data
+        canon.append(T_INT)
+        canon += data
+    elif isinstance(value, float):
+        data = _F64.pack(value)
+        out.append(T_FLOAT)
+        out += data
+        canon.append(T_FLOAT)
+        canon += data
+    elif isinstance(value, str):
+        sid = strings.intern(value)
+        out.append(T_STR)
+        out += _U32.pack(sid)
+        canon.append(T_STR)
+        canon += strings.hashes[sid]
+    elif isinstance(value, (list, tuple)):
+        data = _U32.pack(len(value))
+        out.append(T_LIST)
+        out += data
+        canon.append(T_LIST)
+        canon += data
+        for item in value:
+            _encode_value(item, strings, out, canon)
+    elif isinstance(value, dict):
+        data = _U32.pack(len(value))
+        out.append(T_DICT)
+        out += data
+        canon.append(T_DICT)
+        canon += data
+        for key, item in value.items():
+            sid = strings.intern(str(key))
+            out += _U32.pack(sid)
+            canon += strings.hashes[sid]
+            _encode_value(item, strings, out, canon)
+    else:
+        raise TypeError(f"Tipo no soportado en el catálogo: {type(value).__name__}")
+
+
+def source_fingerprint(json_path=JSON_PATH):
+    """Devuelve (origen, mtime_ns, tamaño) de la fuente del catálogo.
+
+    Si existe el almacén particionado (data/hotels/) es la fuente de verdad;
+    si no, se usa hotels.json. Lanza StoreError si el almacén está desfasado
+    respecto a hotels.json, en lugar de servir datos viejos en silencio.
+    """
+    if has_store(json_path):
+        check_store(json_path)
+        return (SOURCE_STORE,) + store_fingerprint(json_path)
+    st = os.stat(json_path)
+    return SOURCE_JSON, st.st_mtime_ns, st.st_size
+
+
+def iter_source_records(json_path=JSON_PATH):
+    """Recorre los registros crudos de la fuente del catálogo, uno a uno."""
+    if has_store(json_path):
+        return iter_hotels(json_path)
+    return iter_hotels_json(json_path)
+
+
+def iter_hotels_json(json_path=JSON_PATH, chunk_size=1 << 16):
+    """Recorre un array JSON de hoteles leyendo por bloques, registro a registro.
+
+    Nunca mantiene en memoria más que el registro en curso y el bloque leído,
+    por lo que sirve para feeds de varios GB.
+    """
+    decoder = json.JSONDecoder()
+    with open(json_path, 'r', encoding='utf-8') as f:
+        buf = ''
+        pos = 0
+        eof = False
+        started = False
+        read_size = chunk_size
+        while True:
+            # Saltar espacios, el '[' inicial y las comas entre registros
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if not started and pos < len(buf):
+                if buf[pos] != '[':
+                    raise json.JSONDecodeError("Se esperaba un array de hoteles", buf, pos)
+                started = True
+                pos += 1
+                continue
+            if started and pos < len(buf) and buf[pos] == ']':
+                return
+            if pos < len(buf):
+                try:
+                    record, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    # Registro incompleto: leer más (en bloques crecientes)
+                    read_size *= 2
+                else:
+                    yield record
+                    pos = end
+                    read_size = chunk_size
+                    continue
+            elif eof:
+                if started:
+                    raise json.JSONDecodeError("Array de hoteles sin cerrar", buf, pos)
+                return
+            chunk = f.read(read_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+
+
+def compile_snapshot(json_path=JSON_PATH, snapshot_path=SNAPSHOT_PATH):
+    """Compila el JSON del catálogo en un snapshot binario (escritura atómica).
+
+    Los registros se leen en streaming y se codifican a un archivo temporal,
+    así que la memoria solo crece con la tabla de cadenas distintas.
+    """
+    json_path = Path(json_path)
+    snapshot_path = Path(snapshot_path)
+    source, mtime_ns, size = source_fingerprint(json_path)
+
+    strings = _StringTable()
+    record_offsets = array('Q', [0])
+    digests = bytearray()
+    ids = []
+    with tempfile.TemporaryFile() as records:
+        for i, raw in enumerate(iter_source_records(json_path)):
+            # Normalizar y validar una sola vez, al compilar
+            hotel = Hotel.from_dict(raw)
+            encoded_record = bytearray()
+            canonical = bytearray()
+            _encode_value(hotel.to_dict(), strings, encoded_record, canonical)
+            records.write(encoded_record)
+            digests += hashlib.blake2b(canonical, digest_size=DIGEST_SIZE).digest()
+            record_offsets.append(record_offsets[-1] + len(encoded_record))
+            ids.append((hotel.id, i))
+            if hotel.clean_id and hotel.clean_id != hotel.id:
+                ids.append((hotel.clean_id, i))
+        n_records = len(record_offsets) - 1
+
+        encoded = [s.encode('utf-8') for s in strings.strings]
+        string_offsets = array('I', [0])
+        for data in encoded:
+            string_offsets.append(string_offsets[-1] + len(data))
+
+        # Índice ordenado por id (y clean_id) para búsquedas binarias sobre el mmap
+        ids.sort(key=lambda item: item[0])
+        index = bytearray()
+        for hotel_id, record in ids:
+            index += _IDX.pack(strings.intern(hotel_id), record)
+
+        strtab_off = HEADER.size
+        strdata_off = strtab_off + _U32.size * len(string_offsets)
+        rectab_off = strdata_off + string_offsets[-1]
+        recdata_off = rectab_off + _U64.size * len(record_offsets)
+        digest_off = recdata_off + record_offsets[-1]
+        idx_off = digest_off + len(digests)
+
+        # Temporal propio de este proceso (como store.atomic_write_text): dos
+        # compilaciones simultáneas nunca escriben en el mismo archivo
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f'.{snapshot_path.name}.', suffix='.tmp',
+                                        dir=snapshot_path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, FORMAT_VERSION, source, mtime_ns, size,
+                                    len(encoded), n_records, strtab_off,
+                                    strdata_off, rectab_off, recdata_off, digest_off, idx_off))
+                f.write(_little_endian(string_offsets))
+                for data in encoded:
+                    f.write(data)
+                f.write(_little_endian(record_offsets))
+                records.seek(0)
+                shutil.copyfileobj(records, f)
+                f.write(digests)
+                f.write(index)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, snapshot_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
+    return n_records
+
+
+@contextmanager
+def compile_lock(snapshot_path=SNAPSHOT_PATH):
+    """Bloqueo exclusivo entre procesos (flock sobre <snapshot>.lock) para recompilar."""
+    if fcntl is None:
+        yield
+        return
+    snapshot_path = Path(snapshot_path)
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(snapshot_path.with_name(snapshot_path.name + '.lock'), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _little_endian(values):
+    """Serializa un array de enteros en little-endian, como el resto del formato."""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class CatalogSnapshot:
+    """Vista de solo lectura sobre un snapshot mapeado en memoria."""
+
+    def __init__(self, snapshot_path=SNAPSHOT_PATH, json_path=JSON_PATH):
+        self.path = Path(snapshot_path)
+        self.json_path = Path(json_path)
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.source, self.source_mtime_ns, self.source_size,
+         self._n_strings, self._n_records, self._strtab, self._strdata,
+         self._rectab, self._recdata, self._digests, self._idx) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"Snapshot incompatible: {self.path}")
+        self._n_index = (len(self._mm) - self._idx) // _IDX.size
+        self._aggregates = None
+        self._geo_index = None
+        self._search_index = None
+        self._similar = None
+        self._columns = None
+
+    def __len__(self):
+        return self._n_records
+
+    def __iter__(self):
+        for i in range(self._n_records):
+            yield self._decode_record(i)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._decode_record(i) for i in range(*key.indices(self._n_records))]
+        if key < 0:
+            key += self._n_records
+        if not 0 <= key < self._n_records:
+            raise IndexError(key)
+        return self._decode_record(key)
+
+    def get(self, hotel_id, default=None):
+        """Busca un hotel por id o clean_id (búsqueda binaria sobre el índice)."""
+        lo, hi = 0, self._n_index
+        while lo < hi:
+            mid = (lo + hi) // 2
+            sid, record = _IDX.unpack_from(self._mm, self._idx + mid * _IDX.size)
+            current = self._string(sid)
+            if current == hotel_id:
+                return self._decode_record(record)
+            if current < hotel_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return default
+
+    def aggregates(self):
+        """Agregados del catálogo (aggregates.py), calculados una vez por snapshot."""
+        if self._aggregates is None:
+            self._aggregates = aggregate_catalog(self)
+        return self._aggregates
+
+    def geo_index(self):
+        """Índice espacial de los hoteles con coordenadas (geo.py), una vez por snapshot."""
+        if self._geo_index is None:
+            self._geo_index = GeoIndex(self)
+        return self._geo_index
+
+    def search_index(self):
+        """Índice de búsqueda de texto completo (search.py), una vez por snapshot."""
+        if self._search_index is None:
+            self._search_index = SearchIndex(self)
+        return self._search_index
+
+    def similar(self):
+        """Hoteles similares de cada hotel (similar.py, requiere NumPy), una vez por snapshot."""
+        if self._similar is None:
+            from similar import similar_hotels
+            self._similar = similar_hotels(self)
+        return self._similar
+
+    def columns(self):
+        """Columnas numéricas y categóricas para filtrar y ordenar (columns.py, requiere NumPy)."""
+        if self._columns is None:
+            from columns import ColumnStore
+            self._columns = ColumnStore.from_hotels(self)
+        return self._columns
+
+    def record_digests(self):
+        """Huella de cada registro (bytes), en el orden del catálogo."""
+        data = self._mm[self._digests:self._digests + self._n_records * DIGEST_SIZE]
+        return [data[i:i + DIGEST_SIZE] for i in range(0, len(data), DIGEST_SIZE)]
+
+    def warm(self):
+        """Construye ya todos los índices perezosos (precarga antes del fork)."""
+        self.aggregates()
+        self.geo_index()
+        self.search_index()
+        self.similar()
+        self.columns()
+        return self
+
+    def is_stale(self):
+        """Indica si el JSON origen ha cambiado desde que se compiló."""
+        try:
+            return source_fingerprint(self.json_path) != (self.source, self.source_mtime_ns, self.source_size)
+        except FileNotFoundError:
+            return False
+
+    def close(self):
+        self._mm.close()
+
+    def _string(self, sid):
+        start, end = struct.unpack_from('<II', self._mm, self._strtab + sid * _U32.size)
+        return self._mm[self._strdata + start:self._strdata + end].decode('utf-8')
+
+    def _decode_record(self, i):
+        offset, _ = struct.unpack_from('<QQ', self._mm, self._rectab + i * _U64.size)
+        value, _ = self._decode_value(self._recdata + offset)
+        return Hotel.from_record(value)
+
+    def _decode_value(self, pos):
+        mm = self._mm
+        tag = mm[pos]
+        pos += 1
+        if tag == T_STR:
+            return self._string(_U32.unpack_from(mm, pos)[0]), pos + 4
+        if tag == T_DICT:
+            n = _U32.unpack_from(mm, pos)[0]
+            pos += 4
+            result = {}
+            for _ in range(n):
+                key = self._string(_U32.unpack_from(mm, pos)[0])
+                result[key], pos = self._decode_value(pos + 4)
+            return result, pos
+        if tag == T_LIST:
+            n = _U32.unpack_from(mm, pos)[0]
+            pos += 4
+            result = []
+            for _ in range(n):
+                item, pos = self._decode_value(pos)
+                result.append(item)
+            return result, pos
+        if tag == T_INT:
+            return _I64.unpack_from(mm, pos)[0], pos + 8
+        if tag == T_FLOAT:
+            return _F64.unpack_from(mm, pos)[0], pos + 8
+        if tag == T_NONE:
+            return None, pos
+        if tag == T_TRUE:
+            return True, pos
+        if tag == T_FALSE:
+            return False, pos
+        raise ValueError(f"Etiqueta desconocida {tag} en {self.path}")
+
+
+def _open_fresh(json_path, snapshot_path):
+    """Snapshot actual si existe y no está desactualizado; None si no."""
+    if snapshot_path.exists():
+        try:
+            snapshot = CatalogSnapshot(snapshot_path, json_path)
+            if not snapshot.is_stale():
+                return snapshot
+            snapshot.close()
+        except ValueError:
+            pass
+    return None
+
+
+def load_catalog(json_path=JSON_PATH, snapshot_path=SNAPSHOT_PATH):
+    """Devuelve el snapshot del catálogo, recompilándolo si está desactualizado.
+
+    Si varios procesos lo ven desactualizado a la vez (workers de gunicorn,
+    generate.py...), solo uno recompila: los demás esperan el bloqueo y abren
+    el snapshot ya nuevo.
+    """
+    json_path = Path(json_path)
+    snapshot_path = Path(snapshot_path)
+    snapshot = _open_fresh(json_path, snapshot_path)
+    if snapshot is not None:
+        return snapshot
+    with compile_lock(snapshot_path):
+        snapshot = _open_fresh(json_path, snapshot_path)
+        if snapshot is None:
+            compile_snapshot(json_path, snapshot_path)
+            snapshot = CatalogSnapshot(snapshot_path, json_path)
+    return snapshot
+
+
+def main():
+    """Compila el snapshot desde la línea de comandos."""
+    if '--force' in sys.argv or not SNAPSHOT_PATH.exists():
+        with compile_lock():
+            count = compile_snapshot()
+    else:
+        snapshot = load_catalog()
+        count = len(snapshot)
+        snapshot.close()
+    size = SNAPSHOT_PATH.stat().st_size
+    print(f"✅ Snapshot del catálogo: {SNAPSHOT_PATH} ({count} hoteles, {size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,148 +1,242 @@
 #!/usr/bin/env python3
 """
-Script para verificar si las imágenes de hoteles existen en el sistema de archivos.
+Script para verificar las imágenes de hoteles referenciadas en el catálogo.
+
+Toma una única instantánea del árbol static/images/hotels/ con os.scandir y
+comprueba contra ella cada ruta de `imagenes`. Después lee en paralelo solo
+la cabecera de cada imagen para validar el formato y las dimensiones, de modo
+que detecta archivos vacíos (placeholders creados con touch()), corruptos o
+con una extensión que no coincide con su contenido.
+
+Uso: python scripts/check_images_exist.py [--json]
 """
 
 import json
 import os
-from pathlib import Path
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
+from catalog import load_catalog
+
+IMAGES_ROOT = 'static/images/hotels'
+
+# Bytes leídos de cada imagen: suficiente para PNG, GIF y WebP; en JPEG se
+# recorren los segmentos con seek() hasta encontrar el SOF
+HEADER_BYTES = 64
+
+# Extensiones aceptadas para cada formato detectado
+FORMAT_EXTENSIONS = {
+    'webp': {'.webp'},
+    'jpeg': {'.jpg', '.jpeg'},
+    'png': {'.png'},
+    'gif': {'.gif'},
+}
+
+
 def load_hotel_data():
-    """Carga los datos de hoteles desde el archivo JSON."""
+    """Carga los hoteles desde el catálogo (data/hotels.json o data/hotels/)."""
     try:
-        with open('src/data/hotels.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_catalog()
     except FileNotFoundError:
-        print("Error: No se encontró el archivo src/data/hotels.json")
+        print("Error: No se encontró el archivo data/hotels.json", file=sys.stderr)
         return []
-    except json.JSONDecodeError as e:
-        print(f"Error al decodificar el archivo JSON: {e}")
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"Error al leer el catálogo: {e}", file=sys.stderr)
         return []
 
+
 def is_url(path):
     """Verifica si una ruta es una URL."""
     try:
         result = urlparse(path)
         return all([result.scheme, result.netloc])
-    except:
+    except ValueError:
         return False
 
-def check_image_exists(image_path, base_dir='src/static/images/hotels'):
-    """Verifica si una imagen existe."""
-    if is_url(image_path):
-        # Para URLs, asumimos que existen (no verificamos red)
-        return True, "URL externa"
-    
-    # Para rutas locales
-    if image_path.startswith('/'):
-        # Quitar la barra inicial
-        relative_path = image_path.lstrip('/')
-    else:
-        relative_path = image_path
-    
-    # Construir ruta completa
-    full_path = Path(base_dir) / os.path.basename(relative_path)
-    
-    if full_path.exists():
-        return True, str(full_path)
-    else:
-        return False, str(full_path)
 
-def check_hotel_images():
-    """Verifica todas las imágenes de todos los hoteles."""
-    print("Verificando existencia de imágenes de hoteles...\n")
-    
-    hotels = load_hotel_data()
-    if not hotels:
-        print("No se pudieron cargar los datos de hoteles.")
-        return
-    
-    total_images = 0
-    existing_images = 0
-    missing_images = 0
-    
-    for hotel in hotels:
-        print(f"Hotel: {hotel['name']}")
-        
-        if 'images' not in hotel or not hotel['images']:
-            print("  No hay imágenes definidas.")
+def scan_image_tree(root=IMAGES_ROOT):
+    """Instantánea del árbol de imágenes: {ruta relativa: tamaño en bytes}."""
+    snapshot = {}
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
             continue
-        
-        hotel_existing = 0
-        hotel_missing = 0
-        
-        for i, image_path in enumerate(hotel['images']):
-            total_images += 1
-            
-            exists, location = check_image_exists(image_path)
-            
-            if exists:
-                existing_images += 1
-                hotel_existing += 1
-                print(f"  ✓ Imagen {i+1}: {location}")
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    snapshot[entry.path.replace(os.sep, '/')] = entry.stat().st_size
+    return snapshot
+
+
+def _jpeg_dimensions(f):
+    """Recorre los segmentos JPEG hasta el marcador SOF y devuelve (ancho, alto)."""
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        # Relleno entre marcadores
+        while code == 0xFF:
+            byte = f.read(1)
+            if not byte:
+                return None
+            code = byte[0]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack('>HH', data[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def read_image_header(path, size):
+    """Lee la cabecera de una imagen y devuelve (formato, ancho, alto, error)."""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(HEADER_BYTES)
+            if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+                riff_size = struct.unpack('<I', head[4:8])[0]
+                if riff_size + 8 > size:
+                    return 'webp', None, None, 'archivo truncado'
+                chunk = head[12:16]
+                if chunk == b'VP8 ' and head[23:26] == b'\x9d\x01\x2a':
+                    width, height = struct.unpack('<HH', head[26:30])
+                    return 'webp', width & 0x3FFF, height & 0x3FFF, None
+                if chunk == b'VP8L' and head[20] == 0x2F:
+                    bits = struct.unpack('<I', head[21:25])[0]
+                    return 'webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, None
+                if chunk == b'VP8X':
+                    width = int.from_bytes(head[24:27], 'little') + 1
+                    height = int.from_bytes(head[27:30], 'little') + 1
+                    return 'webp', width, height, None
+                return 'webp', None, None, 'cabecera WebP inválida'
+            if head.startswith(b'\xff\xd8'):
+                dimensions = _jpeg_dimensions(f)
+                if not dimensions:
+                    return 'jpeg', None, None, 'cabecera JPEG inválida'
+                return ('jpeg',) + dimensions + (None,)
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+                width, height = struct.unpack('>II', head[16:24])
+                return 'png', width, height, None
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                width, height = struct.unpack('<HH', head[6:10])
+                return 'gif', width, height, None
+            return None, None, None, 'formato desconocido'
+    except OSError as e:
+        return None, None, None, str(e)
+
+
+def iter_image_refs(hotel):
+    """Recorre las rutas de `imagenes` de un hotel como (tipo, ruta)."""
+    if hotel.imagenes.hotel:
+        yield 'hotel', hotel.imagenes.hotel
+    for ruta in hotel.imagenes.pelicula:
+        yield 'pelicula', ruta
+    for ruta in hotel.imagenes.galeria:
+        yield 'galeria', ruta
+
+
+def verify_images(hotels, root=IMAGES_ROOT, max_workers=None, snapshot=None):
+    """Verifica todas las imágenes del catálogo y devuelve el informe.
+
+    `snapshot` permite reutilizar una instantánea de scan_image_tree() ya tomada.
+    """
+    if snapshot is None:
+        snapshot = scan_image_tree(root)
+    results = []
+    to_read = {}
+    for hotel in hotels:
+        for tipo, ruta in iter_image_refs(hotel):
+            item = {'hotel': hotel.id, 'tipo': tipo, 'ruta': ruta}
+            results.append(item)
+            if is_url(ruta):
+                item['estado'] = 'externa'
+                continue
+            local = ruta.lstrip('/')
+            size = snapshot.get(local)
+            if size is None:
+                item['estado'] = 'falta'
+            elif size == 0:
+                item['estado'] = 'vacia'
+                item['bytes'] = 0
             else:
-                missing_images += 1
-                hotel_missing += 1
-                print(f"  ✗ Imagen {i+1}: {location} - NO ENCONTRADA")
-        
-        print(f"  Resumen: {hotel_existing} existentes, {hotel_missing} faltantes\n")
-    
-    # Resumen final
+                item['bytes'] = size
+                to_read.setdefault(local, []).append(item)
+
+    # Lectura de cabeceras en paralelo (E/S pura: hilos)
+    workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        headers = executor.map(lambda local: read_image_header(local, snapshot[local]), to_read)
+        for local, (formato, ancho, alto, error) in zip(to_read, headers):
+            extension = os.path.splitext(local)[1].lower()
+            for item in to_read[local]:
+                item['formato'] = formato
+                if ancho and alto:
+                    item['ancho'] = ancho
+                    item['alto'] = alto
+                if error:
+                    item['estado'] = 'corrupta'
+                    item['error'] = error
+                elif extension not in FORMAT_EXTENSIONS[formato]:
+                    item['estado'] = 'extension_incorrecta'
+                else:
+                    item['estado'] = 'ok'
+
+    summary = {'total': len(results), 'archivos_en_disco': len(snapshot)}
+    for item in results:
+        summary[item['estado']] = summary.get(item['estado'], 0) + 1
+    problems = [item for item in results if item['estado'] not in ('ok', 'externa')]
+    return {'resumen': summary, 'problemas': problems, 'imagenes': results}
+
+
+def print_report(report):
+    """Muestra el informe en formato legible."""
+    summary = report['resumen']
     print("=== RESUMEN FINAL ===")
-    print(f"Total de imágenes verificadas: {total_images}")
-    print(f"Imágenes existentes: {existing_images}")
-    print(f"Imágenes faltantes: {missing_images}")
-    
-    if missing_images > 0:
-        print(f"\n⚠️  Advertencia: {missing_images} imágenes no encontradas.")
-        print("   Puede necesitar ejecutar el script de descarga de imágenes.")
-        return False
+    print(f"Total de imágenes verificadas: {summary['total']}")
+    print(f"Archivos en {IMAGES_ROOT}: {summary['archivos_en_disco']}")
+    for estado in ('ok', 'externa', 'falta', 'vacia', 'corrupta', 'extension_incorrecta'):
+        if summary.get(estado):
+            print(f"  {estado}: {summary[estado]}")
+    if report['problemas']:
+        print(f"\n⚠️  {len(report['problemas'])} imágenes con problemas:")
+        for item in report['problemas']:
+            detail = f" ({item['error']})" if item.get('error') else ''
+            print(f"  ✗ [{item['hotel']}] {item['tipo']}: {item['ruta']} - {item['estado']}{detail}")
     else:
-        print("✓ Todas las imágenes existen.")
-        return True
+        print("✓ Todas las imágenes existen y son válidas.")
+
 
-def list_missing_images():
-    """Lista todas las imágenes faltantes con detalles."""
-    print("\n=== DETALLE DE IMÁGENES FALTANTES ===")
-    
+def check_hotel_images(as_json=False):
+    """Verifica todas las imágenes de todos los hoteles."""
     hotels = load_hotel_data()
     if not hotels:
-        return
-    
-    missing_list = []
-    
-    for hotel in hotels:
-        if 'images' not in hotel or not hotel['images']:
-            continue
-        
-        for i, image_path in enumerate(hotel['images']):
-            exists, location = check_image_exists(image_path)
-            
-            if not exists:
-                missing_list.append({
-                    'hotel': hotel['name'],
-                    'image_index': i + 1,
-                    'image_path': image_path,
-                    'expected_location': location
-                })
-    
-    if missing_list:
-        print(f"Se encontraron {len(missing_list)} imágenes faltantes:\n")
-        
-        for missing in missing_list:
-            print(f"Hotel: {missing['hotel']}")
-            print(f"  Imagen #{missing['image_index']}")
-            print(f"  Ruta en JSON: {missing['image_path']}")
-            print(f"  Ubicación esperada: {missing['expected_location']}")
-            print()
+        print("No se pudieron cargar los datos de hoteles.", file=sys.stderr)
+        return False
+
+    report = verify_images(hotels)
+    if as_json:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
     else:
-        print("No se encontraron imágenes faltantes.")
+        print_report(report)
+    return not report['problemas']
+
 
 if __name__ == "__main__":
-    success = check_hotel_images()
-    
-    if not success:
-        response = input("\n¿Desea ver el detalle de las imágenes faltantes? (s/n): ")
-        if response.lower() == 's':
-            list_missing_images()
\ No newline at end of file
+    sys.exit(0 if check_hotel_images(as_json='--json' in sys.argv) else 1)
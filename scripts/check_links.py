@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Script para verificar los enlaces y recursos del sitio generado en dist/.
+
+Parsea en paralelo todos los HTML y el sitemap.xml de dist/, resuelve cada
+`src`, `href` e `image:loc` contra un índice en memoria de los archivos de
+dist/ (construido con un único recorrido del árbol) e informa de las
+referencias rotas. Está pensado para ejecutarse tras generate.py en cada
+despliegue.
+
+Uso: python scripts/check_links.py [--json] [--ignore PREFIJO ...]
+"""
+
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import unquote, urljoin, urlparse
+
+DIST_DIR = 'dist'
+
+# Atributos que referencian recursos o páginas
+LINK_ATTRS = {'src', 'href'}
+
+# Esquemas que no se pueden verificar contra dist/
+SKIP_SCHEMES = ('mailto:', 'tel:', 'javascript:', 'data:')
+
+# Prefijos ignorados por defecto: los añade Cloudflare en el borde
+DEFAULT_IGNORE = ('/cdn-cgi/',)
+
+SITEMAP_LOC_RE = re.compile(r'<(loc|image:loc)>\s*([^<]+?)\s*</\1>')
+
+# Páginas procesadas por cada tarea del pool
+BATCH_SIZE = 64
+
+
+class _LinkCollector(HTMLParser):
+    """Recoge los valores de src/href de un documento HTML."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if name in LINK_ATTRS and value is not None:
+                self.links.append((tag, name, value.strip()))
+
+    handle_startendtag = handle_starttag
+
+
+def build_file_index(dist_dir=DIST_DIR):
+    """Índice en memoria de los archivos de dist/ (rutas relativas POSIX)."""
+    files = set()
+    pending = [dist_dir]
+    while pending:
+        directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    files.add(os.path.relpath(entry.path, dist_dir).replace(os.sep, '/'))
+    return files
+
+
+def extract_links(path):
+    """Devuelve las referencias (etiqueta, atributo, url) de un HTML o sitemap."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        content = f.read()
+    if path.endswith('.xml'):
+        return [('sitemap', tag, url) for tag, url in SITEMAP_LOC_RE.findall(content)]
+    collector = _LinkCollector()
+    collector.feed(content)
+    collector.close()
+    return collector.links
+
+
+def _extract_batch(paths):
+    """Tarea del pool: extrae las referencias de un lote de archivos."""
+    return [(path, extract_links(path)) for path in paths]
+
+
+def resolve_reference(url, page, base_url, files):
+    """Resuelve una referencia contra el índice de dist/.
+
+    Devuelve None si no es verificable (externa, ancla, mailto...), o la
+    tupla (ruta_resuelta, existe).
+    """
+    if not url or url.startswith('#') or url.lower().startswith(SKIP_SCHEMES):
+        return None
+    base = urlparse(base_url) if base_url else None
+    parsed = urlparse(url)
+    if parsed.scheme or parsed.netloc:
+        # Las URLs absolutas solo se verifican si apuntan al propio sitio
+        if not base or (parsed.scheme or base.scheme, parsed.netloc) != (base.scheme, base.netloc):
+            return None
+    path = unquote(parsed.path)
+    if not path:
+        return None
+    if path.startswith('/'):
+        # Quitar el prefijo de ruta del sitio (p. ej. /hoteles-booking-web-pages)
+        prefix = base.path.rstrip('/') if base else ''
+        if prefix and (path == prefix or path.startswith(prefix + '/')):
+            path = path[len(prefix):] or '/'
+        resolved = path.lstrip('/')
+    else:
+        page_url = '/' + page
+        resolved = urlparse(urljoin(page_url, path)).path.lstrip('/')
+    resolved = resolved.rstrip('/')
+    if resolved in files:
+        return resolved, True
+    index = f"{resolved}/index.html" if resolved else 'index.html'
+    return index, index in files
+
+
+def check_links(dist_dir=DIST_DIR, base_url='', ignore=DEFAULT_IGNORE, max_workers=None):
+    """Verifica todas las referencias de dist/ y devuelve el informe."""
+    files = build_file_index(dist_dir)
+    pages = sorted(f for f in files if f.endswith('.html') or f == 'sitemap.xml')
+    paths = [os.path.join(dist_dir, page) for page in pages]
+    batches = [paths[i:i + BATCH_SIZE] for i in range(0, len(paths), BATCH_SIZE)]
+
+    broken = []
+    checked = 0
+    skipped = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for batch in executor.map(_extract_batch, batches):
+            for path, links in batch:
+                page = os.path.relpath(path, dist_dir).replace(os.sep, '/')
+                for tag, attr, url in links:
+                    result = resolve_reference(url, page, base_url, files)
+                    if result is None:
+                        skipped += 1
+                        continue
+                    resolved, exists = result
+                    # Los prefijos ignorados se comparan con la URL original y
+                    # con la ruta dentro del sitio (sin BASE_URL)
+                    if any(url.startswith(prefix) or ('/' + resolved).startswith(prefix)
+                           for prefix in ignore):
+                        skipped += 1
+                        continue
+                    checked += 1
+                    if not exists:
+                        broken.append({'pagina': page, 'etiqueta': tag, 'atributo': attr,
+                                       'url': url, 'resuelta': resolved})
+
+    return {
+        'resumen': {'paginas': len(pages), 'archivos': len(files),
+                    'referencias_verificadas': checked, 'omitidas': skipped,
+                    'rotas': len(broken)},
+        'rotas': broken,
+    }
+
+
+def print_report(report):
+    """Muestra el informe en formato legible."""
+    summary = report['resumen']
+    print("=== VERIFICACIÓN DE ENLACES ===")
+    print(f"Páginas analizadas: {summary['paginas']}")
+    print(f"Referencias verificadas: {summary['referencias_verificadas']} (omitidas: {summary['omitidas']})")
+    if report['rotas']:
+        print(f"\n❌ {summary['rotas']} referencias rotas:")
+        for item in report['rotas']:
+            print(f"  ✗ {item['pagina']}: <{item['etiqueta']} {item['atributo']}=\"{item['url']}\"> -> {item['resuelta']}")
+    else:
+        print("✅ Todas las referencias apuntan a archivos existentes.")
+
+
+def main():
+    """Punto de entrada de la línea de comandos."""
+    args = sys.argv[1:]
+    ignore = list(DEFAULT_IGNORE)
+    while '--ignore' in args:
+        i = args.index('--ignore')
+        ignore.append(args[i + 1])
+        del args[i:i + 2]
+
+    if not os.path.isdir(DIST_DIR):
+        print(f"❌ El directorio {DIST_DIR}/ no existe. Ejecuta antes scripts/generate.py")
+        sys.exit(1)
+
+    report = check_links(DIST_DIR, os.environ.get('BASE_URL', ''), tuple(ignore))
+    if '--json' in args:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print_report(report)
+    sys.exit(1 if report['rotas'] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Representación columnar del catálogo para filtrar y ordenar con NumPy.
+
+Los campos numéricos (precio, valoración y año) se guardan como arrays
+float64 (NaN si faltan) y los categóricos (país y película) codificados con
+diccionario: la lista de valores distintos y un array de códigos por hotel.
+Los numéricos también se codifican, con la posición de cada valor entre los
+distintos ordenados, y todos los códigos usan el entero sin signo más
+pequeño posible (uint8 o uint16 en la práctica).
+Al construir el almacén se precalculan, por cada campo, la permutación de
+los hoteles ordenados por ese campo (ascendente y descendente en los
+numéricos) y la posición de cada hotel en ella.
+
+Una consulta combina rangos numéricos y valores categóricos:
+
+- el predicado más selectivo se resuelve con los índices (búsqueda binaria
+  sobre los valores distintos y su tramo de la permutación) sin recorrer el
+  catálogo, y el resto se evalúa con máscaras booleanas solo sobre esos
+  candidatos
+- si ninguno es selectivo, se cruzan bitmaps de 64 bits por palabra: cada
+  columna guarda bitmaps acumulados por tramos de códigos, de modo que un rango
+  son dos bitmaps más los hoteles de los tramos de los extremos
+- el orden sale de los rangos precalculados si hay pocos resultados y, si hay
+  muchos, recorriendo por bloques la permutación ordenada hasta llenar la página
+
+Lo usan /api/hoteles/filter (app.py y asgi.py) y los filtros de la página
+principal cuando el sitio se sirve con la API.
+
+Uso: python scripts/columns.py [pais=Francia] [rating_min=9] [orden=-rating] ...
+     python scripts/columns.py --bench [--hoteles 1000000]
+"""
+import math
+import sys
+import time
+
+import numpy as np
+
+from aggregates import country_of
+from geo import normalize_place
+
+NUMERIC_FIELDS = ('precio', 'rating', 'anio')
+CATEGORICAL_FIELDS = ('pais', 'pelicula')
+
+# Órdenes admitidos ('-' delante: descendente)
+ORDENES = tuple(order for field in NUMERIC_FIELDS for order in (field, '-' + field))
+
+# Resultados por página, máximo por consulta y longitud máxima de un valor categórico
+FILTER_DEFAULT = 20
+FILTER_MAX = 100
+MAX_VALUE_LENGTH = 200
+
+# Si el predicado más selectivo deja más candidatos que esto, los predicados
+# se combinan con bitmaps en lugar de comprobarse candidato a candidato; con
+# más coincidencias que esto se recorre la permutación ordenada (en bloques de
+# WALK_BLOCK posiciones) en lugar de ordenar las coincidencias
+CANDIDATE_LIMIT = 8192
+WALK_BLOCK = 4096
+
+# Tramos de códigos con bitmap propio por columna
+MAX_BINS = 128
+
+
+class FilterRequestError(ValueError):
+    """Parámetros de filtrado u orden no válidos (respuesta 400)."""
+
+
+class ColumnQuery:
+    """Consulta validada: rangos numéricos, valores categóricos, orden y página."""
+
+    __slots__ = ('rangos', 'categorias', 'orden', 'k', 'offset', 'params')
+
+    def __init__(self, rangos=None, categorias=None, orden=None, k=FILTER_DEFAULT, offset=0, params=None):
+        self.rangos = rangos or {}          # campo -> (mínimo, máximo), -inf/inf si no hay
+        self.categorias = categorias or {}  # campo -> valor
+        self.orden = orden                  # 'precio', '-rating'... o None (orden del catálogo)
+        self.k = k
+        self.offset = offset
+        self.params = params or {}          # parámetros tal como llegaron (sin los vacíos)
+
+    def __bool__(self):
+        return bool(self.rangos or self.categorias or self.orden or self.offset)
+
+
+def parse_filter_request(args):
+    """Valida los parámetros (mapping con .get) y devuelve un ColumnQuery.
+
+    Admite <campo>_min y <campo>_max para precio, rating y anio, pais,
+    pelicula, orden (precio, -precio, rating, ...), k y offset. Los valores
+    vacíos cuentan como ausentes.
+    """
+    params = {}
+    for name in [f"{field}_{bound}" for field in NUMERIC_FIELDS for bound in ('min', 'max')] + \
+            list(CATEGORICAL_FIELDS) + ['orden', 'k', 'offset']:
+        value = args.get(name)
+        if value not in (None, ''):
+            params[name] = value.strip()
+
+    rangos = {}
+    for field in NUMERIC_FIELDS:
+        bounds = []
+        for bound, default in (('min', -math.inf), ('max', math.inf)):
+            value = params.get(f"{field}_{bound}")
+            if value is None:
+                bounds.append(default)
+                continue
+            try:
+                value = float(value)
+            except ValueError:
+                raise FilterRequestError(f"{field}_{bound} no válido: {value}") from None
+            if not math.isfinite(value):
+                raise FilterRequestError(f"{field}_{bound} no válido: {value}")
+            bounds.append(value)
+        if bounds[0] > bounds[1]:
+            raise FilterRequestError(f"{field}_min no puede ser mayor que {field}_max")
+        if bounds != [-math.inf, math.inf]:
+            rangos[field] = tuple(bounds)
+
+    categorias = {}
+    for field in CATEGORICAL_FIELDS:
+        value = params.get(field)
+        if value is not None:
+            if len(value) > MAX_VALUE_LENGTH:
+                raise FilterRequestError(f"{field} no puede superar {MAX_VALUE_LENGTH} caracteres")
+            categorias[field] = value
+
+    orden = params.get('orden')
+    if orden is not None and orden not in ORDENES:
+        raise FilterRequestError(f"orden debe ser uno de: {', '.join(ORDENES)}")
+    try:
+        k = int(params['k']) if 'k' in params else FILTER_DEFAULT
+        offset = int(params['offset']) if 'offset' in params else 0
+    except ValueError:
+        raise FilterRequestError("Parámetros k u offset no válidos") from None
+    if not 1 <= k <= FILTER_MAX:
+        raise FilterRequestError(f"k debe estar entre 1 y {FILTER_MAX}")
+    if offset < 0:
+        raise FilterRequestError("offset no puede ser negativo")
+    return ColumnQuery(rangos, categorias, orden, k, offset, params)
+
+
+class Dictionary:
+    """Columna categórica codificada con diccionario."""
+
+    __slots__ = ('values', 'codes', '_lookup')
+
+    def __init__(self, values, codes):
+        self.values = values  # valor de cada código
+        self.codes = codes    # código de cada hotel (len(values) si no tiene)
+        self._lookup = {normalize_place(value): code for code, value in enumerate(values)}
+
+    @classmethod
+    def encode(cls, items):
+        """Codifica una secuencia de cadenas (vacías o None: sin valor)."""
+        codes_by_key, values, codes = {}, [], []
+        for item in items:
+            key = normalize_place(item)
+            if not key:
+                codes.append(-1)
+                continue
+            code = codes_by_key.get(key)
+            if code is None:
+                code = codes_by_key[key] = len(values)
+                values.append(item.strip())
+            codes.append(code)
+        codes = np.array(codes, dtype=np.int64)
+        codes[codes < 0] = len(values)
+        return cls(values, codes)
+
+    def code(self, value):
+        """Código de un valor (sin tildes ni mayúsculas); None si no existe."""
+        return self._lookup.get(normalize_place(value))
+
+    def sorted_values(self):
+        """Valores distintos en orden alfabético (para los desplegables)."""
+        return sorted(self.values, key=normalize_place)
+
+
+def _compact(codes, ncodes):
+    """Códigos 0..ncodes (ncodes: sin valor) en el entero sin signo más pequeño."""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if ncodes <= np.iinfo(dtype).max:
+            return codes.astype(dtype)
+    return codes.astype(np.uint64)
+
+
+def _ranks(perm):
+    rank = np.empty(len(perm), dtype=np.int32)
+    rank[perm] = np.arange(len(perm), dtype=np.int32)
+    return rank
+
+
+def _pack(mask, words):
+    """Máscara booleana -> bitmap de `words` enteros de 64 bits (bit i: hotel i)."""
+    packed = np.zeros(words * 8, dtype=np.uint8)
+    bits = np.packbits(mask, bitorder='little')
+    packed[:len(bits)] = bits
+    return packed.view('<u8')
+
+
+def _test(bitmap, rows):
+    """Máscara de los hoteles de `rows` cuyo bit está activo."""
+    rows = rows.astype(np.uint64)
+    return ((bitmap[rows >> np.uint64(6)] >> (rows & np.uint64(63))) & np.uint64(1)).astype(bool)
+
+
+class Column:
+    """Códigos de una columna con sus hoteles ordenados por código y sus bitmaps.
+
+    `offsets[c]` es el número de hoteles con código menor que c, así que los
+    que tienen un código entre `low` y `high` son un tramo de `perm`. Los
+    bitmaps (uno por tramo de códigos, acumulados: el j marca los hoteles de
+    los tramos anteriores a j) se construyen la primera vez que se piden.
+    """
+
+    __slots__ = ('codes', 'ncodes', 'offsets', 'perm', '_bounds', '_cumulative')
+
+    def __init__(self, codes, ncodes):
+        self.codes = _compact(codes, ncodes)
+        self.ncodes = ncodes
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(self.codes, minlength=ncodes + 1))))
+        self.perm = np.argsort(self.codes, kind='stable').astype(np.int32)
+        self._bounds = self._cumulative = None
+
+    def count(self, low, high):
+        return int(self.offsets[high + 1] - self.offsets[low])
+
+    def rows(self, low, high):
+        """Hoteles con código entre low y high, por código y en orden del catálogo."""
+        return self.perm[self.offsets[low]:self.offsets[high + 1]]
+
+    def contains(self, rows, low, high):
+        codes = self.codes[rows]
+        return (codes >= low) & (codes <= high)
+
+    def _build_bitmaps(self, words):
+        present = self.offsets[self.ncodes]
+        if self.ncodes <= MAX_BINS:
+            bounds = np.arange(self.ncodes + 1)
+        else:
+            # Tramos con un número parecido de hoteles
+            targets = np.linspace(0, present, MAX_BINS + 1)[1:-1]
+            inner = np.searchsorted(self.offsets[:self.ncodes + 1], targets)
+            bounds = np.unique(np.concatenate(([0], inner, [self.ncodes])))
+        bins = np.searchsorted(bounds, self.codes, 'right') - 1
+        self._cumulative = np.stack([_pack(bins < j, words) for j in range(len(bounds))])
+        self._bounds = bounds
+
+    def bitmap(self, low, high, words):
+        """Bitmap de los hoteles con código entre low y high."""
+        if self._bounds is None:
+            self._build_bitmaps(words)
+        bounds = self._bounds
+        first = int(np.searchsorted(bounds, low, 'left'))
+        last = int(np.searchsorted(bounds, high + 1, 'right')) - 1
+        if first < last:
+            # Tramos completos con dos bitmaps; los extremos, hotel a hotel
+            bitmap = self._cumulative[last] & ~self._cumulative[first]
+            partial = ((low, int(bounds[first])), (int(bounds[last]), high + 1))
+        else:
+            bitmap = np.zeros(words, dtype='<u8')
+            partial = ((low, high + 1),)
+        for start, end in partial:
+            if start < end:
+                rows = self.rows(start, end - 1).astype(np.uint64)
+                np.bitwise_or.at(bitmap, rows >> np.uint64(6), np.uint64(1) << (rows & np.uint64(63)))
+        return bitmap
+
+
+class ColumnStore:
+    """Columnas del catálogo con sus índices de orden precalculados.
+
+    Cada columna se guarda como códigos enteros compactos: los categóricos
+    son los del diccionario y los numéricos la posición de cada valor entre
+    los valores distintos ordenados, así que un rango de valores es un rango
+    de códigos y cuántos hoteles lo cumplen sale de Column.offsets sin
+    recorrer la columna.
+    """
+
+    def __init__(self, numeric, categorical):
+        self.numeric = numeric          # campo -> array float64 (NaN si falta)
+        self.categorical = categorical  # campo -> Dictionary
+        self.n = len(next(iter(numeric.values())))
+        self._words = (self.n + 63) // 64
+        self.columns = {}               # campo -> Column
+        self._distinct = {}             # campo numérico -> valores distintos ordenados
+        self._perm = {}                 # orden -> permutación (sin valor siempre al final)
+        self._rank = {}                 # orden -> posición de cada hotel en su permutación
+        for field, values in numeric.items():
+            distinct = np.unique(values[~np.isnan(values)])
+            self._distinct[field] = distinct
+            # searchsorted coloca NaN después de todos: código len(distinct)
+            column = self.columns[field] = Column(np.searchsorted(distinct, values), len(distinct))
+            ncodes = column.ncodes
+            descending = np.where(column.codes == ncodes, ncodes, ncodes - 1 - column.codes.astype(np.int64))
+            self._perm[field] = column.perm
+            self._perm['-' + field] = np.argsort(descending, kind='stable').astype(np.int32)
+            self._rank[field] = _ranks(self._perm[field])
+            self._rank['-' + field] = _ranks(self._perm['-' + field])
+        for field, dictionary in categorical.items():
+            self.columns[field] = Column(dictionary.codes, len(dictionary.values))
+
+    @classmethod
+    def from_hotels(cls, hotels):
+        """ColumnStore de un iterable de hoteles, en el orden del catálogo."""
+        numeric = {field: [] for field in NUMERIC_FIELDS}
+        paises, peliculas = [], []
+        for hotel in hotels:
+            for field in NUMERIC_FIELDS:
+                value = getattr(hotel, field)
+                numeric[field].append(math.nan if value is None else value)
+            paises.append(country_of(hotel.ubicacion))
+            peliculas.append(hotel.pelicula)
+        numeric = {field: np.array(values, dtype=np.float64) for field, values in numeric.items()}
+        return cls(numeric, {'pais': Dictionary.encode(paises), 'pelicula': Dictionary.encode(peliculas)})
+
+    def __len__(self):
+        return self.n
+
+    def _predicates(self, query):
+        """[(columna, código mínimo, código máximo, hoteles que lo cumplen, campo)]
+        del más al menos selectivo, o None si alguno no se cumple nunca."""
+        ranges = []
+        for field, (low, high) in query.rangos.items():
+            distinct = self._distinct[field]
+            ranges.append((field, int(np.searchsorted(distinct, low, 'left')),
+                           int(np.searchsorted(distinct, high, 'right')) - 1))
+        for field, value in query.categorias.items():
+            code = self.categorical[field].code(value)
+            if code is None:
+                return None
+            ranges.append((field, code, code))
+        if any(low > high for _, low, high in ranges):
+            return None
+        predicates = [(self.columns[field], low, high, self.columns[field].count(low, high), field)
+                      for field, low, high in ranges]
+        return sorted(predicates, key=lambda predicate: predicate[3])
+
+    def _order_range(self, orden, predicates):
+        """Tramo de la permutación de `orden` que puede contener resultados."""
+        field = orden.lstrip('-')
+        for column, low, high, _, name in predicates:
+            if name == field:
+                start, end = int(column.offsets[low]), int(column.offsets[high + 1])
+                if orden == field:
+                    return start, end
+                present = int(column.offsets[column.ncodes])
+                return present - end, present - start
+        return 0, self.n
+
+    def query(self, query):
+        """(total de coincidencias, posiciones de la página pedida en el catálogo)."""
+        predicates = self._predicates(query)
+        if predicates is None:
+            return 0, []
+        wanted = query.offset + query.k
+        matches = bitmap = None
+        if not predicates:
+            total = self.n
+        elif len(predicates) == 1 or predicates[0][3] <= CANDIDATE_LIMIT:
+            # El predicado más selectivo da los candidatos; el resto se evalúa sobre ellos
+            column, low, high, _, _ = predicates[0]
+            matches = column.rows(low, high)
+            for column, low, high, _, _ in predicates[1:]:
+                matches = matches[column.contains(matches, low, high)]
+            total = len(matches)
+        else:
+            # Ningún predicado es selectivo: intersección de bitmaps
+            bitmap = predicates[0][0].bitmap(*predicates[0][1:3], self._words)
+            for column, low, high, _, _ in predicates[1:]:
+                bitmap &= column.bitmap(low, high, self._words)
+            total = int(np.bitwise_count(bitmap).sum(dtype=np.int64))
+
+        if total == 0 or query.offset >= total:
+            return total, []
+        if matches is not None and total <= CANDIDATE_LIMIT:
+            key = self._rank[query.orden][matches] if query.orden else matches
+            return total, matches[np.argsort(key, kind='stable')][query.offset:wanted].tolist()
+
+        # Muchas coincidencias: recorrer el orden pedido hasta llenar la página
+        if query.orden:
+            perm = self._perm[query.orden]
+            start, end = self._order_range(query.orden, predicates)
+        else:
+            perm, start, end = None, 0, self.n
+        found = []
+        collected = 0
+        for position in range(start, end, WALK_BLOCK):
+            stop = min(position + WALK_BLOCK, end)
+            block = perm[position:stop] if perm is not None else np.arange(position, stop, dtype=np.int32)
+            if bitmap is not None:
+                block = block[_test(bitmap, block)]
+            else:
+                for column, low, high, _, _ in predicates:
+                    block = block[column.contains(block, low, high)]
+            found.append(block)
+            collected += len(block)
+            if collected >= wanted:
+                break
+        return total, np.concatenate(found)[query.offset:wanted].tolist()
+
+
+def listing_context(catalogo, query):
+    """Contexto de la página principal con los filtros de `query` aplicados."""
+    columnas = catalogo.columns()
+    hoteles, total = catalogo, len(catalogo)
+    if query:
+        total, filas = columnas.query(query)
+        hoteles = [catalogo[i] for i in filas]
+    return {
+        'hoteles': hoteles,
+        'total': total,
+        'filtro': query,
+        'paises': columnas.categorical['pais'].sorted_values(),
+    }
+
+
+def filter_response(catalogo, query):
+    """Cuerpo JSON de /api/hoteles/filter."""
+    total, filas = catalogo.columns().query(query)
+    return {
+        'total': total,
+        'offset': query.offset,
+        'hoteles': [catalogo[i].to_dict() for i in filas],
+    }
+
+
+def _arg(name, default):
+    """Valor entero de una opción --nombre N."""
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+def synthetic_store(total, seed=0):
+    """ColumnStore de `total` hoteles aleatorios (5% sin precio, valoración o año)."""
+    rng = np.random.default_rng(seed)
+    numeric = {
+        'precio': np.round(rng.lognormal(5.8, 0.6, total)),
+        'rating': np.round(rng.uniform(6, 10, total), 1),
+        'anio': rng.integers(1920, 2025, total).astype(np.float64),
+    }
+    for column in numeric.values():
+        column[rng.random(total) < 0.05] = np.nan
+    paises = [f"País {i}" for i in range(60)]
+    peliculas = [f"Película {i}" for i in range(5000)]
+    # Unos pocos países concentran la mayoría de hoteles
+    weights = 1 / np.arange(1, len(paises) + 1)
+    categorical = {
+        'pais': Dictionary(paises, rng.choice(len(paises), total, p=weights / weights.sum())),
+        'pelicula': Dictionary(peliculas, rng.integers(0, len(peliculas) + 1, total)),
+    }
+    return ColumnStore(numeric, categorical)
+
+
+def bench(total):
+    """Mide consultas de varios criterios sobre `total` hoteles sintéticos."""
+    start = time.perf_counter()
+    store = synthetic_store(total)
+    print(f"🏗️ Columnas e índices de {len(store)} hoteles en {time.perf_counter() - start:.2f} s")
+    consultas = (
+        {'pais': 'País 3', 'rating_min': '9.5', 'orden': 'precio'},
+        {'precio_max': '300', 'rating_min': '9', 'orden': '-rating'},
+        {'anio_min': '1990', 'anio_max': '2000', 'precio_max': '500'},
+        {'pais': 'País 0', 'precio_min': '200', 'precio_max': '400', 'anio_min': '1980',
+         'rating_min': '8', 'orden': '-anio'},
+        {'rating_min': '7', 'orden': 'precio'},
+        {'pelicula': 'Película 42', 'orden': '-rating'},
+        {'orden': '-rating', 'offset': '1000'},
+    )
+    for params in consultas:
+        query = parse_filter_request(params)
+        # La primera consulta construye los bitmaps de las columnas que usa
+        store.query(query)
+        runs = 200
+        start = time.perf_counter()
+        for _ in range(runs):
+            resultado_total, filas = store.query(query)
+        elapsed = (time.perf_counter() - start) / runs
+        descripcion = '&'.join(f"{name}={value}" for name, value in params.items())
+        print(f"⏱️ {descripcion}: {elapsed * 1000:.3f} ms ({resultado_total} coincidencias, {len(filas)} en la página)")
+
+
+def main():
+    if '--bench' in sys.argv:
+        bench(_arg('--hoteles', 1000000))
+        return 0
+
+    from catalog import load_catalog
+
+    try:
+        query = parse_filter_request(dict(arg.split('=', 1) for arg in sys.argv[1:] if '=' in arg))
+    except FilterRequestError as e:
+        print(f"❌ {e}")
+        return 2
+    catalogo = load_catalog()
+    try:
+        total, filas = catalogo.columns().query(query)
+        print(f"🔎 {total} hoteles")
+        for i in filas:
+            hotel = catalogo[i]
+            print(f"   {hotel.nombre} ({hotel.ubicacion}) - ${hotel.precio} · ⭐ {hotel.rating} · {hotel.anio}")
+        return 0
+    finally:
+        catalogo.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Elimina imágenes repetidas de `imagenes` en cada hotel.
+
+Quita las rutas que aparecen más de una vez y las imágenes locales cuyo
+contenido es idéntico al de otra ya referenciada por el mismo hotel (por
+ejemplo, las copias de la imagen principal que download_hotel_images.py crea
+cuando la galería está vacía). Solo se calcula el hash de los archivos cuyo
+tamaño coincide con el de otro, así que normalmente no se lee ninguno.
+
+Los archivos no se borran: dejan de estar referenciados y
+`python scripts/assets.py` los lista como huérfanos.
+
+Uso: python scripts/dedup_images.py
+"""
+import hashlib
+import sys
+
+from check_images_exist import is_url, scan_image_tree
+from store import StoreError, load_hotels, save_hotels, store_dir_for
+
+
+def file_hash(path):
+    """sha256 del contenido de un archivo."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dedup_hotel_images(hotel, sizes, hash_of=file_hash):
+    """Quita de un hotel (dict crudo) las imágenes repetidas.
+
+    `sizes` es la instantánea {ruta local: bytes} de scan_image_tree() y
+    `hash_of(ruta)` devuelve el hash del contenido. Devuelve las rutas quitadas.
+    """
+    imagenes = hotel.get('imagenes') or {}
+    seen_paths = set()
+    kept_by_size = {}
+    removed = []
+
+    def keep(path):
+        if path in seen_paths:
+            return False
+        seen_paths.add(path)
+        local = path.lstrip('/')
+        size = sizes.get(local)
+        if is_url(path) or not size:
+            return True
+        same_size = kept_by_size.setdefault(size, [])
+        if same_size:
+            digest = hash_of(local)
+            if any(hash_of(other) == digest for other in same_size):
+                return False
+        same_size.append(local)
+        return True
+
+    if imagenes.get('hotel'):
+        keep(imagenes['hotel'])
+    for slot in ('pelicula', 'galeria'):
+        paths = imagenes.get(slot)
+        if not isinstance(paths, list):
+            continue
+        kept = []
+        for path in paths:
+            (kept if keep(path) else removed).append(path)
+        imagenes[slot] = kept
+
+    lqip = imagenes.get('lqip')
+    if removed and lqip:
+        referenced = {imagenes.get('hotel')} | set(imagenes.get('pelicula') or ()) | set(imagenes.get('galeria') or ())
+        imagenes['lqip'] = {path: uri for path, uri in lqip.items() if path in referenced}
+    return sorted(set(removed))
+
+
+def dedup_images(hotels, sizes=None, hash_of=file_hash):
+    """Aplica dedup_hotel_images() a todo el catálogo; devuelve {id: rutas quitadas}."""
+    sizes = scan_image_tree() if sizes is None else sizes
+    result = {}
+    for hotel in hotels:
+        removed = dedup_hotel_images(hotel, sizes, hash_of)
+        if removed:
+            result[hotel.get('id')] = removed
+    return result
+
+
+def main():
+    try:
+        hotels = load_hotels()
+    except StoreError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    removed = dedup_images(hotels)
+    for hotel_id, paths in removed.items():
+        print(f"🏨 {hotel_id}: {len(paths)} imágenes repetidas")
+        for path in paths:
+            print(f"   ✗ {path}")
+    updated = save_hotels(hotels)
+    print(f"✅ Imágenes repetidas quitadas: {sum(map(len, removed.values()))} "
+          f"(hoteles actualizados en {store_dir_for()}: {updated})")
+    print("ℹ️ Para regenerar data/hotels.json: python scripts/store.py export")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
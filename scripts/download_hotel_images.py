@@ -12,6 +12,9 @@ from urllib.parse import urlparse
 from PIL import Image
 import io
 
+from lqip import update_placeholders
+from store import StoreError, load_hotels, save_hotel, store_dir_for
+
 # Configuración de optimización de imágenes
 MAX_WIDTH_LARGE = 1200  # Para imágenes principales
 MAX_WIDTH_MEDIUM = 800  # Para galería
@@ -19,21 +22,23 @@ MAX_WIDTH_SMALL = 400   # Para miniaturas
 WEBP_QUALITY = 85       # Calidad WebP (0-100)
 
 def load_hotel_data():
-    """Carga los datos de hoteles desde el archivo JSON."""
+    """Carga los datos de hoteles desde el almacén particionado (data/hotels/)."""
     json_path = Path('data/hotels.json')
-    print(f"📖 Buscando archivo en: {json_path.absolute()}")
+    print(f"📖 Buscando catálogo en: {store_dir_for(json_path).absolute()}")
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            print(f"✅ Datos cargados: {len(data)} hoteles")
-            # Mostrar estructura de imágenes del primer hotel para depuración
-            if data and len(data) > 0:
-                first_hotel = data[0]
-                if 'imagenes' in first_hotel:
-                    print("🔍 Estructura de imágenes del primer hotel:")
-                    for key, value in first_hotel['imagenes'].items():
-                        print(f"  {key}: {type(value).__name__} = {value}")
-            return data
+        data = load_hotels(json_path)
+        print(f"✅ Datos cargados: {len(data)} hoteles")
+        # Mostrar estructura de imágenes del primer hotel para depuración
+        if data and len(data) > 0:
+            first_hotel = data[0]
+            if 'imagenes' in first_hotel:
+                print("🔍 Estructura de imágenes del primer hotel:")
+                for key, value in first_hotel['imagenes'].items():
+                    print(f"  {key}: {type(value).__name__} = {value}")
+        return data
+    except StoreError as e:
+        print(f"❌ {e}")
+        return []
     except FileNotFoundError:
         print(f"❌ Error: No se encontró el archivo {json_path}")
         # Mostrar el directorio actual para depuración
@@ -218,6 +223,10 @@ def process_hotel_images(hotel):
     hotel['imagenes']['galeria'] = galeria_paths
     print(f"📊 Total de imágenes en galería: {len(galeria_paths)}")
     
+    # Marcadores difuminados (LQIP) de las imágenes recién descargadas
+    generated = update_placeholders(hotel, force=True)
+    print(f"🌫️ LQIP generados: {generated}")
+    
     return hotel
 
 def download_hotel_images():
@@ -230,23 +239,25 @@ def download_hotel_images():
         print("❌ No se pudieron cargar los datos de hoteles.")
         return
     
+    # Cada hotel se guarda en su propio archivo en cuanto se procesa: solo se
+    # reescriben los hoteles cuyas rutas cambian y un fallo no pierde el resto
     processed_hotels = []
+    updated = 0
     for hotel in hotels:
         processed_hotel = process_hotel_images(hotel)
         processed_hotels.append(processed_hotel)
-    
-    # Guardar el JSON actualizado
-    try:
-        json_path = Path('data/hotels.json')
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(processed_hotels, f, indent=2, ensure_ascii=False)
-        print(f"\n✅ JSON actualizado y guardado en: {json_path}")
-        
-        # Mostrar resumen final
-        total_galeria_images = sum(len(hotel.get('imagenes', {}).get('galeria', [])) for hotel in processed_hotels)
-        print(f"📊 Total de imágenes de galería creadas: {total_galeria_images}")
-    except Exception as e:
-        print(f"❌ Error al guardar el JSON: {e}")
+        try:
+            if save_hotel(processed_hotel):
+                updated += 1
+        except Exception as e:
+            print(f"❌ Error al guardar {processed_hotel.get('id')}: {e}")
+
+    print(f"\n✅ Hoteles actualizados en {store_dir_for()}: {updated}")
+    print("ℹ️ Para regenerar data/hotels.json: python scripts/store.py export")
+
+    # Mostrar resumen final
+    total_galeria_images = sum(len(hotel.get('imagenes', {}).get('galeria', [])) for hotel in processed_hotels)
+    print(f"📊 Total de imágenes de galería creadas: {total_galeria_images}")
 
 if __name__ == "__main__":
-    download_hotel_images()
\ No newline at end of file
+    download_hotel_images()
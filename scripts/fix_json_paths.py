@@ -8,13 +8,17 @@ import os
 import re
 from pathlib import Path
 
+from store import StoreError, load_hotels, save_hotels
+
 def load_hotel_data():
-    """Carga los datos de hoteles desde el archivo JSON."""
+    """Carga los datos de hoteles desde el almacén particionado (data/hotels/)."""
     try:
-        with open('src/data/hotels.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_hotels()
     except FileNotFoundError:
-        print("Error: No se encontró el archivo src/data/hotels.json")
+        print("Error: No se encontró el archivo data/hotels.json")
+        return []
+    except StoreError as e:
+        print(f"Error: {e}")
         return []
     except json.JSONDecodeError as e:
         print(f"Error al decodificar el archivo JSON: {e}")
@@ -113,9 +117,9 @@ def verify_image_existence(hotels):
 def save_hotel_data(hotels):
     """Guarda los datos de hoteles corregidos."""
     try:
-        with open('src/data/hotels.json', 'w', encoding='utf-8') as f:
-            json.dump(hotels, f, indent=2, ensure_ascii=False)
-        print("Datos de hoteles guardados exitosamente.")
+        # Solo se reescriben (de forma atómica) los hoteles que cambiaron
+        updated = save_hotels(hotels)
+        print(f"Datos de hoteles guardados exitosamente ({updated} modificados).")
         return True
     except Exception as e:
         print(f"Error al guardar los datos: {e}")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Caché de fragmentos HTML: la tarjeta de hotel de los listados.
+
+La tarjeta (imagen principal, estrellas, características, precio) vive en
+templates/_hotel_card.html y las plantillas la piden con
+`{{ hotel_card(hotel, valoracion) }}`. Cada tarjeta se renderiza una sola vez
+por combinación de datos del hotel + versión de la plantilla (hash de su
+código) + base_url, y se reutiliza en todas las páginas que la muestran.
+
+generate.py guarda las tarjetas en .cache/fragments/ al terminar, de modo que
+la siguiente build solo renderiza los hoteles que han cambiado; watch.py
+mantiene la caché en memoria entre regeneraciones, y app.py y asgi.py entre
+peticiones.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+from jinja2 import pass_context
+from markupsafe import Markup
+
+from store import atomic_write_json
+
+CARD_TEMPLATE = '_hotel_card.html'
+CACHE_PATH = Path('.cache/fragments/hotel-card.json')
+
+# Funciones de plantilla que insertan un fragmento -> plantilla del fragmento
+# (Jinja no las ve como referencias; watch.py las usa para sus dependencias)
+FRAGMENT_TEMPLATES = {'hotel_card': CARD_TEMPLATE}
+
+
+def card_record(hotel, valoracion=None):
+    """Datos de un hotel que usa la tarjeta (Hotel o HotelSummary)."""
+    imagen = hotel.imagen_principal
+    return [
+        hotel.id, hotel.clean_id, hotel.nombre, hotel.ubicacion, hotel.descripcion,
+        hotel.pelicula, hotel.anio, list(hotel.caracteristicas), hotel.rating,
+        hotel.precio, imagen, hotel.imagenes.placeholder(imagen),
+        list(valoracion) if valoracion else None,
+    ]
+
+
+class FragmentCache:
+    """Tarjetas renderizadas indexadas por hash de datos + plantilla + contexto."""
+
+    def __init__(self, env, path=None, template_name=CARD_TEMPLATE):
+        self.env = env
+        self.path = Path(path) if path else None
+        self.template_name = template_name
+        self.fragments = {}
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+        self._template = None
+        self._template_hash = ''
+        if self.path:
+            self.load()
+
+    def load(self):
+        """Lee las tarjetas guardadas por la build anterior (si las hay)."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.fragments = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.fragments = {}
+
+    def save(self):
+        """Guarda solo las tarjetas usadas en esta build (descarta las obsoletas)."""
+        if not self.path:
+            return
+        atomic_write_json(self.path, {key: self.fragments[key] for key in sorted(self.used)})
+
+    def _current_template(self):
+        # Jinja devuelve el mismo objeto mientras la plantilla no cambie en disco
+        template = self.env.get_template(self.template_name)
+        if template is not self._template:
+            source, _, _ = self.env.loader.get_source(self.env, self.template_name)
+            autoescape = template.environment.autoescape
+            if callable(autoescape):
+                autoescape = autoescape(self.template_name)
+            self._template = template
+            self._template_hash = hashlib.sha256(
+                f"{autoescape}\0{source}".encode('utf-8')).hexdigest()
+        return template
+
+    def render(self, hotel, valoracion=None, base_url=''):
+        """HTML de la tarjeta de un hotel, desde la caché si ya existe."""
+        template = self._current_template()
+        record = json.dumps([self._template_hash, base_url, card_record(hotel, valoracion)],
+                            ensure_ascii=False, default=str)
+        key = hashlib.sha256(record.encode('utf-8')).hexdigest()
+        html = self.fragments.get(key)
+        if html is None:
+            html = template.render(hotel=hotel, valoracion=valoracion, base_url=base_url)
+            self.fragments[key] = html
+            self.misses += 1
+        else:
+            self.hits += 1
+        self.used.add(key)
+        return html
+
+    def reset_stats(self):
+        """Empieza una build nueva: contadores y tarjetas usadas a cero."""
+        self.used = set()
+        self.hits = self.misses = 0
+
+    def clear(self):
+        self.fragments = {}
+        self.reset_stats()
+
+    def prune(self):
+        """Descarta de memoria las tarjetas que la última build no usó."""
+        self.fragments = {key: self.fragments[key] for key in self.used}
+
+
+def install_fragment_cache(env, path=None):
+    """Registra `hotel_card()` en el entorno Jinja y devuelve la caché."""
+    cache = FragmentCache(env, path)
+
+    @pass_context
+    def hotel_card(context, hotel, valoracion=None):
+        return Markup(cache.render(hotel, valoracion, context.get('base_url') or ''))
+
+    env.globals['hotel_card'] = hotel_card
+    return cache
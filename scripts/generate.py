@@ -8,41 +8,37 @@ import json
 import os
 import sys
 import shutil
-import re
 from pathlib import Path
 from jinja2 import Environment, FileSystemLoader
 from datetime import datetime
 
-def clean_hotel_id(hotel_id):
-    """Limpia el ID del hotel removiendo prefijos redundantes y caracteres inválidos para URLs SEO-friendly."""
-    if not hotel_id:
-        return ""
-    
-    # Remover prefijos como 'hotel-', 'hotel_', etc.
-    cleaned_id = re.sub(r'^hotel[-_]', '', str(hotel_id).lower())
-    # Mantener solo caracteres alfanuméricos y guiones
-    cleaned_id = re.sub(r'[^a-z0-9-]', '-', cleaned_id)
-    # Remover guiones múltiples
-    cleaned_id = re.sub(r'-+', '-', cleaned_id)
-    # Remover guiones al inicio y final
-    cleaned_id = cleaned_id.strip('-')
-    return cleaned_id
+from assets import (collect_reachable_assets, find_orphans, hotel_asset_paths,
+                    iter_static_files, print_orphans)
+from catalog import iter_source_records, load_catalog
+from aggregates import AggregateBuilder, aggregate_catalog
+from fragments import CACHE_PATH as FRAGMENTS_PATH, install_fragment_cache
+from geo import GeoIndex
+from model import Hotel, HotelSummary
+from store import atomic_write_template, atomic_write_text
+from service_worker import remove_service_worker, write_service_worker
 
 def load_hotel_data():
-    """Carga los datos de hoteles desde el archivo JSON."""
+    """Carga los datos de hoteles desde el snapshot binario del catálogo."""
     data_path = Path('data/hotels.json')
     try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # El snapshot se recompila solo si hotels.json ha cambiado
+        data = load_catalog(data_path)
         print(f"📊 Datos cargados: {len(data)} hoteles")
         # Mostrar estructura del primer hotel para depuración
         if data and len(data) > 0:
             print("🔍 Estructura del primer hotel:")
-            for key, value in data[0].items():
+            first_hotel = data[0]
+            for key in Hotel.__slots__:
+                value = getattr(first_hotel, key)
                 print(f"  {key}: {type(value).__name__}")
-                if key == 'imagenes' and isinstance(value, dict):
-                    for img_key, img_value in value.items():
-                        print(f"    imagenes.{img_key}: {type(img_value).__name__}")
+                if key == 'imagenes':
+                    for img_key in value.__slots__:
+                        print(f"    imagenes.{img_key}: {type(getattr(value, img_key)).__name__}")
         return data
     except FileNotFoundError:
         print(f"❌ Error: No se encontró el archivo {data_path}")
@@ -50,9 +46,17 @@ def load_hotel_data():
     except json.JSONDecodeError as e:
         print(f"❌ Error al decodificar el archivo JSON: {e}")
         return []
+    except ValueError as e:
+        print(f"❌ Datos de hotel inválidos: {e}")
+        return []
 
-def copy_static_files():
-    """Copia los archivos estáticos al directorio de salida."""
+def copy_static_files(reachable=None):
+    """Copia los archivos estáticos al directorio de salida.
+
+    Si se indica `reachable` (rutas relativas a static/), solo se publican esos
+    archivos; el resto se listan como huérfanos y se eliminan de dist/static si
+    venían de una generación anterior.
+    """
     print("📁 Copiando archivos estáticos...")
     # Directorios origen y destino
     static_src = Path('static')
@@ -66,22 +70,28 @@ def copy_static_files():
         # Crear directorio destino si no existe
         static_dest.mkdir(parents=True, exist_ok=True)
 
-        # Copiar todo el contenido recursivamente
+        # Copiar todo el contenido (o solo lo alcanzable) recursivamente
         files_copied = 0
-        for item in static_src.rglob('*'):
-            if item.is_file():
-                # Calcular ruta relativa
-                relative_path = item.relative_to(static_src)
-                dest_path = static_dest / relative_path
-
-                # Crear directorios padre si no existen
-                dest_path.parent.mkdir(parents=True, exist_ok=True)
-
-                # Copiar archivo
-                shutil.copy2(item, dest_path)
-                files_copied += 1
-                print(f"✅ Copiado: {relative_path}")
+        for relative_path, _ in iter_static_files(static_src):
+            if reachable is not None and relative_path not in reachable:
+                continue
+            dest_path = static_dest / relative_path
+
+            # Crear directorios padre si no existen
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+
+            # Copiar archivo
+            shutil.copy2(static_src / relative_path, dest_path)
+            files_copied += 1
+            print(f"✅ Copiado: {relative_path}")
         print(f"✅ Archivos estáticos copiados a {static_dest} ({files_copied} archivos)")
+
+        if reachable is not None:
+            print_orphans(find_orphans(reachable, static_src))
+            # Quitar de dist/ lo que ya no se publica
+            for relative_path, _ in list(iter_static_files(static_dest)):
+                if relative_path not in reachable:
+                    (static_dest / relative_path).unlink()
         return True
     except Exception as e:
         print(f"❌ Error al copiar archivos estáticos: {e}")
@@ -101,44 +111,31 @@ def generate_seo_files(hotels, base_url):
         current_time = datetime.now().strftime('%H:%M:%S')
         site_base_url = base_url or 'https://p4blo4p.github.io/hoteles-booking-web-pages'
         
-        # Preparar hoteles con IDs limpios
-        hotels_with_clean_ids = []
-        for hotel in hotels:
-            hotel_copy = hotel.copy()
-            hotel_copy['clean_id'] = clean_hotel_id(hotel.get('id', ''))
-            hotels_with_clean_ids.append(hotel_copy)
-        
         # Generar sitemap.xml
         try:
             sitemap_template = env.get_template('sitemap.xml')
-            sitemap_content = sitemap_template.render(
+            sitemap_path = atomic_write_template(
+                'dist/sitemap.xml', sitemap_template,
                 base_url=site_base_url,
-                hotels=hotels_with_clean_ids,
+                hotels=hotels,
                 current_date=current_date
             )
-            
-            sitemap_path = Path('dist/sitemap.xml')
-            with open(sitemap_path, 'w', encoding='utf-8') as f:
-                f.write(sitemap_content)
             print(f"✅ Sitemap generado: {sitemap_path}")
         except Exception as e:
             print(f"⚠️ Error generando sitemap (usando fallback): {e}")
             # Fallback simple si no existe template
-            generate_simple_sitemap(hotels_with_clean_ids, site_base_url, current_date)
+            generate_simple_sitemap(hotels, site_base_url, current_date)
         
         # Generar robots.txt
         try:
             robots_template = env.get_template('robots.txt')
-            robots_content = robots_template.render(
+            robots_path = atomic_write_template(
+                'dist/robots.txt', robots_template,
                 base_url=site_base_url,
                 current_date=current_date,
                 current_time=current_time,
                 site_name='Hoteles de Cine'
             )
-            
-            robots_path = Path('dist/robots.txt')
-            with open(robots_path, 'w', encoding='utf-8') as f:
-                f.write(robots_content)
             print(f"✅ Robots.txt generado: {robots_path}")
         except Exception as e:
             print(f"⚠️ Error generando robots.txt (usando fallback): {e}")
@@ -165,7 +162,7 @@ def generate_simple_sitemap(hotels, base_url, current_date):
     
     for hotel in hotels:
         sitemap_content += f'''    <url>
-        <loc>{base_url}/hotel/{hotel['clean_id']}/</loc>
+        <loc>{base_url}/hotel/{hotel.clean_id}/</loc>
         <lastmod>{current_date}</lastmod>
         <changefreq>monthly</changefreq>
         <priority>0.8</priority>
@@ -175,8 +172,7 @@ def generate_simple_sitemap(hotels, base_url, current_date):
     sitemap_content += '</urlset>'
     
     sitemap_path = Path('dist/sitemap.xml')
-    with open(sitemap_path, 'w', encoding='utf-8') as f:
-        f.write(sitemap_content)
+    atomic_write_text(sitemap_path, lambda f: f.write(sitemap_content), durable=False)
     print(f"✅ Sitemap básico generado: {sitemap_path}")
 
 def generate_simple_robots(base_url):
@@ -190,17 +186,22 @@ Crawl-delay: 1
 '''
     
     robots_path = Path('dist/robots.txt')
-    with open(robots_path, 'w', encoding='utf-8') as f:
-        f.write(robots_content)
+    atomic_write_text(robots_path, lambda f: f.write(robots_content), durable=False)
     print(f"✅ Robots.txt básico generado: {robots_path}")
 
-def generate_site():
-    """Genera el sitio web estático con URLs SEO-friendly."""
+def generate_site(hotels=None, service_worker=True):
+    """Genera el sitio web estático con URLs SEO-friendly.
+
+    `hotels` permite pasar el catálogo ya cargado (pipeline.py); si no, se lee
+    del snapshot. Con service_worker=False (modo --watch) las páginas no lo
+    registran y no se escribe dist/sw.js (se borra si quedaba de otra build).
+    """
     print("🚀 Iniciando generación del sitio...")
     print("📝 Mejoras SEO: URLs /hotel/beverly-hills/ en lugar de /hotel/hotel_beverly-hills.html")
 
     # Cargar datos de hoteles
-    hotels = load_hotel_data()
+    if hotels is None:
+        hotels = load_hotel_data()
     if not hotels:
         print("❌ No se pudieron cargar los datos de hoteles.")
         return False
@@ -214,6 +215,10 @@ def generate_site():
     # Configurar Jinja2
     try:
         env = Environment(loader=FileSystemLoader(str(templates_dir)))
+        # Las páginas del sitio estático registran el service worker
+        env.globals['service_worker'] = service_worker
+        # Tarjetas de hotel reutilizadas entre páginas y entre builds
+        fragments = install_fragment_cache(env, FRAGMENTS_PATH)
 
         # Verificar que las plantillas existan
         try:
@@ -236,72 +241,49 @@ def generate_site():
         # Generar página principal
         try:
             print("📝 Generando página principal...")
-            # Preparar hoteles con IDs limpios para el template principal
-            hoteles_con_clean_id = []
-            for hotel in hotels:
-                hotel_copy = hotel.copy()
-                hotel_copy['clean_id'] = clean_hotel_id(hotel.get('id', ''))
-                hoteles_con_clean_id.append(hotel_copy)
-            
-            # Preparar contexto para la plantilla
-            context = {
-                'hoteles': hoteles_con_clean_id,
-                'base_url': base_url
-            }
-            index_content = template.render(**context)
-
-            # Guardar página principal
-            index_path = dist_dir / 'index.html'
-            with open(index_path, 'w', encoding='utf-8') as f:
-                f.write(index_content)
-            print(f"✅ Página principal generada: {index_path}")
+            write_index_page(template, hotels, base_url, dist_dir)
+            save_fragments(fragments)
 
             # Crear directorio base para páginas de hotel si no existe
             hotel_base_dir = dist_dir / 'hotel'
             hotel_base_dir.mkdir(exist_ok=True)
             print(f"📁 Directorio base de hoteles: {hotel_base_dir}")
 
+            # Índice espacial para las listas de hoteles cercanos
+            geo_index = GeoIndex(hotels)
+            print(f"📍 Hoteles con coordenadas: {len(geo_index)}")
+
+            # Hoteles similares (TF-IDF y precio, valoración y año con NumPy)
+            similares = None
+            builder = similarity_builder()
+            if builder is not None:
+                for hotel in hotels:
+                    builder.add(hotel)
+                similares = builder.result()
+                print(f"🔗 Hoteles similares calculados: {len(similares)}")
+
             # Generar páginas individuales para cada hotel con estructura SEO-friendly
             print("\n🏨 Generando páginas de hoteles con URLs SEO-friendly...")
             for i, hotel in enumerate(hotels):
-                try:
-                    hotel_name = hotel.get('nombre', 'Sin nombre')
-                    print(f"🏨 Generando página para hotel {i+1}: {hotel_name}")
-                    
-                    # Limpiar ID del hotel para URL SEO-friendly
-                    original_id = hotel.get('id', f'hotel_{i}')
-                    clean_id = clean_hotel_id(original_id)
-                    
-                    print(f"  🔄 ID: '{original_id}' -> '{clean_id}'")
-                    
-                    # Crear directorio específico para el hotel
-                    hotel_dir = hotel_base_dir / clean_id
-                    hotel_dir.mkdir(exist_ok=True)
-                    
-                    # Preparar contexto para la plantilla de hotel
-                    hotel_context = {
-                        'hotel': hotel,
-                        'base_url': base_url,
-                        'clean_id': clean_id
-                    }
-                    hotel_content = hotel_template.render(**hotel_context)
-
-                    # Guardar como index.html en el directorio del hotel
-                    hotel_path = hotel_dir / 'index.html'
-                    with open(hotel_path, 'w', encoding='utf-8') as f:
-                        f.write(hotel_content)
-                    print(f"  ✅ Generado: {hotel_path}")
-                    print(f"  🌐 URL SEO: /hotel/{clean_id}/")
-                    
-                except Exception as e:
-                    print(f"❌ Error al generar página para hotel {i+1}: {e}")
-                    continue
-
-            # Copiar archivos estáticos
+                write_hotel_page(hotel_template, hotel, base_url, hotel_base_dir, i,
+                                 geo_index.nearby(hotel),
+                                 similares.get(hotel.id) if similares else ())
+
+            # Copiar archivos estáticos (solo los alcanzables, salvo --all-static)
             print("\n📁 Copiando archivos estáticos...")
-            if not copy_static_files():
+            reachable = None
+            if '--all-static' not in sys.argv:
+                image_paths = [path for hotel in hotels for path in hotel_asset_paths(hotel)]
+                reachable = collect_reachable_assets(image_paths)
+            if not copy_static_files(reachable):
                 print("⚠️ Advertencia: No se pudieron copiar todos los archivos estáticos")
 
+            # Service worker con el manifiesto de precache del shell
+            if service_worker:
+                write_service_worker(env, dist_dir, base_url)
+            else:
+                remove_service_worker(dist_dir)
+
             # Generar archivos SEO (sitemap.xml y robots.txt)
             print("\n🗺️ Generando archivos SEO...")
             generate_seo_files(hotels, base_url)
@@ -312,8 +294,7 @@ def generate_site():
             print("\n✅ ¡Sitio web generado exitosamente con URLs SEO-friendly!")
             print("\n📋 URLs generadas:")
             for hotel in hotels[:5]:  # Mostrar primeras 5
-                clean_id = clean_hotel_id(hotel.get('id', ''))
-                print(f"  🏨 {hotel.get('nombre', 'Sin nombre')}: /hotel/{clean_id}/")
+                print(f"  🏨 {hotel.nombre}: /hotel/{hotel.clean_id}/")
             if len(hotels) > 5:
                 print(f"  ... y {len(hotels) - 5} hoteles más")
             
@@ -327,6 +308,178 @@ def generate_site():
         print(f"❌ Error al configurar Jinja2: {e}")
         return False
 
+def write_index_page(template, hotels, base_url, dist_dir, resumen=None):
+    """Renderiza y guarda la página principal en dist/index.html.
+
+    `resumen` son los agregados del catálogo; si no se pasan se calculan a
+    partir de `hotels`.
+    """
+    if resumen is None:
+        resumen = aggregate_catalog(hotels)
+    # Preparar contexto para la plantilla (los hoteles ya traen clean_id)
+    context = {
+        'hoteles': hotels,
+        'resumen': resumen,
+        'base_url': base_url
+    }
+    # Renderizar directamente a disco (temporal + rename)
+    index_path = atomic_write_template(dist_dir / 'index.html', template, **context)
+    print(f"✅ Página principal generada: {index_path}")
+    return index_path
+
+def save_fragments(fragments):
+    """Guarda la caché de tarjetas para la próxima build e informa del uso."""
+    fragments.save()
+    print(f"🧩 Tarjetas de hotel: {fragments.misses} renderizadas, "
+          f"{fragments.hits} reutilizadas de la caché")
+
+def similarity_builder():
+    """SimilarityBuilder de similar.py, o None si NumPy no está instalado."""
+    try:
+        from similar import SimilarityBuilder
+    except ImportError:
+        print("⚠️ NumPy no está instalado: las páginas se generan sin hoteles similares")
+        return None
+    return SimilarityBuilder()
+
+def write_hotel_page(hotel_template, hotel, base_url, hotel_base_dir, i, cercanos=(), similares=()):
+    """Renderiza y guarda la página de un hotel en /hotel/<clean_id>/index.html.
+
+    `cercanos` es la lista de hoteles cercanos (GeoIndex.nearby()) y
+    `similares` la de hoteles similares (SimilarHotels.get()).
+    """
+    try:
+        print(f"🏨 Generando página para hotel {i+1}: {hotel.nombre}")
+
+        # ID limpio para URL SEO-friendly (precalculado en el modelo)
+        clean_id = hotel.clean_id
+
+        print(f"  🔄 ID: '{hotel.id}' -> '{clean_id}'")
+
+        # Crear directorio específico para el hotel
+        hotel_dir = hotel_base_dir / clean_id
+        hotel_dir.mkdir(exist_ok=True)
+
+        # Preparar contexto para la plantilla de hotel
+        hotel_context = {
+            'hotel': hotel,
+            'base_url': base_url,
+            'clean_id': clean_id,
+            'cercanos': cercanos,
+            'similares': similares
+        }
+        # Guardar como index.html en el directorio del hotel
+        hotel_path = atomic_write_template(hotel_dir / 'index.html', hotel_template, **hotel_context)
+        print(f"  ✅ Generado: {hotel_path}")
+        print(f"  🌐 URL SEO: /hotel/{clean_id}/")
+        return True
+    except Exception as e:
+        print(f"❌ Error al generar página para hotel {i+1}: {e}")
+        return False
+
+def generate_site_streaming():
+    """Genera el sitio en modo streaming para catálogos más grandes que la memoria.
+
+    Cada hotel se parsea, se renderiza y se escribe en cuanto se lee de la
+    fuente (hotels.json o el almacén data/hotels/); el índice y el sitemap se
+    generan al final a partir de resúmenes compactos.
+    """
+    print("🚀 Iniciando generación del sitio (modo streaming)...")
+
+    data_path = Path('data/hotels.json')
+    templates_dir = Path('templates')
+    if not templates_dir.exists():
+        print(f"❌ El directorio {templates_dir} no existe")
+        return False
+
+    try:
+        env = Environment(loader=FileSystemLoader(str(templates_dir)))
+        env.globals['service_worker'] = True
+        fragments = install_fragment_cache(env, FRAGMENTS_PATH)
+        template = env.get_template('index.html')
+        hotel_template = env.get_template('hotel.html')
+        print("✅ Plantillas cargadas correctamente")
+    except Exception as e:
+        print(f"❌ Error al cargar plantillas: {e}")
+        return False
+
+    dist_dir = Path('dist')
+    hotel_base_dir = dist_dir / 'hotel'
+    hotel_base_dir.mkdir(parents=True, exist_ok=True)
+    base_url = os.environ.get('BASE_URL', '')
+    print(f"🌐 BASE_URL: {base_url}")
+
+    # Primera pasada ligera: el índice espacial y los términos y valores
+    # numéricos de cada hotel, para conocer los cercanos y los similares antes
+    # de escribir las páginas
+    builder = similarity_builder()
+
+    def first_pass():
+        for raw in iter_source_records(data_path):
+            hotel = Hotel.from_dict(raw)
+            if builder is not None:
+                builder.add(hotel)
+            yield hotel
+
+    try:
+        geo_index = GeoIndex(first_pass())
+    except FileNotFoundError:
+        print(f"❌ Error: No se encontró el archivo {data_path}")
+        return False
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"❌ Error al leer el catálogo en streaming: {e}")
+        return False
+    print(f"📍 Hoteles con coordenadas: {len(geo_index)}")
+    similares = builder.result() if builder is not None else None
+    if similares is not None:
+        print(f"🔗 Hoteles similares calculados: {len(similares)}")
+
+    summaries = []
+    image_paths = set()
+    # Los agregados se acumulan con los hoteles completos (los resúmenes
+    # solo conservan parte de los testimonios)
+    aggregates = AggregateBuilder()
+    try:
+        for i, raw in enumerate(iter_source_records(data_path)):
+            hotel = Hotel.from_dict(raw)
+            write_hotel_page(hotel_template, hotel, base_url, hotel_base_dir, i,
+                             geo_index.nearby(hotel),
+                             similares.get(hotel.id) if similares else ())
+            summaries.append(HotelSummary.from_hotel(hotel))
+            aggregates.add(hotel)
+            image_paths.update(hotel_asset_paths(hotel))
+    except FileNotFoundError:
+        print(f"❌ Error: No se encontró el archivo {data_path}")
+        return False
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"❌ Error al leer el catálogo en streaming: {e}")
+        return False
+
+    if not summaries:
+        print("❌ No se pudieron cargar los datos de hoteles.")
+        return False
+    print(f"📊 Hoteles procesados en streaming: {len(summaries)}")
+
+    try:
+        write_index_page(template, summaries, base_url, dist_dir, aggregates.result())
+        save_fragments(fragments)
+    except Exception as e:
+        print(f"❌ Error al generar la página principal: {e}")
+        return False
+
+    print("\n📁 Copiando archivos estáticos...")
+    reachable = None if '--all-static' in sys.argv else collect_reachable_assets(image_paths)
+    if not copy_static_files(reachable):
+        print("⚠️ Advertencia: No se pudieron copiar todos los archivos estáticos")
+    write_service_worker(env, dist_dir, base_url)
+
+    print("\n🗺️ Generando archivos SEO...")
+    generate_seo_files(summaries, base_url)
+
+    verify_generated_structure()
+    print("\n✅ ¡Sitio web generado en modo streaming!")
+    return True
+
 def verify_generated_structure():
     """Verifica la estructura generada y muestra información detallada."""
     dist_dir = Path('dist')
@@ -396,8 +549,25 @@ def main():
     print("   ✅ Sitemap.xml automático")
     print("   ✅ Robots.txt optimizado")
 
-    # Generar el sitio
-    success = generate_site()
+    # Modo desarrollo: regeneración incremental + servidor con recarga
+    if '--watch' in sys.argv:
+        from watch import watch
+        port = int(sys.argv[sys.argv.index('--port') + 1]) if '--port' in sys.argv else 8000
+        sys.exit(0 if watch(port) else 1)
+
+    # Generar el sitio (--stream: renderizado hotel a hotel desde el JSON)
+    if '--stream' in sys.argv:
+        success = generate_site_streaming()
+    else:
+        success = generate_site()
+
+    # Peso de página: informe en reports/ y fallo si se supera budgets.json
+    if success and '--no-budget' not in sys.argv:
+        from page_weight import check_page_weight
+        print("\n⚖️ Peso de página...")
+        if not check_page_weight():
+            print("\n❌ Hay páginas que superan su presupuesto de peso (budgets.json)")
+            sys.exit(1)
     if success:
         print("\n🎉 Generación completada con éxito!")
         print("\n📝 Próximos pasos:")
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Coordenadas de los hoteles e índice espacial para búsquedas por cercanía.
+
+Geocodificación sin red: cada hotel toma sus coordenadas de la tabla local
+data/geocoding.json, primero por id (coordenadas exactas del edificio) y si no
+por su `ubicacion` ('Ciudad, Región, País', sin tildes ni mayúsculas), y se
+guardan en el campo `coordenadas` del propio hotel.
+
+GeoIndex es un árbol k-d sobre el vector unitario (x, y, z) de cada punto, de
+modo que la distancia en línea recta es monótona con la distancia sobre la
+esfera y no hay casos especiales en el antimeridiano ni en los polos. Está
+guardado en arrays (el nodo de cada subrango es su mediana), responde a los
+N más cercanos y a los que están dentro de un radio visitando solo las ramas
+que pueden mejorar el resultado, y lo usan /api/hoteles/near (app.py y
+asgi.py) y las listas de "Hoteles Cercanos" que generate.py calcula al
+generar el sitio.
+
+Uso: python scripts/geo.py [--force]            (geocodifica el catálogo)
+     python scripts/geo.py --near <lat> <lon> [--k 10] [--radio km]
+"""
+import heapq
+import json
+import math
+import sys
+import unicodedata
+from array import array
+from pathlib import Path
+
+GEOCODING_PATH = Path('data/geocoding.json')
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Consultas de la API: resultados por defecto y máximos
+NEAR_DEFAULT = 10
+NEAR_MAX = 50
+MAX_RADIO_KM = math.pi * EARTH_RADIUS_KM
+
+# Campos de cada hotel que guarda el índice (y de los que dependen las listas)
+POINT_FIELDS = ('id', 'clean_id', 'nombre', 'ubicacion', 'coordenadas')
+
+# Listas de "Hoteles Cercanos" de cada página de hotel
+NEARBY_COUNT = 4
+NEARBY_MAX_KM = 1500
+
+
+class GeoRequestError(ValueError):
+    """Parámetros de una búsqueda por cercanía no válidos (respuesta 400)."""
+
+
+def normalize_place(text):
+    """'París,  Francia' -> 'paris, francia' (sin tildes, espacios ni mayúsculas)."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ', '.join(' '.join(part.split()) for part in text.casefold().split(',') if part.strip())
+
+
+class GeocodingTable:
+    """Tabla local de coordenadas por id de hotel y por lugar."""
+
+    def __init__(self, path=GEOCODING_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.hoteles = {key: tuple(value) for key, value in data.get('hoteles', {}).items()}
+        self.lugares = {normalize_place(key): tuple(value)
+                        for key, value in data.get('lugares', {}).items()}
+
+    def lookup(self, hotel):
+        """(lat, lon) de un hotel (dict crudo), o None si no está en la tabla.
+
+        Prueba el id, la ubicación completa, 'ciudad, país' y la ciudad sola
+        (solo si el nombre no es ambiguo en la tabla).
+        """
+        if hotel.get('id') in self.hoteles:
+            return self.hoteles[hotel['id']]
+        place = normalize_place(hotel.get('ubicacion'))
+        if not place:
+            return None
+        if place in self.lugares:
+            return self.lugares[place]
+        parts = place.split(', ')
+        if len(parts) > 2 and f"{parts[0]}, {parts[-1]}" in self.lugares:
+            return self.lugares[f"{parts[0]}, {parts[-1]}"]
+        matches = [coords for key, coords in self.lugares.items() if key.split(', ')[0] == parts[0]]
+        return matches[0] if len(matches) == 1 else None
+
+
+def geocode_hotels(hotels, table=None, force=False):
+    """Rellena `coordenadas` en los hoteles (dicts crudos) que no las tienen.
+
+    Devuelve (geocodificados, ids sin coordenadas).
+    """
+    table = table or GeocodingTable()
+    geocoded = 0
+    missing = []
+    for hotel in hotels:
+        if hotel.get('coordenadas') and not force:
+            continue
+        coords = table.lookup(hotel)
+        if coords is None:
+            missing.append(hotel.get('id'))
+            continue
+        value = {'lat': coords[0], 'lon': coords[1]}
+        if hotel.get('coordenadas') != value:
+            hotel['coordenadas'] = value
+            geocoded += 1
+    return geocoded, missing
+
+
+def _unit_vector(lat, lon):
+    lat, lon = math.radians(lat), math.radians(lon)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def _chord2(km):
+    """Distancia en línea recta al cuadrado (esfera unitaria) para `km` sobre la superficie."""
+    return (2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)) ** 2
+
+
+def _surface_km(chord2):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord2) / 2))
+
+
+def haversine_km(a, b):
+    """Distancia en km sobre la superficie entre dos puntos (lat, lon)."""
+    va, vb = _unit_vector(*a), _unit_vector(*b)
+    return _surface_km(sum((x - y) ** 2 for x, y in zip(va, vb)))
+
+
+class NearbyHotel:
+    """Hotel encontrado por cercanía, con su distancia al origen."""
+
+    __slots__ = ('id', 'clean_id', 'nombre', 'ubicacion', 'coordenadas', 'distancia_km')
+
+    def __init__(self, point, distancia_km):
+        self.id, self.clean_id, self.nombre, self.ubicacion, self.coordenadas = point
+        self.distancia_km = distancia_km
+
+    @property
+    def distancia(self):
+        """Distancia para mostrar: metros por debajo de 1 km."""
+        if self.distancia_km < 1:
+            return f"{round(self.distancia_km * 1000, -1):.0f} m"
+        return f"{self.distancia_km:,.0f} km".replace(',', '.')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'clean_id': self.clean_id,
+            'nombre': self.nombre,
+            'ubicacion': self.ubicacion,
+            'coordenadas': {'lat': self.coordenadas[0], 'lon': self.coordenadas[1]},
+            'distancia_km': round(self.distancia_km, 1),
+        }
+
+
+class GeoIndex:
+    """Árbol k-d de hoteles con coordenadas, guardado en arrays."""
+
+    __slots__ = ('points', '_xyz', '_order', '_axes')
+
+    def __init__(self, hotels):
+        # Solo lo que necesitan las respuestas, nunca los hoteles completos
+        self.points = [tuple(getattr(hotel, field) for field in POINT_FIELDS)
+                       for hotel in hotels if hotel.coordenadas]
+        self._xyz = array('d')
+        for point in self.points:
+            self._xyz.extend(_unit_vector(*point[4]))
+        self._order = array('I', range(len(self.points)))
+        self._axes = array('B', bytes(len(self.points)))
+        self._build()
+
+    def __len__(self):
+        return len(self.points)
+
+    def _build(self):
+        xyz, order = self._xyz, self._order
+        pending = [(0, len(order))]
+        while pending:
+            lo, hi = pending.pop()
+            if hi - lo < 1:
+                continue
+            ids = order[lo:hi]
+            # Eje de mayor dispersión en este subrango
+            axis = max(range(3), key=lambda a: (max(xyz[3 * i + a] for i in ids)
+                                                - min(xyz[3 * i + a] for i in ids)))
+            order[lo:hi] = array('I', sorted(ids, key=lambda i: xyz[3 * i + axis]))
+            mid = (lo + hi) // 2
+            self._axes[mid] = axis
+            pending += [(lo, mid), (mid + 1, hi)]
+
+    def _search(self, lat, lon, k, max_chord2, exclude):
+        target = _unit_vector(lat, lon)
+        xyz, order, axes = self._xyz, self._order, self._axes
+        heap = []  # (-distancia², índice): el peor resultado en la raíz
+
+        def bound():
+            return max_chord2 if len(heap) < k else min(max_chord2, -heap[0][0])
+
+        def visit(lo, hi):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            i = order[mid]
+            base = 3 * i
+            d2 = ((target[0] - xyz[base]) ** 2 + (target[1] - xyz[base + 1]) ** 2
+                  + (target[2] - xyz[base + 2]) ** 2)
+            if d2 <= bound() and self.points[i][0] != exclude:
+                if len(heap) < k:
+                    heapq.heappush(heap, (-d2, i))
+                else:
+                    heapq.heapreplace(heap, (-d2, i))
+            diff = target[axes[mid]] - xyz[base + axes[mid]]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            visit(*near)
+            if diff * diff <= bound():
+                visit(*far)
+
+        visit(0, len(order))
+        return [NearbyHotel(self.points[i], _surface_km(-neg_d2))
+                for neg_d2, i in sorted(heap, key=lambda item: (-item[0], item[1]))]
+
+    def nearest(self, lat, lon, k=NEAR_DEFAULT, radio_km=None, exclude=None):
+        """Los k hoteles más cercanos a (lat, lon), opcionalmente dentro de radio_km."""
+        max_chord2 = _chord2(radio_km) if radio_km is not None else 4.0
+        return self._search(lat, lon, k, max_chord2, exclude) if k > 0 else []
+
+    def within(self, lat, lon, radio_km):
+        """Todos los hoteles a menos de radio_km de (lat, lon), del más cercano al más lejano."""
+        return self._search(lat, lon, len(self.points), _chord2(radio_km), None)
+
+    def nearby(self, hotel, k=NEARBY_COUNT, radio_km=NEARBY_MAX_KM):
+        """Hoteles cercanos a un hotel del catálogo (sin incluirlo)."""
+        if not hotel.coordenadas:
+            return []
+        return self.nearest(*hotel.coordenadas, k=k, radio_km=radio_km, exclude=hotel.id)
+
+
+def parse_near_request(lat, lon, k=None, radio=None):
+    """Valida lat, lon, k y radio (km); devuelve (lat, lon, k, radio o None)."""
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        raise GeoRequestError("Parámetros lat y lon numéricos obligatorios") from None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise GeoRequestError("Coordenadas fuera de rango")
+    try:
+        k = NEAR_DEFAULT if k in (None, '') else int(k)
+        radio = None if radio in (None, '') else float(radio)
+    except ValueError:
+        raise GeoRequestError("Parámetros k o radio no válidos") from None
+    if not 1 <= k <= NEAR_MAX:
+        raise GeoRequestError(f"k debe estar entre 1 y {NEAR_MAX}")
+    if radio is not None and not 0 < radio <= MAX_RADIO_KM:
+        raise GeoRequestError(f"El radio debe estar entre 0 y {MAX_RADIO_KM:.0f} km")
+    return lat, lon, k, radio
+
+
+def _arg(name, default=None):
+    """Valor de una opción --nombre valor."""
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def main():
+    if '--near' in sys.argv:
+        from catalog import load_catalog
+
+        position = sys.argv.index('--near')
+        try:
+            lat, lon, k, radio = parse_near_request(*sys.argv[position + 1:position + 3],
+                                                    _arg('--k'), _arg('--radio'))
+        except (GeoRequestError, TypeError) as e:
+            print(f"❌ {e}")
+            return 2
+        catalogo = load_catalog()
+        for cercano in catalogo.geo_index().nearest(lat, lon, k, radio):
+            print(f"📍 {cercano.distancia:>10}  {cercano.nombre} ({cercano.ubicacion})")
+        catalogo.close()
+        return 0
+
+    from store import StoreError, load_hotels, save_hotels, store_dir_for
+
+    try:
+        hotels = load_hotels()
+    except StoreError as e:
+        print(f"❌ {e}")
+        return 1
+    geocoded, missing = geocode_hotels(hotels, force='--force' in sys.argv)
+    for hotel_id in missing:
+        print(f"⚠️ Sin coordenadas en {GEOCODING_PATH}: {hotel_id}")
+    updated = save_hotels(hotels)
+    print(f"✅ Hoteles geocodificados: {geocoded} (hoteles actualizados en {store_dir_for()}: {updated})")
+    print("ℹ️ Para regenerar data/hotels.json: python scripts/store.py export")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
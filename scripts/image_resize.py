@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Redimensionado de imágenes de hoteles bajo demanda con caché LRU en disco.
+
+La ruta /img/<hotel_id>/<nombre>?w=<ancho>&fmt=<formato> de app.py y asgi.py
+usa ImageResizer: la primera petición de cada variante abre la imagen de
+static/images/hotels/<hotel_id>/, la redimensiona y la codifica con Pillow, y
+guarda el resultado en .cache/img/. Las siguientes se sirven desde disco. La
+caché tiene un tamaño máximo y expulsa las variantes usadas hace más tiempo;
+si llegan a la vez muchas peticiones de la misma variante solo una la codifica
+y las demás esperan su resultado: dentro de un proceso con un Future por
+variante y, entre workers de gunicorn, con un bloqueo de archivo (flock, no
+disponible en Windows) alrededor de la codificación. El límite de tamaño es
+global: al guardar una variante se recorre el directorio con un bloqueo de
+archivo y se expulsan las de fecha de uso más antigua, sean del proceso que
+sean (en Windows, sin flock, el recorrido no se serializa entre procesos).
+
+Un original vacío o corrupto responde 422 en lugar de un error 500, y el fallo
+se recuerda para no volver a abrirlo en cada petición.
+
+La clave de cada variante (y su ETag) incluye el tamaño y la fecha de la
+imagen original, así que si se vuelve a descargar la imagen se genera una
+variante nueva. Las URL no llevan versión, de modo que las respuestas se
+cachean poco tiempo y luego se revalidan con el ETag.
+
+Uso: python scripts/image_resize.py [--clear]   (estado de la caché)
+"""
+import hashlib
+import io
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se agrupan las peticiones de cada proceso
+    fcntl = None
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+IMAGES_DIR = ROOT_DIR / 'static' / 'images' / 'hotels'
+CACHE_DIR = Path(os.environ.get('IMG_CACHE_DIR', ROOT_DIR / '.cache' / 'img'))
+CACHE_MAX_BYTES = int(os.environ.get('IMG_CACHE_MB', 256)) * 1024 * 1024
+
+# Ancho máximo servido: nunca se amplía por encima del original
+MAX_WIDTH = 2400
+
+# Formato pedido -> (formato de Pillow, Content-Type, opciones de guardado)
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'png': ('PNG', 'image/png', {'optimize': True}),
+}
+FORMAT_ALIASES = {'jpg': 'jpeg'}
+
+# La URL no cambia si se vuelve a descargar el original: caché corta y
+# revalidación con el ETag (304 mientras la variante sea la misma)
+CACHE_CONTROL = 'public, max-age=3600'
+
+# Archivos de bloqueo compartidos por los procesos (cada variante usa uno)
+LOCK_STRIPES = 256
+
+# Variantes cuyo original no se pudo leer, recordadas por proceso
+FAILED_MAX = 1024
+
+
+class ImageRequestError(ValueError):
+    """Parámetros de una petición de imagen no válidos (respuesta 400)."""
+
+
+class UnreadableImageError(ValueError):
+    """El original existe pero Pillow no puede leerlo (respuesta 422)."""
+
+
+def parse_request(width, fmt, source):
+    """Valida w y fmt; devuelve (ancho o None, formato)."""
+    if width in (None, ''):
+        width = None
+    else:
+        try:
+            width = int(width)
+        except ValueError:
+            raise ImageRequestError(f"Ancho no válido: {width}") from None
+        if not 1 <= width <= MAX_WIDTH:
+            raise ImageRequestError(f"El ancho debe estar entre 1 y {MAX_WIDTH}")
+    if fmt in (None, ''):
+        fmt = source.suffix.lstrip('.').lower()
+    fmt = FORMAT_ALIASES.get(fmt.lower(), fmt.lower())
+    if fmt not in FORMATS:
+        raise ImageRequestError(f"Formato no soportado: {fmt}")
+    return width, fmt
+
+
+def source_path(hotel_id, name, images_dir=IMAGES_DIR):
+    """Imagen original de un hotel, o None si no existe o sale del directorio."""
+    images_dir = Path(images_dir).resolve()
+    path = (images_dir / hotel_id / name).resolve()
+    if path.parent.parent != images_dir or not path.is_file():
+        return None
+    return path
+
+
+def encode_variant(source, width, fmt):
+    """Redimensiona y codifica una imagen; devuelve los bytes.
+
+    Lanza UnreadableImageError si el original está vacío, corrupto o es
+    demasiado grande para Pillow.
+    """
+    pil_format, _, options = FORMATS[fmt]
+    try:
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img)
+            if width and width < img.width:
+                height = max(1, round(img.height * width / img.width))
+                img = img.resize((width, height), Image.Resampling.LANCZOS)
+            if pil_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            buffer = io.BytesIO()
+            img.save(buffer, pil_format, **options)
+    except (OSError, Image.DecompressionBombError) as e:
+        # UnidentifiedImageError (archivo vacío o corrupto) es un OSError
+        raise UnreadableImageError(f"No se puede leer la imagen {source.name}") from e
+    return buffer.getvalue()
+
+
+class DiskLRUCache:
+    """Archivos en un directorio con tamaño total acotado y expulsión LRU.
+
+    La fecha de modificación de cada archivo, que se actualiza en cada
+    acierto, es su fecha de uso. Varios procesos pueden compartir el
+    directorio: al guardar, la expulsión recorre el directorio entero bajo un
+    bloqueo de archivo, así que el límite vale para todos juntos y no por
+    proceso, y cada uno tolera que otro haya borrado un archivo.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load(self._scan())
+
+    def get(self, key):
+        """Ruta del archivo en caché (y lo marca como usado), o None."""
+        path = self.directory / key
+        try:
+            os.utime(path)
+            size = path.stat().st_size
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(key)
+            return None
+        with self._lock:
+            if key not in self._entries:
+                # Escrito por otro proceso
+                self._entries[key] = size
+                self._total += size
+            self._entries.move_to_end(key)
+        return path
+
+    def put(self, key, data):
+        """Guarda data de forma atómica, expulsa lo necesario y devuelve la ruta."""
+        path = self.directory / key
+        tmp = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = len(data)
+            self._total += len(data)
+            self._evict(key)
+        return path
+
+    def _forget(self, key):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total -= size
+
+    def _scan(self):
+        """[(fecha de uso, clave, bytes)] de los archivos del directorio, del más antiguo."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith('.tmp') or not entry.is_file():
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, entry.name, st.st_size))
+        entries.sort()
+        return entries
+
+    def _load(self, entries):
+        self._entries = OrderedDict((key, size) for _, key, size in entries)
+        self._total = sum(self._entries.values())
+
+    @contextmanager
+    def _evict_lock(self):
+        if fcntl is None:
+            yield
+            return
+        lock_dir = self.directory / 'locks'
+        lock_dir.mkdir(exist_ok=True)
+        with open(lock_dir / 'evict.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _evict(self, keep):
+        # Lo que este proceso conoce puede estar por debajo del límite aunque
+        # entre todos lo superen (o al revés): se recorre siempre el directorio
+        # real, un coste pequeño frente a la codificación que precede a put().
+        # La entrada recién añadida no se expulsa aunque supere el límite sola
+        with self._evict_lock():
+            entries = self._scan()
+            total = sum(size for _, _, size in entries)
+            kept = []
+            for entry in entries:
+                if total > self.max_bytes and entry[1] != keep:
+                    try:
+                        (self.directory / entry[1]).unlink()
+                    except FileNotFoundError:
+                        pass
+                    total -= entry[2]
+                else:
+                    kept.append(entry)
+        self._load(kept)
+
+    def stats(self):
+        with self._lock:
+            return {'entradas': len(self._entries), 'bytes': self._total, 'limite': self.max_bytes}
+
+    def clear(self):
+        with self._lock:
+            for key in self._entries:
+                try:
+                    (self.directory / key).unlink()
+                except FileNotFoundError:
+                    pass
+            self._entries.clear()
+            self._total = 0
+
+
+class ImageResizer:
+    """Variantes de imagen con caché en disco y peticiones en vuelo agrupadas."""
+
+    def __init__(self, cache=None, images_dir=IMAGES_DIR):
+        self._cache = cache
+        self.images_dir = images_dir
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._failed = OrderedDict()
+
+    @property
+    def cache(self):
+        # Se crea al primer uso: importar app.py no toca el disco
+        with self._lock:
+            if self._cache is None:
+                self._cache = DiskLRUCache()
+        return self._cache
+
+    @contextmanager
+    def _process_lock(self, key):
+        """Bloqueo de la variante entre procesos (flock sobre un archivo de la caché)."""
+        if fcntl is None:
+            yield
+            return
+        lock_dir = self.cache.directory / 'locks'
+        lock_dir.mkdir(exist_ok=True)
+        stripe = int(key[:8], 16) % LOCK_STRIPES
+        with open(lock_dir / f"{stripe:03d}.lock", 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def variant_key(source, width, fmt):
+        """Nombre del archivo en caché: depende del original y de la variante."""
+        stat = source.stat()
+        raw = f"{source.parent.name}/{source.name}:{stat.st_size}:{stat.st_mtime_ns}:{width}:{fmt}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32] + '.' + fmt
+
+    def get(self, hotel_id, name, width=None, fmt=None):
+        """Devuelve (ruta en caché, Content-Type, ETag) o None si no hay original.
+
+        Lanza ImageRequestError si w o fmt no son válidos y UnreadableImageError
+        si el original no se puede leer.
+        """
+        source = source_path(hotel_id, name, self.images_dir)
+        if source is None:
+            return None
+        width, fmt = parse_request(width, fmt, source)
+        key = self.variant_key(source, width, fmt)
+        content_type = FORMATS[fmt][1]
+        etag = key.split('.')[0]
+
+        path = self.cache.get(key)
+        if path is not None:
+            return path, content_type, etag
+
+        with self._lock:
+            # La clave incluye tamaño y fecha del original: si se vuelve a
+            # descargar, la variante es otra y se intenta de nuevo
+            failure = self._failed.get(key)
+            if failure is not None:
+                raise UnreadableImageError(failure)
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+        if not owner:
+            return future.result(), content_type, etag
+
+        try:
+            with self._process_lock(key):
+                # Otro proceso puede haberla codificado mientras se esperaba
+                path = self.cache.get(key)
+                if path is None:
+                    path = self.cache.put(key, encode_variant(source, width, fmt))
+            future.set_result(path)
+        except BaseException as e:
+            if isinstance(e, UnreadableImageError):
+                with self._lock:
+                    self._failed[key] = str(e)
+                    if len(self._failed) > FAILED_MAX:
+                        self._failed.popitem(last=False)
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return path, content_type, etag
+
+
+def main():
+    cache = DiskLRUCache()
+    if '--clear' in sys.argv:
+        cache.clear()
+        print(f"🗑️ Caché de imágenes vaciada: {cache.directory}")
+        return
+    stats = cache.stats()
+    print(f"🖼️ Caché de imágenes: {cache.directory}")
+    print(f"   {stats['entradas']} variantes, {stats['bytes'] / 1024 / 1024:.1f} MB "
+          f"de {stats['limite'] / 1024 / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Marcadores de imagen de baja calidad (LQIP) para las imágenes de hoteles.
+
+Para cada imagen local se genera una micro-WebP difuminada de unos pocos
+píxeles y se guarda como data URI en `imagenes.lqip` del propio hotel
+({ruta: data URI}). Las plantillas la usan como fondo del <img>, así que
+mientras llega la imagen real se ve una versión borrosa sin ninguna
+petición adicional.
+
+Uso: python scripts/lqip.py [--force]
+"""
+import base64
+import io
+import sys
+from pathlib import Path
+
+from PIL import Image, ImageFilter
+
+from store import StoreError, load_hotels, save_hotels, store_dir_for
+
+# Ancho de la miniatura: ~200-400 bytes en base64 por imagen
+LQIP_WIDTH = 16
+LQIP_QUALITY = 40
+LQIP_BLUR_RADIUS = 1
+
+
+def make_placeholder(path, width=LQIP_WIDTH):
+    """Genera el data URI WebP difuminado de una imagen."""
+    with Image.open(path) as img:
+        img = img.convert('RGB')
+        height = max(1, round(img.height * width / img.width))
+        small = img.resize((width, height), Image.Resampling.BOX)
+    small = small.filter(ImageFilter.GaussianBlur(LQIP_BLUR_RADIUS))
+    buffer = io.BytesIO()
+    small.save(buffer, 'WEBP', quality=LQIP_QUALITY, method=6)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def update_placeholders(hotel, force=False):
+    """Calcula los LQIP que faltan en un hotel (dict crudo) y quita los obsoletos.
+
+    Devuelve cuántos marcadores se generaron.
+    """
+    imagenes = hotel.get('imagenes') or {}
+    paths = [imagenes.get('hotel')] + list(imagenes.get('pelicula') or []) + list(imagenes.get('galeria') or [])
+    local = [p for p in paths if p and not p.startswith(('http://', 'https://'))]
+    previous = imagenes.get('lqip') or {}
+    lqip = {}
+    generated = 0
+    for path in local:
+        if path in lqip:
+            continue
+        if path in previous and not force:
+            lqip[path] = previous[path]
+            continue
+        file_path = Path(path.lstrip('/'))
+        if not file_path.is_file() or file_path.stat().st_size == 0:
+            continue
+        try:
+            lqip[path] = make_placeholder(file_path)
+            generated += 1
+        except (OSError, ValueError) as e:
+            print(f"⚠️ No se pudo generar el LQIP de {path}: {e}")
+    if lqip:
+        imagenes['lqip'] = lqip
+    else:
+        imagenes.pop('lqip', None)
+    return generated
+
+
+def main():
+    """Genera los LQIP de todo el catálogo y guarda los hoteles modificados."""
+    force = '--force' in sys.argv
+    try:
+        hotels = load_hotels()
+    except StoreError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    generated = sum(update_placeholders(hotel, force) for hotel in hotels)
+    updated = save_hotels(hotels)
+    print(f"✅ LQIP generados: {generated} (hoteles actualizados en {store_dir_for()}: {updated})")
+    print("ℹ️ Para regenerar data/hotels.json: python scripts/store.py export")
+
+
+if __name__ == "__main__":
+    main()
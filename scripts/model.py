@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Modelo tipado del catálogo: Hotel, Images y Testimonial.
+
+Los registros de hotels.json se normalizan y validan una sola vez al compilar
+el catálogo. Las clases usan __slots__ y tuplas para reducir la memoria, y
+precalculan los campos derivados que antes se recalculaban en cada build o en
+las plantillas (clean_id e imagen principal).
+"""
+import re
+
+# Imagen de respaldo para las tarjetas cuando el hotel no tiene ninguna imagen
+FALLBACK_IMAGE = "https://images.unsplash.com/photo-1551882547-ff40c63fe5fa?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&q=80"
+
+
+def clean_hotel_id(hotel_id):
+    """Limpia el ID del hotel removiendo prefijos redundantes y caracteres inválidos para URLs SEO-friendly."""
+    if not hotel_id:
+        return ""
+
+    # Remover prefijos como 'hotel-', 'hotel_', etc.
+    cleaned_id = re.sub(r'^hotel[-_]', '', str(hotel_id).lower())
+    # Mantener solo caracteres alfanuméricos y guiones
+    cleaned_id = re.sub(r'[^a-z0-9-]', '-', cleaned_id)
+    # Remover guiones múltiples
+    cleaned_id = re.sub(r'-+', '-', cleaned_id)
+    # Remover guiones al inicio y final
+    cleaned_id = cleaned_id.strip('-')
+    return cleaned_id
+
+
+def _as_str(value):
+    """Convierte un valor opcional a cadena (None -> '')."""
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        # Algunos registros antiguos guardan la URL como lista
+        return str(value[0]) if value else ''
+    return str(value)
+
+
+def _as_str_tuple(value):
+    """Normaliza una cadena o lista de cadenas a una tupla sin vacíos."""
+    if not value:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(str(item) for item in value if item)
+
+
+def _number(value):
+    """Convierte a número conservando los enteros (750 se muestra como 750)."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return float(value)
+
+
+def _as_number(value, field, cast=_number):
+    """Convierte un valor numérico opcional, validando su tipo."""
+    if value is None or value == '':
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Valor no numérico en '{field}': {value!r}")
+
+
+def _as_coordinates(value):
+    """Normaliza {'lat', 'lon'} o [lat, lon] a una tupla validada (o None)."""
+    if not value:
+        return None
+    try:
+        lat, lon = (value['lat'], value['lon']) if isinstance(value, dict) else value
+        lat, lon = float(lat), float(lon)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Coordenadas inválidas: {value!r}")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError(f"Coordenadas fuera de rango: {value!r}")
+    return (lat, lon)
+
+
+class Testimonial:
+    """Testimonio de un huésped."""
+
+    __slots__ = ('nombre', 'rating', 'comentario', 'fecha', 'avatar')
+
+    def __init__(self, nombre, rating, comentario, fecha='', avatar=''):
+        self.nombre = nombre
+        self.rating = rating
+        self.comentario = comentario
+        self.fecha = fecha
+        self.avatar = avatar
+
+    @classmethod
+    def from_dict(cls, data):
+        """Crea un testimonio aceptando también las claves antiguas autor/texto."""
+        # Como el rating del hotel: "4.5" y 4.5 se conservan (acotados a 0-5)
+        rating = _as_number(data.get('rating'), 'rating')
+        return cls(
+            nombre=_as_str(data.get('nombre') or data.get('autor')),
+            rating=max(0, min(5, rating)) if rating is not None else 0,
+            comentario=_as_str(data.get('comentario') or data.get('texto')),
+            fecha=_as_str(data.get('fecha')),
+            avatar=_as_str(data.get('avatar')),
+        )
+
+    def to_dict(self):
+        data = {
+            'nombre': self.nombre,
+            'rating': self.rating,
+            'comentario': self.comentario,
+            'fecha': self.fecha,
+        }
+        if self.avatar:
+            data['avatar'] = self.avatar
+        return data
+
+
+class Images:
+    """Rutas de imágenes de un hotel, agrupadas por tipo.
+
+    `lqip` asocia cada ruta local con su marcador difuminado (data URI).
+    """
+
+    __slots__ = ('hotel', 'pelicula', 'galeria', 'lqip')
+
+    def __init__(self, hotel='', pelicula=(), galeria=(), lqip=None):
+        self.hotel = hotel
+        self.pelicula = pelicula
+        self.galeria = galeria
+        self.lqip = lqip or {}
+
+    @classmethod
+    def from_dict(cls, data):
+        data = data or {}
+        lqip = data.get('lqip') or {}
+        return cls(
+            hotel=_as_str(data.get('hotel')),
+            pelicula=_as_str_tuple(data.get('pelicula')),
+            galeria=_as_str_tuple(data.get('galeria')),
+            lqip={str(path): str(uri) for path, uri in lqip.items() if uri},
+        )
+
+    def __iter__(self):
+        """Recorre todas las rutas de imagen (hotel, película y galería)."""
+        if self.hotel:
+            yield self.hotel
+        yield from self.pelicula
+        yield from self.galeria
+
+    def primary(self):
+        """Elige la imagen de la tarjeta: película, galería, hotel o respaldo."""
+        if self.pelicula:
+            return self.pelicula[0]
+        if self.galeria:
+            return self.galeria[0]
+        return self.hotel or FALLBACK_IMAGE
+
+    def placeholder(self, path):
+        """Marcador LQIP de una ruta ('' si no tiene)."""
+        return self.lqip.get(path, '')
+
+    def to_dict(self):
+        data = {
+            'hotel': self.hotel,
+            'pelicula': list(self.pelicula),
+            'galeria': list(self.galeria),
+        }
+        if self.lqip:
+            data['lqip'] = dict(self.lqip)
+        return data
+
+
+class Hotel:
+    """Hotel del catálogo, normalizado y validado."""
+
+    __slots__ = (
+        'id', 'clean_id', 'nombre', 'ubicacion', 'pelicula', 'anio',
+        'descripcion', 'caracteristicas', 'precio', 'rating', 'url',
+        'booking_url', 'direccion', 'telefono', 'email',
+        'servicios_adicionales', 'imagenes', 'imagen_principal',
+        'testimonios', 'imagenes_src', 'coordenadas',
+    )
+
+    # Campos de texto opcionales copiados tal cual del JSON
+    TEXT_FIELDS = (
+        'ubicacion', 'pelicula', 'descripcion', 'url', 'booking_url',
+        'direccion', 'telefono', 'email',
+    )
+
+    @classmethod
+    def from_dict(cls, data):
+        """Normaliza y valida un registro crudo de hotels.json."""
+        if not isinstance(data, dict):
+            raise ValueError(f"Registro de hotel inválido: {type(data).__name__}")
+        hotel_id = _as_str(data.get('id')).strip()
+        if not hotel_id:
+            raise ValueError(f"Hotel sin 'id': {data.get('nombre', '?')}")
+        nombre = _as_str(data.get('nombre')).strip()
+        if not nombre:
+            raise ValueError(f"Hotel '{hotel_id}' sin 'nombre'")
+
+        hotel = cls.__new__(cls)
+        hotel.id = hotel_id
+        hotel.clean_id = clean_hotel_id(hotel_id)
+        hotel.nombre = nombre
+        for field in cls.TEXT_FIELDS:
+            setattr(hotel, field, _as_str(data.get(field)))
+        hotel.anio = _as_number(data.get('anio'), 'anio', int)
+        hotel.precio = _as_number(data.get('precio'), 'precio')
+        hotel.rating = _as_number(data.get('rating'), 'rating')
+        hotel.caracteristicas = _as_str_tuple(data.get('caracteristicas'))
+        hotel.servicios_adicionales = _as_str_tuple(data.get('servicios_adicionales'))
+        hotel.imagenes = Images.from_dict(data.get('imagenes'))
+        hotel.imagen_principal = hotel.imagenes.primary()
+        hotel.testimonios = tuple(Testimonial.from_dict(t) for t in data.get('testimonios') or ())
+        hotel.imagenes_src = data.get('imagenes_src') or None
+        hotel.coordenadas = _as_coordinates(data.get('coordenadas'))
+        return hotel
+
+    @classmethod
+    def from_record(cls, data):
+        """Reconstruye un hotel desde un registro ya normalizado (to_dict)."""
+        hotel = cls.__new__(cls)
+        for field in ('id', 'clean_id', 'nombre', 'anio', 'precio', 'rating',
+                      'imagen_principal', 'imagenes_src') + cls.TEXT_FIELDS:
+            setattr(hotel, field, data.get(field))
+        hotel.caracteristicas = tuple(data['caracteristicas'])
+        hotel.servicios_adicionales = tuple(data['servicios_adicionales'])
+        imagenes = data['imagenes']
+        hotel.imagenes = Images(imagenes['hotel'], tuple(imagenes['pelicula']), tuple(imagenes['galeria']),
+                                imagenes.get('lqip'))
+        hotel.testimonios = tuple(
+            Testimonial(t['nombre'], t['rating'], t['comentario'], t['fecha'], t.get('avatar', ''))
+            for t in data['testimonios']
+        )
+        coordenadas = data.get('coordenadas')
+        hotel.coordenadas = (coordenadas['lat'], coordenadas['lon']) if coordenadas else None
+        return hotel
+
+    def to_dict(self):
+        """Devuelve el hotel como dict serializable (API y snapshot)."""
+        data = {
+            'id': self.id,
+            'clean_id': self.clean_id,
+            'nombre': self.nombre,
+        }
+        for field in self.TEXT_FIELDS:
+            data[field] = getattr(self, field)
+        data.update({
+            'anio': self.anio,
+            'precio': self.precio,
+            'rating': self.rating,
+            'caracteristicas': list(self.caracteristicas),
+            'servicios_adicionales': list(self.servicios_adicionales),
+            'imagenes': self.imagenes.to_dict(),
+            'imagen_principal': self.imagen_principal,
+            'testimonios': [t.to_dict() for t in self.testimonios],
+        })
+        if self.imagenes_src:
+            data['imagenes_src'] = self.imagenes_src
+        if self.coordenadas:
+            data['coordenadas'] = {'lat': self.coordenadas[0], 'lon': self.coordenadas[1]}
+        return data
+
+    def __repr__(self):
+        return f"Hotel({self.id!r})"
+
+
+class HotelSummary:
+    """Resumen compacto de un hotel para el índice y el sitemap.
+
+    Conserva solo lo que necesitan las tarjetas y el sitemap, de modo que en
+    modo streaming la memoria crece con el número de hoteles y no con el
+    tamaño de cada registro.
+    """
+
+    __slots__ = (
+        'id', 'clean_id', 'nombre', 'ubicacion', 'pelicula', 'anio',
+        'descripcion', 'caracteristicas', 'precio', 'rating', 'imagenes',
+        'imagen_principal', 'testimonios',
+    )
+
+    # El sitemap solo publica las primeras imágenes de la galería
+    MAX_GALERIA = 3
+    MAX_TESTIMONIOS = 2
+
+    @classmethod
+    def from_hotel(cls, hotel):
+        summary = cls.__new__(cls)
+        for field in ('id', 'clean_id', 'nombre', 'ubicacion', 'pelicula', 'anio',
+                      'descripcion', 'caracteristicas', 'precio', 'rating',
+                      'imagen_principal'):
+            setattr(summary, field, getattr(hotel, field))
+        imagenes = hotel.imagenes
+        galeria = imagenes.galeria[:cls.MAX_GALERIA]
+        # Solo los LQIP de las imágenes que se conservan en el resumen
+        lqip = {path: imagenes.lqip[path]
+                for path in (imagenes.hotel, summary.imagen_principal) + imagenes.pelicula + galeria
+                if path in imagenes.lqip}
+        summary.imagenes = Images(imagenes.hotel, imagenes.pelicula, galeria, lqip)
+        summary.testimonios = hotel.testimonios[:cls.MAX_TESTIMONIOS]
+        return summary
@@ -6,16 +6,22 @@ Script para organizar imágenes de hoteles en la estructura de directorios adecu
 import json
 import os
 import shutil
+import unicodedata
+from collections import deque
 from pathlib import Path
 import re
 
+from store import StoreError, load_hotels, save_hotels
+
 def load_hotel_data():
-    """Carga los datos de hoteles desde el archivo JSON."""
+    """Carga los datos de hoteles desde el almacén particionado (data/hotels/)."""
     try:
-        with open('src/data/hotels.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_hotels()
     except FileNotFoundError:
-        print("Error: No se encontró el archivo src/data/hotels.json")
+        print("Error: No se encontró el archivo data/hotels.json")
+        return []
+    except StoreError as e:
+        print(f"Error: {e}")
         return []
     except json.JSONDecodeError as e:
         print(f"Error al decodificar el archivo JSON: {e}")
@@ -52,6 +58,108 @@ def find_image_files(source_dir="src/static/images/hotels"):
     
     return image_files
 
+def normalize_key(text):
+    """Normaliza un nombre para comparar: sin acentos, minúsculas y '-' como separador."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^a-z0-9]+', '-', text).strip('-')
+
+
+def hotel_match_keys(hotel):
+    """Claves con las que un archivo puede referirse a un hotel: id y slug del nombre."""
+    keys = set()
+    for value in (hotel.get('id'), hotel.get('nombre') or hotel.get('name')):
+        if value:
+            key = normalize_key(str(value))
+            if key:
+                keys.add(key)
+    return keys
+
+
+class HotelMatcher:
+    """Autómata Aho-Corasick con las claves de todos los hoteles.
+
+    Se construye una vez y cada nombre de archivo se resuelve con un único
+    recorrido, en lugar de comparar cada archivo con cada hotel.
+    """
+
+    def __init__(self, hotels):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for hotel_key, hotel in self._iter_hotel_keys(hotels):
+            self._add(hotel_key, hotel)
+        self._build()
+
+    @staticmethod
+    def _iter_hotel_keys(hotels):
+        for hotel in hotels:
+            hotel_id = hotel.get('id') or hotel.get('nombre') or hotel.get('name')
+            for key in hotel_match_keys(hotel):
+                yield key, hotel_id
+
+    def _add(self, key, hotel_id):
+        node = 0
+        for char in key:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(key), hotel_id))
+
+    def _build(self):
+        """Calcula los enlaces de fallo en anchura y hereda sus salidas."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                if self._fail[nxt] == nxt:
+                    self._fail[nxt] = 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text):
+        """Recorre las claves encontradas en `text` como (inicio, fin, hotel_id)."""
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, hotel_id in self._out[node]:
+                yield end - length, end, hotel_id
+
+    def match(self, filename):
+        """Devuelve (hotel_id, candidatos) para un nombre de archivo.
+
+        Gana la coincidencia más larga que empieza y acaba en un límite de
+        palabra. Si varios hoteles empatan, hotel_id es None y `candidatos`
+        contiene los hoteles en conflicto.
+        """
+        text = normalize_key(Path(filename).stem)
+        best_length = 0
+        candidates = set()
+        for start, end, hotel_id in self.iter_matches(text):
+            if (start and text[start - 1] != '-') or (end < len(text) and text[end] != '-'):
+                continue
+            length = end - start
+            if length > best_length:
+                best_length = length
+                candidates = {hotel_id}
+            elif length == best_length:
+                candidates.add(hotel_id)
+        if len(candidates) == 1:
+            return next(iter(candidates)), candidates
+        return None, candidates
+
+
 def organize_images_by_hotel(hotels):
     """Organiza imágenes basándose en los datos de hoteles."""
     print("Organizando imágenes por hotel...")
@@ -60,43 +168,29 @@ def organize_images_by_hotel(hotels):
     if not images_dir.exists():
         images_dir.mkdir(parents=True, exist_ok=True)
     
-    # Crear un diccionario para mapear nombres de hotel a imágenes
-    hotel_images = {}
-    
+    # Nombre de archivo destino de cada hotel
+    safe_names = {}
     for hotel in hotels:
-        hotel_name = hotel.get('name', '').strip()
-        if not hotel_name:
-            continue
-            
-        safe_name = get_safe_filename(hotel_name)
-        hotel_images[hotel_name] = {
-            'safe_name': safe_name,
-            'expected_files': [],
-            'images': hotel.get('images', [])
-        }
+        hotel_name = (hotel.get('nombre') or hotel.get('name') or '').strip()
+        if hotel_name:
+            safe_names[hotel.get('id') or hotel_name] = Path(get_safe_filename(hotel_name)).stem
+    
+    # Autómata construido una sola vez con ids y slugs de todos los hoteles
+    matcher = HotelMatcher(hotels)
     
     # Encontrar archivos de imagen existentes
     existing_files = find_image_files()
     
     # Organizar archivos existentes
     organized_count = 0
+    ambiguous = []
     for file_path in existing_files:
         filename = file_path.name
+        matched_hotel, candidates = matcher.match(filename)
         
-        # Buscar hotel correspondiente
-        matched_hotel = None
-        for hotel_name, hotel_data in hotel_images.items():
-            # Buscar coincidencias en el nombre del archivo
-            safe_name = hotel_data['safe_name']
-            if (safe_name.lower() in filename.lower() or 
-                hotel_name.lower().replace(' ', '_') in filename.lower() or
-                hotel_name.lower().replace('-', '_') in filename.lower()):
-                matched_hotel = hotel_name
-                break
-        
-        if matched_hotel:
+        if matched_hotel in safe_names:
             # El archivo ya está en el lugar correcto o necesita ser renombrado
-            expected_filename = f"{hotel_images[matched_hotel]['safe_name']}{file_path.suffix.lower()}"
+            expected_filename = f"{safe_names[matched_hotel]}{file_path.suffix.lower()}"
             expected_path = images_dir / expected_filename
             
             if file_path != expected_path:
@@ -107,9 +201,15 @@ def organize_images_by_hotel(hotels):
                     organized_count += 1
                 except Exception as e:
                     print(f"  Error al mover {file_path.name}: {e}")
+        elif candidates:
+            ambiguous.append((filename, sorted(candidates)))
+            print(f"  ⚠️ Archivo ambiguo: {filename} ({', '.join(sorted(candidates))})")
         else:
             print(f"  Archivo sin hotel coincidente: {filename}")
     
+    if ambiguous:
+        print(f"  {len(ambiguous)} archivos ambiguos sin mover; renómbralos con el id del hotel")
+    
     return organized_count
 
 def create_missing_image_placeholders(hotels):
@@ -170,10 +270,9 @@ def update_json_with_local_paths(hotels):
             hotel['images'] = new_images
             updated_count += 1
     
-    # Guardar cambios
+    # Guardar cambios: un archivo por hotel modificado (escritura atómica)
     try:
-        with open('src/data/hotels.json', 'w', encoding='utf-8') as f:
-            json.dump(hotels, f, indent=2, ensure_ascii=False)
+        save_hotels(hotels)
         print(f"  JSON actualizado: {updated_count} hoteles modificados")
         return True
     except Exception as e:
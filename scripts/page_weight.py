@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Informe de peso de página del sitio generado y control de presupuestos.
+
+Para cada HTML de dist/ suma los bytes del propio HTML y de los CSS, JS e
+imágenes que carga (incluidas las url() de los CSS), sin comprimir y con gzip,
+y cuenta las peticiones. Los recursos externos cuentan como peticiones pero
+su tamaño no se conoce. De un srcset (o de los <source> de un <picture>) el
+navegador descarga un solo candidato, que depende de la pantalla: se cuenta el
+más pesado, como una sola petición. Los presupuestos se leen de budgets.json (patrones de
+ruta -> límites) y cualquier página que los supere hace fallar la build.
+
+Uso: python scripts/page_weight.py [--json]   (tras generar dist/)
+"""
+import fnmatch
+import gzip
+import json
+import os
+import posixpath
+import re
+import sys
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import unquote, urljoin, urlparse
+
+from check_links import DEFAULT_IGNORE
+
+DIST_DIR = Path('dist')
+BUDGETS_PATH = Path('budgets.json')
+REPORT_PATH = Path('reports/page-weight.json')
+
+# Tipos de recurso según la extensión
+KINDS = {
+    '.css': 'css',
+    '.js': 'js',
+    '.webp': 'img', '.jpg': 'img', '.jpeg': 'img', '.png': 'img',
+    '.gif': 'img', '.svg': 'img', '.avif': 'img', '.ico': 'img',
+}
+
+# Formatos de texto que el servidor sirve comprimidos
+COMPRESSIBLE = {'.html', '.css', '.js', '.svg', '.json', '.xml', '.txt'}
+
+# rel de <link> que provocan una descarga
+LINK_RELS = {'stylesheet', 'icon', 'shortcut', 'preload', 'modulepreload', 'manifest'}
+
+CSS_URL_RE = re.compile(r'''url\(\s*['"]?([^'")]+?)['"]?\s*\)''')
+
+
+def parse_srcset(srcset):
+    """URLs de los candidatos de un srcset ("a.webp 480w, b.webp 960w")."""
+    urls = []
+    for candidate in (srcset or '').split(','):
+        parts = candidate.split()
+        if parts:
+            urls.append(parts[0])
+    return urls
+
+
+class _ResourceCollector(HTMLParser):
+    """Recoge las URLs de los recursos que descarga una página.
+
+    `alternatives` guarda grupos de URLs de los que el navegador descarga
+    solo una: el src y el srcset de un <img>, o todo un <picture>.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.resources = []
+        self.alternatives = []
+        self._picture = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'picture':
+            self._picture = []
+        elif tag in ('img', 'source') and (attrs.get('srcset') or self._picture is not None):
+            candidates = parse_srcset(attrs.get('srcset'))
+            if tag == 'img' and attrs.get('src'):
+                candidates.append(attrs['src'].strip())
+            if self._picture is not None:
+                self._picture.extend(candidates)
+            elif candidates:
+                self.alternatives.append(candidates)
+        elif tag in ('img', 'script', 'source', 'iframe', 'video', 'audio') and attrs.get('src'):
+            self.resources.append(attrs['src'].strip())
+        elif tag == 'link' and attrs.get('href'):
+            rels = set((attrs.get('rel') or '').lower().split())
+            if rels & LINK_RELS:
+                self.resources.append(attrs['href'].strip())
+
+    handle_startendtag = handle_starttag
+
+    def handle_endtag(self, tag):
+        if tag == 'picture' and self._picture is not None:
+            if self._picture:
+                self.alternatives.append(self._picture)
+            self._picture = None
+
+
+class _SizeCache:
+    """Tamaños (sin comprimir, gzip) de los archivos de dist/, calculados una vez."""
+
+    def __init__(self, dist_dir):
+        self.dist_dir = Path(dist_dir)
+        self._sizes = {}
+
+    def get(self, path):
+        if path not in self._sizes:
+            full_path = self.dist_dir / path
+            data = full_path.read_bytes()
+            if full_path.suffix.lower() in COMPRESSIBLE:
+                compressed = len(gzip.compress(data, compresslevel=6, mtime=0))
+            else:
+                compressed = len(data)
+            self._sizes[path] = (len(data), compressed)
+        return self._sizes[path]
+
+
+def _local_path(url, page, base_url, dist_dir):
+    """Ruta dentro de dist/ de una URL, o None si es externa o inline.
+
+    Los recursos que añade el CDN en el borde (/cdn-cgi/) cuentan como externos.
+    """
+    if _is_inline(url) or url.startswith(DEFAULT_IGNORE):
+        return None
+    base = urlparse(base_url) if base_url else None
+    parsed = urlparse(url)
+    if parsed.scheme or parsed.netloc:
+        if not base or (parsed.netloc != base.netloc):
+            return None
+    path = unquote(parsed.path)
+    if path.startswith('/'):
+        prefix = base.path.rstrip('/') if base else ''
+        if prefix and path.startswith(prefix + '/'):
+            path = path[len(prefix):]
+        path = path.lstrip('/')
+    else:
+        path = urlparse(urljoin('/' + page, path)).path.lstrip('/')
+    path = posixpath.normpath(path) if path else 'index.html'
+    if (Path(dist_dir) / path).is_dir():
+        path = posixpath.join(path, 'index.html')
+    return path
+
+
+def _is_inline(url):
+    return not url or url.startswith(('data:', '#', 'javascript:'))
+
+
+def measure_page(page, dist_dir, base_url, sizes):
+    """Peso de una página: bytes por tipo, gzip, peticiones y recursos que faltan."""
+    html_path = Path(dist_dir) / page
+    collector = _ResourceCollector()
+    collector.feed(html_path.read_text(encoding='utf-8', errors='replace'))
+    collector.close()
+
+    raw, compressed = sizes.get(page)
+    weight = {'html': raw, 'css': 0, 'js': 0, 'img': 0, 'otros': 0}
+    total_gzip = compressed
+    requests = 1
+    external = 0
+    missing = []
+    seen = {page}
+
+    # De cada grupo de alternativas se cuenta la más pesada de las que existen
+    for candidates in collector.alternatives:
+        urls = [url for url in candidates if not _is_inline(url)]
+        local = [path for path in (_local_path(url, page, base_url, dist_dir) for url in urls)
+                 if path is not None]
+        if not local:
+            if urls:
+                external += 1
+                requests += 1
+            continue
+        if any(path in seen for path in local):
+            continue
+        existing = [path for path in local if (Path(dist_dir) / path).is_file()]
+        missing.extend(sorted(set(local) - set(existing)))
+        seen.update(set(local) - set(existing))
+        requests += 1
+        if existing:
+            heaviest = max(existing, key=lambda path: sizes.get(path)[0])
+            seen.add(heaviest)
+            raw, compressed = sizes.get(heaviest)
+            weight[KINDS.get(posixpath.splitext(heaviest)[1].lower(), 'otros')] += raw
+            total_gzip += compressed
+
+    pending = [(url, page) for url in collector.resources]
+    while pending:
+        url, referrer = pending.pop()
+        if _is_inline(url):
+            continue
+        path = _local_path(url, referrer, base_url, dist_dir)
+        if path is None:
+            if url not in seen:
+                seen.add(url)
+                external += 1
+                requests += 1
+            continue
+        if path in seen:
+            continue
+        seen.add(path)
+        requests += 1
+        if not (Path(dist_dir) / path).is_file():
+            missing.append(path)
+            continue
+        raw, compressed = sizes.get(path)
+        kind = KINDS.get(posixpath.splitext(path)[1].lower(), 'otros')
+        weight[kind] += raw
+        total_gzip += compressed
+        # Las imágenes de fondo y las fuentes de un CSS también se descargan
+        if kind == 'css':
+            css = (Path(dist_dir) / path).read_text(encoding='utf-8', errors='replace')
+            pending.extend((match.group(1).strip(), path) for match in CSS_URL_RE.finditer(css))
+
+    return {
+        'pagina': page,
+        'bytes': weight,
+        'total': sum(weight.values()),
+        'total_gzip': total_gzip,
+        'peticiones': requests,
+        'externas': external,
+        'faltan': sorted(missing),
+    }
+
+
+def load_budgets(path=BUDGETS_PATH):
+    """Lee los presupuestos ({patrón: {métrica: límite}}); {} si no hay archivo."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def budget_for(page, budgets):
+    """Límites aplicables a una página: '*' y después los patrones que coincidan."""
+    limits = dict(budgets.get('*', {}))
+    for pattern, values in budgets.items():
+        if pattern != '*' and fnmatch.fnmatch(page, pattern):
+            limits.update(values)
+    return limits
+
+
+def _metric_values(result):
+    """Métricas con presupuesto (kb = kilobytes)."""
+    weight = result['bytes']
+    return {
+        'html_kb': weight['html'] / 1024,
+        'css_kb': weight['css'] / 1024,
+        'js_kb': weight['js'] / 1024,
+        'img_kb': weight['img'] / 1024,
+        'total_kb': result['total'] / 1024,
+        'total_gzip_kb': result['total_gzip'] / 1024,
+        'peticiones': result['peticiones'],
+    }
+
+
+def check_budgets(results, budgets):
+    """Lista de incumplimientos (página, métrica, valor, límite)."""
+    violations = []
+    for result in results:
+        values = _metric_values(result)
+        for metric, limit in budget_for(result['pagina'], budgets).items():
+            if metric in values and values[metric] > limit:
+                violations.append({'pagina': result['pagina'], 'metrica': metric,
+                                   'valor': round(values[metric], 1), 'limite': limit})
+    return violations
+
+
+def measure_site(dist_dir=DIST_DIR, base_url='', budgets=None):
+    """Mide todas las páginas de dist/ y comprueba los presupuestos."""
+    dist_dir = Path(dist_dir)
+    budgets = load_budgets() if budgets is None else budgets
+    sizes = _SizeCache(dist_dir)
+    pages = sorted(p.relative_to(dist_dir).as_posix() for p in dist_dir.rglob('*.html'))
+    results = [measure_page(page, dist_dir, base_url, sizes) for page in pages]
+    return {
+        'paginas': results,
+        'presupuestos': budgets,
+        'incumplimientos': check_budgets(results, budgets),
+    }
+
+
+def write_report(report, path=REPORT_PATH):
+    """Guarda el informe en JSON (fuera de dist/, no se publica)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def print_report(report):
+    """Tabla resumida por página e incumplimientos."""
+    print(f"{'Página':<44}{'HTML':>8}{'CSS':>8}{'JS':>8}{'Img':>9}{'Total':>9}{'gzip':>9}{'Pet.':>6}")
+    for result in report['paginas']:
+        values = _metric_values(result)
+        print(f"{result['pagina']:<44}{values['html_kb']:>7.1f}K{values['css_kb']:>7.1f}K"
+              f"{values['js_kb']:>7.1f}K{values['img_kb']:>8.1f}K{values['total_kb']:>8.1f}K"
+              f"{values['total_gzip_kb']:>8.1f}K{result['peticiones']:>6}")
+        if result['faltan']:
+            print(f"  ⚠️ Recursos no encontrados: {', '.join(result['faltan'])}")
+    if report['incumplimientos']:
+        print(f"\n❌ {len(report['incumplimientos'])} presupuestos superados:")
+        for item in report['incumplimientos']:
+            print(f"  ✗ {item['pagina']}: {item['metrica']} = {item['valor']} (límite {item['limite']})")
+    else:
+        print("\n✅ Todas las páginas dentro de presupuesto")
+
+
+def check_page_weight(dist_dir=DIST_DIR, base_url=None):
+    """Mide dist/, escribe el informe y devuelve True si no hay incumplimientos."""
+    if base_url is None:
+        base_url = os.environ.get('BASE_URL', '')
+    report = measure_site(dist_dir, base_url)
+    path = write_report(report)
+    print_report(report)
+    print(f"📝 Informe de peso de página: {path}")
+    return not report['incumplimientos']
+
+
+def main():
+    if not DIST_DIR.is_dir():
+        print(f"❌ El directorio {DIST_DIR}/ no existe. Ejecuta antes scripts/generate.py")
+        sys.exit(1)
+    if '--json' in sys.argv:
+        report = measure_site(DIST_DIR, os.environ.get('BASE_URL', ''))
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        sys.exit(1 if report['incumplimientos'] else 0)
+    sys.exit(0 if check_page_weight() else 1)
+
+
+if __name__ == "__main__":
+    main()
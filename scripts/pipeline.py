@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Ejecuta las etapas de mantenimiento del catálogo en un solo proceso.
+
+Etapas (en este orden): download, dedup, fix-paths, verify y generate. El
+catálogo se lee una sola vez y pasa en memoria de una etapa a la siguiente,
+junto con la instantánea del árbol de imágenes (tamaños y hashes ya
+calculados); al terminar (también si una etapa falla o lanza una excepción)
+se guardan solo los hoteles modificados y se regenera data/hotels.json una
+única vez; la descarga guarda además cada hotel en cuanto lo procesa. Cada
+etapa importa su módulo al ejecutarse, así que las que no descargan imágenes
+no cargan requests ni Pillow.
+
+Uso: python scripts/pipeline.py [etapa ...] [--no-budget]
+     (sin etapas ejecuta todas; p. ej. `pipeline.py dedup verify generate`)
+"""
+import sys
+
+from store import StoreError, export_catalog, load_hotels, save_hotel, save_hotels, store_dir_for
+
+STAGES = ('download', 'dedup', 'fix-paths', 'verify', 'generate')
+FLAGS = ('--no-budget',)
+
+
+class PipelineContext:
+    """Estado compartido por las etapas: catálogo crudo e imágenes en disco."""
+
+    def __init__(self):
+        self.hotels = load_hotels()
+        self.saved = 0  # hoteles ya guardados por las etapas (descargas)
+        self._sizes = None
+        self._hashes = {}
+
+    def image_sizes(self):
+        """Instantánea {ruta: bytes} de static/images/hotels (una vez por cambio)."""
+        if self._sizes is None:
+            from check_images_exist import scan_image_tree
+            self._sizes = scan_image_tree()
+        return self._sizes
+
+    def file_hash(self, path):
+        """Hash del contenido de una imagen, calculado una sola vez."""
+        if path not in self._hashes:
+            from dedup_images import file_hash
+            self._hashes[path] = file_hash(path)
+        return self._hashes[path]
+
+    def images_changed(self):
+        """Invalida la instantánea tras una etapa que escribe imágenes."""
+        self._sizes = None
+        self._hashes = {}
+
+    def models(self):
+        """Hoteles del modelo tipado (Hotel) a partir del catálogo en memoria."""
+        from model import Hotel
+        return [Hotel.from_dict(hotel) for hotel in self.hotels]
+
+    def save(self):
+        """Guarda los hoteles modificados y regenera hotels.json si hubo cambios."""
+        updated = save_hotels(self.hotels) + self.saved
+        self.saved = 0
+        if updated:
+            export_catalog()
+        return updated
+
+
+def stage_download(ctx):
+    from download_hotel_images import process_hotel_images
+
+    # Cada hotel se guarda en cuanto se procesa, como en download_hotel_images.py:
+    # un fallo posterior (o una interrupción) no pierde las descargas hechas
+    try:
+        for hotel in ctx.hotels:
+            process_hotel_images(hotel)
+            try:
+                ctx.saved += save_hotel(hotel)
+            except Exception as e:
+                print(f"❌ Error al guardar {hotel.get('id')}: {e}")
+    finally:
+        ctx.images_changed()
+    return True
+
+
+def stage_dedup(ctx):
+    from dedup_images import dedup_images
+
+    removed = dedup_images(ctx.hotels, ctx.image_sizes(), ctx.file_hash)
+    for hotel_id, paths in removed.items():
+        print(f"  🏨 {hotel_id}: {len(paths)} imágenes repetidas quitadas")
+    print(f"✅ Imágenes repetidas: {sum(map(len, removed.values()))}")
+    return True
+
+
+def stage_fix_paths(ctx):
+    from fix_json_paths import fix_image_paths, fix_other_paths, verify_image_existence
+
+    fix_image_paths(ctx.hotels)
+    fix_other_paths(ctx.hotels)
+    verify_image_existence(ctx.hotels)
+    return True
+
+
+def stage_verify(ctx):
+    from check_images_exist import print_report, verify_images
+
+    report = verify_images(ctx.models(), snapshot=ctx.image_sizes())
+    print_report(report)
+    return not report['problemas']
+
+
+def stage_generate(ctx):
+    from generate import generate_site
+
+    if not generate_site(ctx.models()):
+        return False
+    if '--no-budget' not in sys.argv:
+        from page_weight import check_page_weight
+        print("\n⚖️ Peso de página...")
+        return check_page_weight()
+    return True
+
+
+STAGE_FUNCTIONS = {
+    'download': stage_download,
+    'dedup': stage_dedup,
+    'fix-paths': stage_fix_paths,
+    'verify': stage_verify,
+    'generate': stage_generate,
+}
+
+
+def run_pipeline(stages):
+    """Ejecuta las etapas en orden; se detiene en la primera que falla."""
+    ctx = PipelineContext()
+    print(f"📖 Catálogo cargado: {len(ctx.hotels)} hoteles")
+    ok = False
+    try:
+        for name in stages:
+            print(f"\n▶️ Etapa: {name}")
+            if not STAGE_FUNCTIONS[name](ctx):
+                print(f"❌ La etapa '{name}' ha fallado; no se ejecutan las siguientes")
+                break
+        else:
+            ok = True
+    finally:
+        # Una sola escritura del catálogo, aunque una etapa haya fallado o
+        # lanzado una excepción: lo ya hecho no se pierde
+        updated = ctx.save()
+        print(f"\n💾 Hoteles actualizados en {store_dir_for()}: {updated}"
+              + (" (data/hotels.json regenerado)" if updated else ""))
+    return ok
+
+
+def main():
+    args = sys.argv[1:]
+    if '-h' in args or '--help' in args:
+        print(__doc__.strip())
+        return
+    # Una opción mal escrita no debe acabar ejecutando todas las etapas
+    flags = [arg for arg in args if arg.startswith('-')]
+    unknown_flags = [flag for flag in flags if flag not in FLAGS]
+    if unknown_flags:
+        print(f"❌ Opciones desconocidas: {', '.join(unknown_flags)} (disponibles: {', '.join(FLAGS)})")
+        sys.exit(2)
+    requested = [arg for arg in args if not arg.startswith('-')]
+    unknown = [name for name in requested if name not in STAGE_FUNCTIONS]
+    if unknown:
+        print(f"❌ Etapas desconocidas: {', '.join(unknown)} (disponibles: {', '.join(STAGES)})")
+        sys.exit(2)
+    # Siempre en el orden del pipeline, sin repetir
+    stages = [name for name in STAGES if name in requested] if requested else list(STAGES)
+    try:
+        ok = run_pipeline(stages)
+    except StoreError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Publicación incremental del sitio generado.
+
+Calcula el manifiesto de la build (ruta -> sha256 de cada archivo de dist/) y
+lo compara con el del último despliegue, guardado en el destino como
+.deploy-manifest.json (si no existe, se calcula a partir de los archivos del
+destino). El resultado es la lista exacta de archivos añadidos, modificados y
+eliminados; solo esos se copian o borran en el destino, que puede ser un
+directorio cualquiera o un worktree de git (la rama gh-pages), en cuyo caso
+se hace un commit con el cambio y opcionalmente push.
+
+Opcionalmente escribe la lista de URLs que hay que purgar en el CDN
+(modificadas y eliminadas, con la URL de directorio de cada index.html).
+
+Uso: python scripts/publish.py <destino> [--from dist] [--dry-run] [--json]
+                               [--git] [--push] [--purge-list archivo]
+     (--json solo informa, como --dry-run)
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from store import atomic_write_json
+
+DIST_DIR = Path('dist')
+MANIFEST_NAME = '.deploy-manifest.json'
+
+# Archivos del destino que no pertenecen al sitio y nunca se tocan
+PROTECTED = {'.git', '.nojekyll', 'CNAME', MANIFEST_NAME}
+
+
+def file_hash(path):
+    """sha256 del contenido de un archivo."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(directory):
+    """Manifiesto {ruta relativa: sha256} de los archivos de un directorio."""
+    directory = Path(directory)
+    manifest = {}
+    for root, dirs, files in os.walk(directory):
+        if Path(root) == directory:
+            dirs[:] = [d for d in dirs if d not in PROTECTED]
+        for name in files:
+            path = Path(root) / name
+            relative = path.relative_to(directory).as_posix()
+            if relative in PROTECTED:
+                continue
+            manifest[relative] = file_hash(path)
+    return dict(sorted(manifest.items()))
+
+
+def load_deployed_manifest(target):
+    """Manifiesto del último despliegue; si no hay, se calcula sobre el destino."""
+    target = Path(target)
+    try:
+        with open(target / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            return json.load(f)['files']
+    except FileNotFoundError:
+        return build_manifest(target) if target.is_dir() else {}
+    except (json.JSONDecodeError, KeyError):
+        print(f"⚠️ {MANIFEST_NAME} ilegible en {target}, se recalcula desde los archivos")
+        return build_manifest(target)
+
+
+def diff_manifests(old, new):
+    """Diferencia entre dos manifiestos: {'added', 'changed', 'removed'}."""
+    return {
+        'added': sorted(new.keys() - old.keys()),
+        'changed': sorted(path for path in new.keys() & old.keys() if new[path] != old[path]),
+        'removed': sorted(old.keys() - new.keys()),
+    }
+
+
+def purge_urls(delta, base_url=''):
+    """URLs que el CDN debe invalidar (las añadidas no estaban en caché)."""
+    base = base_url.rstrip('/')
+    urls = []
+    for path in delta['changed'] + delta['removed']:
+        urls.append(f"{base}/{path}")
+        if path == 'index.html' or path.endswith('/index.html'):
+            # La página también se sirve en la URL del directorio
+            urls.append(f"{base}/{path[:-len('index.html')]}")
+    return sorted(set(urls))
+
+
+def apply_delta(source, target, delta, manifest):
+    """Copia los archivos nuevos y modificados, borra los eliminados y guarda el manifiesto."""
+    source, target = Path(source), Path(target)
+    for path in delta['added'] + delta['changed']:
+        (target / path).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source / path, target / path)
+    for path in delta['removed']:
+        try:
+            (target / path).unlink()
+        except FileNotFoundError:
+            continue
+        # Borrar los directorios que se quedan vacíos
+        parent = (target / path).parent
+        while parent != target and not any(parent.iterdir()):
+            parent.rmdir()
+            parent = parent.parent
+    atomic_write_json(target / MANIFEST_NAME, {'version': 1, 'files': manifest})
+
+
+def git_commit(target, delta, push=False):
+    """Hace commit del cambio en el worktree destino (y push si se pide)."""
+    def git(*args):
+        return subprocess.run(['git', '-C', str(target)] + list(args), check=True,
+                              capture_output=True, text=True).stdout
+
+    # El worktree solo contiene los cambios que acaba de aplicar apply_delta()
+    git('add', '--all', '.')
+    if not git('status', '--porcelain'):
+        print("ℹ️ Nada que publicar en el worktree")
+        return False
+    message = (f"Deploy: {len(delta['added'])} añadidos, {len(delta['changed'])} modificados, "
+               f"{len(delta['removed'])} eliminados")
+    git('commit', '--quiet', '-m', message)
+    print(f"✅ Commit en {target}: {message}")
+    if push:
+        git('push', '--quiet')
+        print("✅ Push realizado")
+    return True
+
+
+def _arg(name, default=None):
+    """Valor de una opción --nombre valor."""
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def main():
+    values = {_arg(name) for name in ('--from', '--purge-list')}
+    positional = [arg for arg in sys.argv[1:] if not arg.startswith('--') and arg not in values]
+    if not positional:
+        print("Uso: python scripts/publish.py <destino> [--from dist] [--dry-run] [--json] "
+              "[--git] [--push] [--purge-list archivo]")
+        sys.exit(2)
+    target = Path(positional[0])
+    source = Path(_arg('--from', DIST_DIR))
+    if not source.is_dir():
+        print(f"❌ El directorio {source}/ no existe. Ejecuta antes scripts/generate.py")
+        sys.exit(1)
+
+    manifest = build_manifest(source)
+    delta = diff_manifests(load_deployed_manifest(target), manifest)
+    urls = purge_urls(delta, os.environ.get('BASE_URL', ''))
+
+    purge_path = _arg('--purge-list')
+    if purge_path:
+        with open(purge_path, 'w', encoding='utf-8') as f:
+            f.writelines(url + '\n' for url in urls)
+
+    if '--json' in sys.argv:
+        json.dump(dict(delta, purge=urls), sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print(f"📦 {source} -> {target}: {len(manifest)} archivos en la build")
+        for label, key in (('➕ Añadidos', 'added'), ('✏️ Modificados', 'changed'), ('➖ Eliminados', 'removed')):
+            print(f"{label}: {len(delta[key])}")
+            for path in delta[key][:20]:
+                print(f"   {path}")
+            if len(delta[key]) > 20:
+                print(f"   ... y {len(delta[key]) - 20} más")
+        if purge_path:
+            print(f"🧹 URLs a purgar en el CDN: {len(urls)} ({purge_path})")
+
+    if '--dry-run' in sys.argv or '--json' in sys.argv:
+        return
+    if not any(delta.values()) and (target / MANIFEST_NAME).exists():
+        print("✅ El destino ya está al día")
+        return
+    target.mkdir(parents=True, exist_ok=True)
+    apply_delta(source, target, delta, manifest)
+    print(f"✅ Destino actualizado: {target}")
+    if '--git' in sys.argv:
+        git_commit(target, delta, push='--push' in sys.argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Búsqueda de texto completo en el catálogo con índice invertido y BM25.
+
+El índice se construye una vez por versión del catálogo (CatalogSnapshot.
+search_index()) sobre nombre, película, ubicación, descripción,
+características y servicios adicionales, con un peso por campo. El texto se
+normaliza para español: sin tildes ni mayúsculas, sin palabras vacías y con
+un lematizador ligero (plurales, género y algunos sufijos), de modo que
+"piscinas climatizadas" encuentra "piscina climatizada".
+
+La puntuación BM25 de cada término en cada documento no depende de la
+consulta, así que se calcula al construir el índice y cada lista de
+documentos se guarda ordenada de mayor a menor impacto. Una consulta recorre
+las listas por bloques, tomando siempre el bloque de mayor impacto pendiente
+entre las listas de sus términos; cada documento nuevo se puntúa completo
+buscando su impacto en las demás listas (ordenadas también por documento) y
+los k mejores se eligen con un montículo. Se detiene cuando ningún documento
+sin ver puede superar al k-ésimo mejor o, en catálogos muy grandes, al agotar
+un presupuesto de POSTINGS_BUDGET documentos: los que quedan sin ver tienen
+los impactos más bajos, así que el orden apenas cambia y el tiempo de
+respuesta no crece con el catálogo (con menos documentos que el presupuesto
+el resultado es exacto).
+
+La última palabra de la consulta se trata como prefijo si no termina en
+espacio ("pisc" -> piscina), y la respuesta incluye las palabras del catálogo
+que la completan.
+
+Uso: python scripts/search.py "<consulta>" [--k 10]
+     python scripts/search.py --bench [--hoteles 200000]
+     python scripts/search.py --check [--catalogos 300]
+"""
+import heapq
+import math
+import random
+import re
+import sys
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+# Peso de cada campo en la frecuencia de los términos (BM25F simplificado)
+FIELD_WEIGHTS = {
+    'nombre': 3.0,
+    'pelicula': 2.5,
+    'ubicacion': 2.0,
+    'caracteristicas': 1.5,
+    'servicios_adicionales': 1.0,
+    'descripcion': 1.0,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Resultados por defecto y máximos, documentos por término y completados por prefijo
+SEARCH_DEFAULT = 10
+SEARCH_MAX = 50
+POSTINGS_BUDGET = 1024
+POSTINGS_BLOCK = 64
+MAX_EXPANSIONES = 20
+MAX_SUGERENCIAS = 5
+MAX_QUERY_LENGTH = 200
+
+# Los completados de los prefijos cortos se calculan al construir el índice
+SHORT_PREFIX = 3
+
+STOPWORDS = frozenset("""
+a al algo algunas algunos ante antes como con contra cual cuando de del desde
+donde durante e el ella ellas ellos en entre era es esa ese eso esta estas este
+esto estos fue ha hasta hay la las le les lo los mas me mi mis muy nada ni no
+nos o os otra otras otro otros para pero poco por porque que quien quienes se
+ser si sin sobre su sus tambien te tiene todo todos tu tus un una uno unos y ya
+""".split())
+
+# Sufijos derivativos que se quitan antes de plural y género (solo si queda raíz)
+SUFIJOS = ('amientos', 'imientos', 'amiento', 'imiento', 'mente', 'aciones', 'iciones',
+           'acion', 'icion')
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+class SearchRequestError(ValueError):
+    """Parámetros de una búsqueda no válidos (respuesta 400)."""
+
+
+def fold(text):
+    """Minúsculas y sin tildes: 'Ático Pequeño' -> 'atico pequeno'."""
+    text = (text or '').casefold()
+    if text.isascii():
+        return text
+    # Las letras con tilde se descomponen en letra + marca y la marca se descarta
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+def stem(word):
+    """Lematizador ligero para español sobre palabras ya normalizadas."""
+    if len(word) <= 4 or word.isdigit():
+        return word
+    for suffix in SUFIJOS:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    if word.endswith('ces'):
+        word = word[:-3] + 'z'
+    elif word.endswith('es') and word[-3] not in 'aeiou':
+        word = word[:-2]
+    elif word.endswith('s'):
+        word = word[:-1]
+    if len(word) > 4 and word[-1] in 'aoe':
+        word = word[:-1]
+    return word
+
+
+def words(text):
+    """Palabras normalizadas de un texto, sin palabras vacías."""
+    return [word for word in _WORD.findall(fold(text)) if word not in STOPWORDS]
+
+
+def _field_text(hotel, field):
+    value = getattr(hotel, field)
+    return ' '.join(value) if isinstance(value, tuple) else value or ''
+
+
+class SearchResult:
+    """Hotel encontrado, con su puntuación BM25."""
+
+    __slots__ = ('id', 'clean_id', 'nombre', 'ubicacion', 'pelicula', 'puntuacion')
+
+    def __init__(self, doc, puntuacion):
+        self.id, self.clean_id, self.nombre, self.ubicacion, self.pelicula = doc
+        self.puntuacion = puntuacion
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'clean_id': self.clean_id,
+            'nombre': self.nombre,
+            'ubicacion': self.ubicacion,
+            'pelicula': self.pelicula,
+            'puntuacion': round(self.puntuacion, 4),
+        }
+
+
+class SearchIndex:
+    """Índice invertido con impactos BM25 precalculados.
+
+    Cada término guarda dos arrays paralelos (documentos e impactos) ordenados
+    por impacto descendente y los mismos dos ordenados por documento, para
+    consultar con una búsqueda binaria el impacto de un documento concreto.
+    Las palabras completas, ordenadas, sirven para completar prefijos con una
+    búsqueda binaria.
+    """
+
+    def __init__(self, hotels):
+        self.docs = []
+        postings = {}
+        lengths = array('f')
+        word_df = Counter()
+        stems = {}
+        for doc_id, hotel in enumerate(hotels):
+            self.docs.append((hotel.id, hotel.clean_id, hotel.nombre, hotel.ubicacion, hotel.pelicula))
+            tf = Counter()
+            length = 0.0
+            seen = set()
+            for field, weight in FIELD_WEIGHTS.items():
+                for word in words(_field_text(hotel, field)):
+                    term = stems.get(word)
+                    if term is None:
+                        term = stems[word] = stem(word)
+                    tf[term] += weight
+                    length += weight
+                    seen.add(word)
+            word_df.update(seen)
+            lengths.append(length)
+            for term, freq in tf.items():
+                postings.setdefault(term, []).append((doc_id, freq))
+
+        n = len(self.docs)
+        avgdl = (sum(lengths) / n) if n else 0.0
+        self.terms = {}
+        for term, entries in postings.items():
+            idf = math.log(1 + (n - len(entries) + 0.5) / (len(entries) + 0.5))
+            # En orden de documento (así se añadieron) para el acceso directo
+            by_doc = array('f', (idf * freq * (BM25_K1 + 1)
+                                 / (freq + BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / avgdl))
+                                 for doc_id, freq in entries))
+            doc_order = array('I', (doc_id for doc_id, _ in entries))
+            # De mayor a menor impacto y, a igualdad, por documento
+            order = sorted(range(len(entries)), key=lambda j: (-by_doc[j], doc_order[j]))
+            self.terms[term] = (array('I', (doc_order[j] for j in order)),
+                                array('f', (by_doc[j] for j in order)),
+                                doc_order, by_doc)
+
+        # Palabras para completar: ordenadas y con su frecuencia en documentos
+        self.words = sorted(word_df)
+        self.word_df = array('I', (word_df[word] for word in self.words))
+        self._short = {}
+        for i, word in enumerate(self.words):
+            for size in range(1, min(SHORT_PREFIX, len(word)) + 1):
+                self._short.setdefault(word[:size], []).append(i)
+        for prefix, indexes in self._short.items():
+            self._short[prefix] = heapq.nlargest(MAX_EXPANSIONES, indexes,
+                                                 key=lambda i: (self.word_df[i], -i))
+
+    def __len__(self):
+        return len(self.docs)
+
+    def complete(self, prefix, limit=MAX_SUGERENCIAS):
+        """Palabras del catálogo que empiezan por `prefix`, las más frecuentes primero."""
+        prefix = fold(prefix).strip()
+        if not prefix:
+            return []
+        if len(prefix) <= SHORT_PREFIX:
+            indexes = self._short.get(prefix, [])[:limit]
+        else:
+            start = bisect_left(self.words, prefix)
+            end = bisect_left(self.words, prefix + '\uffff', start)
+            indexes = heapq.nlargest(limit, range(start, end), key=lambda i: (self.word_df[i], -i))
+        return [self.words[i] for i in indexes]
+
+    def _query_terms(self, query):
+        """Términos de la consulta; la última palabra se amplía como prefijo."""
+        tokens = words(query)
+        if not tokens:
+            return [], []
+        terms = {stem(word) for word in tokens}
+        sugerencias = []
+        if not query[-1:].isspace():
+            sugerencias = self.complete(tokens[-1], MAX_EXPANSIONES)
+            terms.update(stem(word) for word in sugerencias)
+            sugerencias = sugerencias[:MAX_SUGERENCIAS]
+        return sorted(term for term in terms if term in self.terms), sugerencias
+
+    def search(self, query, k=SEARCH_DEFAULT):
+        """(k mejores SearchResult, sugerencias de completado) para una consulta."""
+        terms, sugerencias = self._query_terms(query)
+        lists = [self.terms[term] for term in terms]
+        if len(lists) == 1:
+            # Un solo término: su lista ya está ordenada por puntuación
+            doc_ids, impacts, _, _ = lists[0]
+            top = list(zip(impacts[:k], doc_ids[:k]))
+        else:
+            top = self._top_k(lists, k)
+        return [SearchResult(self.docs[doc_id], score) for score, doc_id in top], sugerencias
+
+    @staticmethod
+    def _top_k(lists, k):
+        """k mejores (puntuación, documento) recorriendo varias listas por impacto.
+
+        La primera vez que aparece un documento se busca su impacto en las
+        demás listas, así que su puntuación es ya la definitiva. Ningún
+        documento sin ver puede sumar más que las cabezas pendientes de todas
+        las listas, de modo que al quedar el k-ésimo mejor por encima de esa
+        cota el resultado es exacto.
+        """
+        def score(doc_id):
+            total = 0.0
+            for _, _, by_doc, doc_impacts in lists:
+                j = bisect_left(by_doc, doc_id)
+                if j < len(by_doc) and by_doc[j] == doc_id:
+                    total += doc_impacts[j]
+            return total
+
+        seen = set()
+        top = []  # montículo de los k mejores: (puntuación, -documento)
+        # Cola de bloques: (-impacto en cabeza, lista, posición)
+        queue = [(-lst[1][0], i, 0) for i, lst in enumerate(lists)]
+        heapq.heapify(queue)
+        pending = -sum(head for head, _, _ in queue)
+        while queue and len(seen) < POSTINGS_BUDGET:
+            head, i, start = heapq.heappop(queue)
+            doc_ids, impacts, _, _ = lists[i]
+            end = start + POSTINGS_BLOCK
+            # Un documento nuevo no está en lo ya recorrido de las demás listas:
+            # en cada una puede sumar como mucho su cabeza pendiente
+            others = pending + head
+            for doc_id, impact in zip(doc_ids[start:end], impacts[start:end]):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                if len(top) >= k and impact + others < top[0][0]:
+                    continue
+                item = (score(doc_id), -doc_id)
+                if len(top) < k:
+                    heapq.heappush(top, item)
+                elif item > top[0]:
+                    heapq.heapreplace(top, item)
+            pending += head
+            if end < len(impacts):
+                heapq.heappush(queue, (-impacts[end], i, end))
+                pending += impacts[end]
+            # Ningún documento sin ver puede ya entrar entre los k primeros
+            if len(top) >= k and top[0][0] > pending:
+                break
+        return [(score, -neg_id) for score, neg_id in sorted(top, reverse=True)]
+
+
+def parse_search_request(q, k=None):
+    """Valida q y k; devuelve (consulta, k)."""
+    if not q or not q.strip():
+        raise SearchRequestError("Parámetro q obligatorio")
+    if len(q) > MAX_QUERY_LENGTH:
+        raise SearchRequestError(f"La consulta no puede superar {MAX_QUERY_LENGTH} caracteres")
+    try:
+        k = SEARCH_DEFAULT if k in (None, '') else int(k)
+    except ValueError:
+        raise SearchRequestError(f"k no válido: {k}") from None
+    if not 1 <= k <= SEARCH_MAX:
+        raise SearchRequestError(f"k debe estar entre 1 y {SEARCH_MAX}")
+    return q, k
+
+
+def search_response(index, q, k):
+    """Cuerpo JSON de /api/search."""
+    resultados, sugerencias = index.search(q, k)
+    return {
+        'q': q,
+        'resultados': [resultado.to_dict() for resultado in resultados],
+        'sugerencias': sugerencias,
+    }
+
+
+def _arg(name, default):
+    """Valor entero de una opción --nombre N."""
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+class _SyntheticHotel:
+    """Copia de un hotel con otro id, para medir el índice a gran escala."""
+
+    def __init__(self, hotel, n):
+        for field in ('nombre', 'ubicacion', 'pelicula', 'descripcion',
+                      'caracteristicas', 'servicios_adicionales'):
+            setattr(self, field, getattr(hotel, field))
+        self.id = self.clean_id = f"{hotel.id}-{n}"
+        self.nombre = f"{hotel.nombre} {n}"
+
+
+def bench(catalogo, total):
+    """Construye el índice con `total` hoteles (copias del catálogo) y mide consultas."""
+    base = list(catalogo)
+    hotels = [_SyntheticHotel(base[i % len(base)], i) for i in range(total)]
+    start = time.perf_counter()
+    index = SearchIndex(hotels)
+    print(f"🏗️ Índice de {len(index)} hoteles y {len(index.terms)} términos "
+          f"en {time.perf_counter() - start:.1f} s")
+    for query in ('piscina', 'spa con vistas al lago', 'hotel de lujo en paris', 'pisc', 'ritz'):
+        runs = 50
+        start = time.perf_counter()
+        for _ in range(runs):
+            resultados, _ = index.search(query)
+        elapsed = (time.perf_counter() - start) / runs
+        print(f"⏱️ {query!r}: {elapsed * 1000:.3f} ms ({len(resultados)} resultados)")
+
+
+def _exhaustive_top_k(index, query, k):
+    """k mejores (puntuación, documento) sumando las listas completas."""
+    terms, _ = index._query_terms(query)
+    scores = {}
+    for term in terms:
+        _, _, by_doc, doc_impacts = index.terms[term]
+        for doc_id, impact in zip(by_doc, doc_impacts):
+            scores[doc_id] = scores.get(doc_id, 0.0) + impact
+    return sorted(((score, doc_id) for doc_id, score in scores.items()),
+                  key=lambda item: (-item[0], item[1]))[:k]
+
+
+def check_index(catalogo, catalogos):
+    """Compara las búsquedas con la suma exhaustiva de BM25 en catálogos aleatorios."""
+    rng = random.Random(0)
+    base = list(catalogo)
+    errores = consultas = 0
+    for n in range(catalogos):
+        size = rng.randint(1, min(POSTINGS_BUDGET, 4 * len(base)))
+        index = SearchIndex([_SyntheticHotel(rng.choice(base), i) for i in range(size)])
+        for _ in range(10):
+            tokens = rng.sample(index.words, min(len(index.words), rng.randint(1, 4)))
+            query = ' '.join(tokens) + rng.choice(('', ' '))
+            k = rng.randint(1, SEARCH_MAX)
+            resultados, _ = index.search(query, k)
+            got = [(resultado.puntuacion, resultado.id) for resultado in resultados]
+            expected = [(score, index.docs[doc_id][0])
+                        for score, doc_id in _exhaustive_top_k(index, query, k)]
+            consultas += 1
+            if len(got) != len(expected) or any(
+                    id_a != id_b or abs(a - b) > 1e-6 for (a, id_a), (b, id_b) in zip(got, expected)):
+                errores += 1
+    print(f"🔎 Consultas: {consultas} en {catalogos} catálogos, "
+          f"discrepancias con la suma exhaustiva: {errores}")
+    return errores == 0
+
+
+def main():
+    from catalog import load_catalog
+
+    catalogo = load_catalog()
+    try:
+        if '--bench' in sys.argv:
+            bench(catalogo, _arg('--hoteles', 200000))
+            return 0
+        if '--check' in sys.argv:
+            return 0 if check_index(catalogo, _arg('--catalogos', 300)) else 1
+        values = {str(_arg('--k', None))}
+        positional = [arg for arg in sys.argv[1:] if not arg.startswith('--') and arg not in values]
+        if not positional:
+            print('Uso: python scripts/search.py "<consulta>" [--k 10]')
+            return 2
+        resultados, sugerencias = catalogo.search_index().search(positional[0],
+                                                                 _arg('--k', SEARCH_DEFAULT))
+        for resultado in resultados:
+            print(f"🔎 {resultado.puntuacion:7.3f}  {resultado.nombre} ({resultado.ubicacion})")
+        if sugerencias:
+            print(f"💡 Sugerencias: {', '.join(sugerencias)}")
+        return 0
+    finally:
+        catalogo.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Service worker y manifiesto de precache del sitio estático.
+
+Tras generar dist/, lista los recursos del shell (índice, CSS y JS) con el
+hash de su contenido en dist/precache-manifest.json y renderiza
+templates/sw.js en dist/sw.js con ese manifiesto incrustado. Cualquier cambio
+en el shell cambia la versión del service worker, que vuelve a precachear y
+borra el precache anterior; páginas de hotel e imágenes se cachean en tiempo
+de ejecución (stale-while-revalidate con número máximo de entradas).
+"""
+import hashlib
+import json
+from pathlib import Path
+from urllib.parse import urlparse
+
+from store import atomic_write_json, atomic_write_template
+
+DIST_DIR = Path('dist')
+MANIFEST_NAME = 'precache-manifest.json'
+SW_NAME = 'sw.js'
+
+# Recursos del shell (relativos a dist/)
+SHELL_PATTERNS = ('index.html', 'static/css/*.css', 'static/js/*.js')
+
+# Límites de las cachés de tiempo de ejecución
+MAX_PAGES = 50
+MAX_IMAGES = 120
+
+
+def base_path(base_url):
+    """Ruta del sitio dentro del dominio ('' o p. ej. '/hoteles-booking-web-pages')."""
+    return urlparse(base_url).path.rstrip('/') if base_url else ''
+
+
+def file_revision(path):
+    """Hash corto del contenido de un archivo."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def build_precache_manifest(dist_dir=DIST_DIR, base_url=''):
+    """Lista [{url, revision}] de los recursos del shell presentes en dist/."""
+    dist_dir = Path(dist_dir)
+    prefix = base_path(base_url)
+    manifest = []
+    for pattern in SHELL_PATTERNS:
+        for path in sorted(dist_dir.glob(pattern)):
+            relative = path.relative_to(dist_dir).as_posix()
+            # El índice se sirve en la raíz del sitio
+            url = f"{prefix}/" if relative == 'index.html' else f"{prefix}/{relative}"
+            manifest.append({'url': url, 'revision': file_revision(path)})
+    return manifest
+
+
+def manifest_version(manifest):
+    """Versión del precache: hash de todas las revisiones del manifiesto."""
+    payload = json.dumps(manifest, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:12]
+
+
+def write_service_worker(env, dist_dir=DIST_DIR, base_url=''):
+    """Escribe dist/precache-manifest.json y dist/sw.js; devuelve la versión."""
+    dist_dir = Path(dist_dir)
+    manifest = build_precache_manifest(dist_dir, base_url)
+    version = manifest_version(manifest)
+    atomic_write_json(dist_dir / MANIFEST_NAME, {'version': version, 'entries': manifest})
+    atomic_write_template(
+        dist_dir / SW_NAME, env.get_template(SW_NAME),
+        version=version,
+        base_path=base_path(base_url),
+        manifest=manifest,
+        max_pages=MAX_PAGES,
+        max_images=MAX_IMAGES,
+    )
+    print(f"✅ Service worker generado: {dist_dir / SW_NAME} "
+          f"(precache {version}, {len(manifest)} recursos)")
+    return version
+
+
+def remove_service_worker(dist_dir=DIST_DIR):
+    """Borra dist/sw.js y el manifiesto (builds sin service worker, como --watch)."""
+    for name in (SW_NAME, MANIFEST_NAME):
+        try:
+            (Path(dist_dir) / name).unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Hoteles similares calculados con NumPy al generar el sitio.
+
+Cada hotel se representa con un vector TF-IDF sobre el texto de su
+descripción, características y servicios (mismas palabras normalizadas y
+lematizadas que la búsqueda, search.py) y un bloque numérico con precio (en
+escala logarítmica), valoración y año, estandarizados. Los dos bloques se
+normalizan por separado y se ponderan, así que el producto escalar de dos
+filas es directamente su similitud coseno combinada.
+
+El vocabulario se limita a los MAX_FEATURES términos presentes en más de un
+hotel (los que aparecen en uno solo no aportan similitud con ningún otro), y
+los vecinos se calculan por lotes de filas: un producto de matrices lote x
+catálogo en float32 y una selección de los k mejores de cada fila con
+operaciones de NumPy, sin bucles de Python por pareja de hoteles.
+
+Lo usan generate.py (sección "Hoteles Similares" de cada página; si NumPy no
+está instalado la sección se omite), watch.py y la ruta
+/api/hoteles/<id>/similares de app.py y asgi.py.
+
+Uso: python scripts/similar.py [hotel_id]
+     python scripts/similar.py --bench [--hoteles 100000]
+"""
+import math
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from search import stem, words
+
+# Campos de texto del vector TF-IDF y tamaño máximo del vocabulario
+TEXT_FIELDS = ('descripcion', 'caracteristicas', 'servicios_adicionales')
+MAX_FEATURES = 128
+
+# Peso de cada bloque en la similitud (texto frente a precio, valoración y año)
+TEXT_WEIGHT = 0.8
+NUMERIC_WEIGHT = 0.2
+
+# Vecinos por hotel, similitud mínima para mostrarlos, filas por lote y
+# columnas por grupo al elegir los mejores de cada fila
+SIMILAR_COUNT = 4
+MIN_SIMILARITY = 0.05
+BATCH_SIZE = 256
+GROUP_SIZE = 32
+
+# Campos de los que dependen las listas (watch.py regenera todas si cambian)
+SIMILARITY_FIELDS = ('id', 'clean_id', 'nombre', 'ubicacion', 'pelicula',
+                     'precio', 'rating', 'anio') + TEXT_FIELDS
+
+
+class SimilarHotel:
+    """Hotel recomendado, con su similitud (0-1) con el hotel de origen."""
+
+    __slots__ = ('id', 'clean_id', 'nombre', 'ubicacion', 'pelicula', 'similitud')
+
+    def __init__(self, doc, similitud):
+        self.id, self.clean_id, self.nombre, self.ubicacion, self.pelicula = doc
+        self.similitud = similitud
+
+    @property
+    def porcentaje(self):
+        return f"{self.similitud * 100:.0f}%"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'clean_id': self.clean_id,
+            'nombre': self.nombre,
+            'ubicacion': self.ubicacion,
+            'pelicula': self.pelicula,
+            'similitud': round(self.similitud, 4),
+        }
+
+
+class SimilarHotels:
+    """Resultado de SimilarityBuilder.result(): vecinos de cada hotel."""
+
+    def __init__(self, docs, neighbours, scores):
+        self.docs = docs
+        self._row = {doc[0]: i for i, doc in enumerate(docs)}
+        self._neighbours = neighbours
+        self._scores = scores
+
+    def __len__(self):
+        return len(self.docs)
+
+    def get(self, hotel_id):
+        """Hoteles similares a `hotel_id` (lista vacía si no está o no tiene)."""
+        row = self._row.get(hotel_id)
+        if row is None:
+            return []
+        return [SimilarHotel(self.docs[j], float(score))
+                for j, score in zip(self._neighbours[row], self._scores[row])
+                if j >= 0 and score >= MIN_SIMILARITY]
+
+
+def _field_text(hotel, field):
+    value = getattr(hotel, field)
+    return ' '.join(value) if isinstance(value, tuple) else value or ''
+
+
+class SimilarityBuilder:
+    """Acumula los hoteles uno a uno (sirve para el modo streaming).
+
+    Solo guarda los términos de cada hotel en formato disperso (fila, término,
+    frecuencia) y sus tres valores numéricos, nunca los hoteles completos.
+    """
+
+    def __init__(self):
+        self.docs = []
+        self.vocabulary = {}
+        self._rows = array('I')
+        self._cols = array('I')
+        self._counts = array('f')
+        self._numeric = array('d')
+        self._stems = {}
+
+    def add(self, hotel):
+        row = len(self.docs)
+        self.docs.append((hotel.id, hotel.clean_id, hotel.nombre, hotel.ubicacion, hotel.pelicula))
+        counts = {}
+        for field in TEXT_FIELDS:
+            for word in words(_field_text(hotel, field)):
+                term = self._stems.get(word)
+                if term is None:
+                    term = self._stems[word] = stem(word)
+                col = self.vocabulary.setdefault(term, len(self.vocabulary))
+                counts[col] = counts.get(col, 0) + 1
+        self._rows.extend([row] * len(counts))
+        self._cols.extend(counts.keys())
+        self._counts.extend(counts.values())
+        precio = np.log1p(hotel.precio) if hotel.precio is not None else np.nan
+        self._numeric.extend((precio,
+                              np.nan if hotel.rating is None else hotel.rating,
+                              np.nan if hotel.anio is None else hotel.anio))
+
+    def features(self):
+        """Matriz (hoteles x características) float32 con filas de norma 1."""
+        n = len(self.docs)
+        rows = np.frombuffer(self._rows, dtype=np.uint32)
+        cols = np.frombuffer(self._cols, dtype=np.uint32)
+        counts = np.frombuffer(self._counts, dtype=np.float32)
+
+        # Vocabulario: términos de más de un hotel, los más frecuentes primero
+        df = np.bincount(cols, minlength=len(self.vocabulary))
+        candidates = np.flatnonzero(df > 1)
+        selected = candidates[np.argsort(-df[candidates], kind='stable')[:MAX_FEATURES]]
+        column = np.full(len(self.vocabulary), -1, dtype=np.int64)
+        column[selected] = np.arange(len(selected))
+
+        text = np.zeros((n, max(len(selected), 1)), dtype=np.float32)
+        keep = column[cols] >= 0
+        idf = np.log((1 + n) / (1 + df[selected])).astype(np.float32) + 1
+        # TF sublineal (1 + log tf) por IDF
+        text[rows[keep], column[cols[keep]]] = (1 + np.log(counts[keep])) * idf[column[cols[keep]]]
+        _normalize_rows(text)
+
+        numeric = np.frombuffer(self._numeric, dtype=np.float64).reshape(n, 3)
+        # Columnas sin ningún valor (p. ej. ningún hotel con precio): media 0 y
+        # desviación 1, sin pasar por nanmean/nanstd, que avisan de la porción vacía
+        present = ~np.isnan(numeric)
+        counts = present.sum(axis=0)
+        filled = np.where(present, numeric, 0)
+        mean = np.divide(filled.sum(axis=0), counts, out=np.zeros(3), where=counts > 0)
+        deviation = np.where(present, numeric - mean, 0)
+        std = np.sqrt(np.divide((deviation ** 2).sum(axis=0), counts, out=np.ones(3), where=counts > 0))
+        std = np.where(std == 0, 1, std)
+        # Los valores que faltan quedan en la media (0 tras estandarizar)
+        numeric = np.nan_to_num((numeric - mean) / std).astype(np.float32)
+        _normalize_rows(numeric)
+
+        return np.hstack((text * math.sqrt(TEXT_WEIGHT), numeric * math.sqrt(NUMERIC_WEIGHT)))
+
+    def result(self, k=SIMILAR_COUNT, batch_size=BATCH_SIZE):
+        """Los k vecinos de cada hotel por similitud coseno, calculados por lotes.
+
+        Por cada lote de filas se calcula su similitud con todo el catálogo y,
+        para no ordenar filas enteras, las columnas se reparten en GROUP_SIZE
+        grupos intercalados: los k mejores de la fila están siempre en los k
+        grupos de mayor máximo, así que basta con elegir entre k * GROUP_SIZE
+        candidatos.
+        """
+        n = len(self.docs)
+        k_eff = min(k, max(n - 1, 0))
+        neighbours = np.full((n, k), -1, dtype=np.int64)
+        scores = np.zeros((n, k), dtype=np.float32)
+        if not k_eff:
+            return SimilarHotels(self.docs, neighbours.tolist(), scores.tolist())
+
+        matrix = self.features()
+        groups = GROUP_SIZE if n >= GROUP_SIZE * k_eff * 4 else 1
+        width = -(-n // groups)  # columnas por grupo
+        padded = np.zeros((width * groups, matrix.shape[1]), dtype=np.float32)
+        padded[:n] = matrix
+        offsets = np.arange(groups) * width
+        for start in range(0, n, batch_size):
+            end = min(start + batch_size, n)
+            similarity = matrix[start:end] @ padded.T
+            similarity[:, n:] = -np.inf
+            # El propio hotel nunca es su vecino
+            similarity[np.arange(end - start), np.arange(start, end)] = -np.inf
+            best = similarity.reshape(end - start, groups, width).max(axis=1)
+            top_groups = np.argpartition(best, width - k_eff, axis=1)[:, width - k_eff:]
+            candidates = (top_groups[:, :, None] + offsets).reshape(end - start, -1)
+            values = np.take_along_axis(similarity, candidates, axis=1)
+            # Orden por similitud descendente y, a igualdad, por posición en el catálogo
+            order = np.lexsort((candidates, -values), axis=1)[:, :k_eff]
+            neighbours[start:end, :k_eff] = np.take_along_axis(candidates, order, axis=1)
+            scores[start:end, :k_eff] = np.take_along_axis(values, order, axis=1)
+        return SimilarHotels(self.docs, neighbours.tolist(), scores.tolist())
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+
+def similar_hotels(hotels, k=SIMILAR_COUNT):
+    """SimilarHotels de un iterable de hoteles (Hotel del modelo)."""
+    builder = SimilarityBuilder()
+    for hotel in hotels:
+        builder.add(hotel)
+    return builder.result(k)
+
+
+def _arg(name, default):
+    """Valor entero de una opción --nombre N."""
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+def bench(catalogo, total):
+    """Calcula los vecinos de `total` hoteles (copias del catálogo con otros números)."""
+    from search import _SyntheticHotel
+
+    base = list(catalogo)
+    rng = np.random.default_rng(0)
+    builder = SimilarityBuilder()
+    start = time.perf_counter()
+    for i in range(total):
+        hotel = _SyntheticHotel(base[i % len(base)], i)
+        precio = base[i % len(base)].precio
+        hotel.precio = None if precio is None else float(precio * rng.uniform(0.7, 1.3))
+        hotel.rating = float(rng.uniform(3, 5))
+        hotel.anio = int(rng.integers(1950, 2025))
+        builder.add(hotel)
+    loaded = time.perf_counter()
+    result = builder.result()
+    done = time.perf_counter()
+    print(f"🏗️ {len(result)} hoteles, {len(builder.vocabulary)} términos: "
+          f"lectura {loaded - start:.1f} s, vecinos {done - loaded:.1f} s")
+
+
+def main():
+    from catalog import load_catalog
+
+    catalogo = load_catalog()
+    try:
+        if '--bench' in sys.argv:
+            bench(catalogo, _arg('--hoteles', 100000))
+            return 0
+        result = catalogo.similar()
+        hotel_ids = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+        for hotel in (catalogo.get(hotel_id) for hotel_id in hotel_ids) if hotel_ids else catalogo:
+            if hotel is None:
+                print(f"❌ Hotel no encontrado: {', '.join(hotel_ids)}")
+                return 1
+            print(f"🏨 {hotel.nombre}")
+            for similar in result.get(hotel.id):
+                print(f"   {similar.porcentaje:>5}  {similar.nombre} ({similar.ubicacion})")
+        return 0
+    finally:
+        catalogo.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Almacén del catálogo particionado por hotel.
+
+Cada hotel vive en su propio archivo data/hotels/<id>.json y un índice pequeño
+(data/hotels/index.json) guarda el orden del catálogo. Todas las escrituras
+son atómicas (archivo temporal + rename), de modo que actualizar un hotel solo
+toca un archivo pequeño y un fallo a mitad de escritura nunca corrompe el
+catálogo. data/hotels.json se mantiene como exportación de compatibilidad.
+
+La migración es explícita (`split`): mientras no exista el almacén, los
+scripts que modifican hoteles fallan en lugar de crearlo por su cuenta. Si
+hotels.json cambia por fuera después del último split/export (p. ej. un git
+pull), el almacén se considera desfasado y los scripts fallan hasta que se
+vuelva a crear o se regenere hotels.json.
+
+Uso:
+    python scripts/store.py split    # crea el almacén a partir de hotels.json
+    python scripts/store.py export   # regenera hotels.json desde el almacén
+    python scripts/store.py list     # muestra los hoteles del índice
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import textwrap
+from pathlib import Path
+
+JSON_PATH = Path('data/hotels.json')
+INDEX_NAME = 'index.json'
+# Sello de hotels.json en el último split/export; los nombres de los hoteles
+# nunca empiezan por punto (shard_filename), así que no puede chocar con ellos
+SOURCE_NAME = '.source.json'
+STORE_VERSION = 1
+
+# Eventos de plantilla agrupados por escritura en atomic_write_template()
+STREAM_BUFFER = 64
+
+
+class StoreError(RuntimeError):
+    """El almacén no existe o está desfasado respecto a hotels.json."""
+
+
+def store_dir_for(json_path=JSON_PATH):
+    """Directorio del almacén asociado a un hotels.json (data/hotels/)."""
+    json_path = Path(json_path)
+    return json_path.parent / json_path.stem
+
+
+def has_store(json_path=JSON_PATH):
+    """Indica si ya existe un almacén particionado para este catálogo."""
+    return (store_dir_for(json_path) / INDEX_NAME).exists()
+
+
+def shard_filename(hotel_id):
+    """Nombre de archivo seguro para el registro de un hotel.
+
+    Los ids con caracteres no seguros llevan además un hash corto del id
+    original, para que "a.b" y "a-b" no compartan archivo.
+    """
+    hotel_id = str(hotel_id)
+    safe = re.sub(r'[^a-zA-Z0-9_-]', '-', hotel_id)
+    if safe != hotel_id:
+        safe += '-' + hashlib.sha1(hotel_id.encode('utf-8')).hexdigest()[:8]
+    return safe + '.json'
+
+
+def _claim_filename(hotel_id, files):
+    """Nombre de archivo de un hotel nuevo; `files` es {archivo: id} del almacén."""
+    filename = shard_filename(hotel_id)
+    owner = files.setdefault(filename, hotel_id)
+    if owner != hotel_id:
+        raise ValueError(f"Los hoteles {owner!r} y {hotel_id!r} comparten archivo {filename}")
+    return filename
+
+
+def _fsync_dir(directory):
+    """Persiste la entrada de directorio tras un rename (no disponible en Windows)."""
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def atomic_write_text(path, write, durable=True):
+    """Escribe un archivo de forma atómica: temporal en el mismo directorio + rename.
+
+    `write` recibe el archivo temporal abierto en modo texto. Con durable=False
+    no se hace fsync: un fallo del proceso sigue sin dejar archivos a medias,
+    pero un corte de luz puede perder la última escritura (válido para salidas
+    que se regeneran, como dist/).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # mkstemp crea el temporal con 0600: conservar los permisos del destino
+    mode = path.stat().st_mode & 0o777 if path.exists() else 0o644
+    fd, tmp_name = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            write(f)
+            f.flush()
+            if durable:
+                os.fsync(f.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    if durable:
+        _fsync_dir(path.parent)
+
+
+def atomic_write_json(path, data):
+    """Guarda un objeto JSON de forma atómica con el formato del repositorio."""
+    atomic_write_text(path, lambda f: json.dump(data, f, indent=2, ensure_ascii=False))
+
+
+def atomic_write_template(path, template, durable=False, **context):
+    """Renderiza una plantilla Jinja directamente a disco de forma atómica.
+
+    Usa template.stream(): los trozos se escriben según se generan, sin
+    construir la página entera en memoria, y el destino solo se reemplaza si
+    el render termina sin errores.
+    """
+    stream = template.stream(**context)
+    stream.enable_buffering(STREAM_BUFFER)
+    atomic_write_text(path, stream.dump, durable=durable)
+    return Path(path)
+
+
+def read_index(json_path=JSON_PATH):
+    """Lee el índice del almacén ({'version', 'hotels': [{'id', 'file'}]})."""
+    with open(store_dir_for(json_path) / INDEX_NAME, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_index(entries, json_path=JSON_PATH):
+    atomic_write_json(store_dir_for(json_path) / INDEX_NAME,
+                      {'version': STORE_VERSION, 'hotels': entries})
+
+
+def split_catalog(json_path=JSON_PATH):
+    """Crea el almacén particionado a partir de hotels.json (en streaming)."""
+    from catalog import iter_hotels_json
+
+    store_dir = store_dir_for(json_path)
+    entries = []
+    files = {}
+    for hotel in iter_hotels_json(json_path):
+        filename = _claim_filename(hotel['id'], files)
+        atomic_write_json(store_dir / filename, hotel)
+        entries.append({'id': hotel['id'], 'file': filename})
+    # El índice se escribe al final: si algo falla antes, el almacén no existe
+    _write_index(entries, json_path)
+    _write_source_stamp(json_path)
+    return len(entries)
+
+
+def _file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_source_stamp(json_path=JSON_PATH):
+    """Anota el hotels.json con el que el almacén está sincronizado."""
+    st = os.stat(json_path)
+    atomic_write_json(store_dir_for(json_path) / SOURCE_NAME,
+                      {'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+                       'sha1': _file_sha1(json_path)})
+
+
+# Sellos ya comprobados en este proceso: is_stale() llama a check_store() en
+# cada petición y no debe releer el sello ni volver a hashear hotels.json
+_checked_stamps = set()
+
+
+def check_store(json_path=JSON_PATH):
+    """Lanza StoreError si hotels.json cambió después del último split/export.
+
+    Un mtime distinto con el mismo contenido (git checkout, copias) no cuenta.
+    Los almacenes creados antes del sello no se comprueban hasta el siguiente
+    split o export.
+    """
+    json_path = Path(json_path)
+    stamp_path = store_dir_for(json_path) / SOURCE_NAME
+    try:
+        st = os.stat(json_path)
+        stamp_mtime = os.stat(stamp_path).st_mtime_ns
+    except FileNotFoundError:
+        return
+    key = (str(stamp_path), stamp_mtime, st.st_mtime_ns, st.st_size)
+    if key in _checked_stamps:
+        return
+    with open(stamp_path, 'r', encoding='utf-8') as f:
+        stamp = json.load(f)
+    if (stamp['mtime_ns'], stamp['size']) != (st.st_mtime_ns, st.st_size):
+        if stamp['size'] != st.st_size or stamp['sha1'] != _file_sha1(json_path):
+            raise StoreError(
+                f"{json_path} ha cambiado después de crear {store_dir_for(json_path)}: "
+                f"'python scripts/store.py split' lo vuelve a crear desde {json_path.name} "
+                f"(descarta los cambios del almacén) y 'python scripts/store.py export' "
+                f"sobrescribe {json_path.name} con el almacén")
+    _checked_stamps.add(key)
+
+
+def open_store(json_path=JSON_PATH):
+    """Devuelve el directorio del almacén; StoreError si no existe o está desfasado."""
+    if not has_store(json_path):
+        raise StoreError(f"No existe el almacén {store_dir_for(json_path)}: "
+                         f"créalo con 'python scripts/store.py split'")
+    check_store(json_path)
+    return store_dir_for(json_path)
+
+
+def iter_hotels(json_path=JSON_PATH):
+    """Recorre los hoteles del almacén en el orden del índice."""
+    store_dir = store_dir_for(json_path)
+    for entry in read_index(json_path)['hotels']:
+        with open(store_dir / entry['file'], 'r', encoding='utf-8') as f:
+            yield json.load(f)
+
+
+def load_hotels(json_path=JSON_PATH):
+    """Carga todos los hoteles del almacén para modificarlos (StoreError si no existe)."""
+    open_store(json_path)
+    return list(iter_hotels(json_path))
+
+
+def _read_shard(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_hotel(hotel_id, json_path=JSON_PATH):
+    """Carga un único hotel por id; None si no existe."""
+    hotel = _read_shard(store_dir_for(json_path) / shard_filename(hotel_id))
+    if hotel is not None and hotel.get('id') == hotel_id:
+        return hotel
+    # Archivo con otro nombre (almacenes creados antes del sufijo con hash)
+    for entry in read_index(json_path)['hotels']:
+        if entry['id'] == hotel_id:
+            return _read_shard(store_dir_for(json_path) / entry['file'])
+    return None
+
+
+class _IndexState:
+    """Índice del almacén cargado una vez para una serie de escrituras."""
+
+    def __init__(self, json_path):
+        self.json_path = json_path
+        self.entries = read_index(json_path)['hotels']
+        self.by_id = {entry['id']: entry['file'] for entry in self.entries}
+        self.files = {entry['file']: entry['id'] for entry in self.entries}
+        self.added = False
+
+    def save(self, hotel):
+        """Escribe el hotel si cambió; devuelve True si se reescribió."""
+        store_dir = store_dir_for(self.json_path)
+        filename = self.by_id.get(hotel['id'])
+        if filename is not None and _read_shard(store_dir / filename) == hotel:
+            return False
+        if filename is None:
+            filename = _claim_filename(hotel['id'], self.files)
+        atomic_write_json(store_dir / filename, hotel)
+        if hotel['id'] not in self.by_id:
+            self.by_id[hotel['id']] = filename
+            self.entries.append({'id': hotel['id'], 'file': filename})
+            self.added = True
+        return True
+
+    def flush(self):
+        if self.added:
+            _write_index(self.entries, self.json_path)
+            self.added = False
+
+
+def save_hotel(hotel, json_path=JSON_PATH):
+    """Guarda un hotel en su archivo; solo escribe si el contenido cambió.
+
+    Devuelve True si el archivo se reescribió. El índice solo se toca cuando
+    el hotel es nuevo.
+    """
+    return bool(save_hotels([hotel], json_path))
+
+
+def save_hotels(hotels, json_path=JSON_PATH):
+    """Guarda varios hoteles; devuelve cuántos archivos se reescribieron.
+
+    El índice se lee una sola vez y, si hay hoteles nuevos, se escribe una
+    sola vez al final (también si una escritura falla a mitad).
+    """
+    open_store(json_path)
+    state = _IndexState(json_path)
+    try:
+        return sum(state.save(hotel) for hotel in hotels)
+    finally:
+        state.flush()
+
+
+def store_fingerprint(json_path=JSON_PATH):
+    """Huella del almacén para detectar cambios sin leer los archivos.
+
+    Un rename atómico actualiza el mtime del directorio, pero una edición en
+    sitio de data/hotels/<id>.json solo cambia el del propio archivo, así que
+    se recorre el directorio una vez (os.scandir, sin abrir nada) y se toma el
+    mtime más reciente. El segundo valor combina el número de archivos (bits
+    altos) con el tamaño total, de modo que altas y bajas también cuentan
+    aunque coincidan los mtimes.
+    """
+    store_dir = store_dir_for(json_path)
+    newest = os.stat(store_dir).st_mtime_ns
+    count = 0
+    total = 0
+    with os.scandir(store_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.json') or not entry.is_file():
+                continue
+            st = entry.stat()
+            newest = max(newest, st.st_mtime_ns)
+            count += 1
+            total += st.st_size
+    return newest, (count << 40) | (total & ((1 << 40) - 1))
+
+
+def export_catalog(json_path=JSON_PATH):
+    """Regenera hotels.json desde el almacén (compatibilidad), de forma atómica."""
+    count = 0
+
+    def write(f):
+        nonlocal count
+        # Mismo formato que json.dump(hoteles, indent=2), hotel a hotel
+        f.write('[')
+        for hotel in iter_hotels(json_path):
+            f.write(',\n' if count else '\n')
+            f.write(textwrap.indent(json.dumps(hotel, indent=2, ensure_ascii=False), '  '))
+            count += 1
+        f.write('\n]' if count else ']')
+
+    atomic_write_text(json_path, write)
+    _write_source_stamp(json_path)
+    return count
+
+
+def main():
+    """Punto de entrada de la línea de comandos."""
+    command = sys.argv[1] if len(sys.argv) > 1 else 'list'
+    if command == 'split':
+        count = split_catalog()
+        print(f"✅ Almacén creado en {store_dir_for()}: {count} hoteles")
+    elif command == 'export':
+        count = export_catalog()
+        print(f"✅ Exportado {JSON_PATH}: {count} hoteles")
+    elif command == 'list':
+        if not has_store():
+            print(f"ℹ️ No existe almacén en {store_dir_for()} (usa 'split' para crearlo)")
+            return
+        for entry in read_index()['hotels']:
+            print(f"  🏨 {entry['id']} -> {entry['file']}")
+    else:
+        print(f"❌ Comando desconocido: {command} (split | export | list)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
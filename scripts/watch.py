@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Modo desarrollo: vigila data/, templates/ y static/, regenera solo las páginas
+afectadas por cada cambio y sirve dist/ con recarga automática del navegador.
+
+Los cambios se detectan con inotify (Linux, vía ctypes) y, si no está
+disponible, con un sondeo de mtimes. Cada lote de cambios se traduce en el
+conjunto mínimo de salidas a regenerar:
+
+- un hotel modificado en el catálogo -> su página, el índice y el sitemap
+  (y todas las páginas de hotel si cambian los campos de los que dependen las
+  listas de cercanos o de similares)
+- una plantilla -> las páginas que la usan directa o indirectamente
+  (extends/include/import)
+- un archivo de static/ -> solo ese archivo (y el cierre de recursos si es CSS/JS)
+
+Uso: python scripts/generate.py --watch [--port 8000]
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import shutil
+import struct
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, meta
+
+from assets import collect_reachable_assets, hotel_asset_paths
+from catalog import SNAPSHOT_PATH, load_catalog
+from fragments import FRAGMENT_TEMPLATES, install_fragment_cache
+from geo import POINT_FIELDS
+
+try:
+    from similar import SIMILARITY_FIELDS
+except ImportError:  # Sin NumPy las páginas no tienen hoteles similares
+    SIMILARITY_FIELDS = None
+
+DATA_DIR = Path('data')
+TEMPLATES_DIR = Path('templates')
+STATIC_DIR = Path('static')
+DIST_DIR = Path('dist')
+WATCH_ROOTS = (DATA_DIR, TEMPLATES_DIR, STATIC_DIR)
+
+# Tiempo de agrupación de eventos: un guardado suele generar varios
+DEBOUNCE_SECONDS = 0.02
+POLL_INTERVAL = 0.25
+
+# Plantillas de página y lo que generan
+PAGE_TEMPLATES = {
+    'index.html': 'index',
+    'hotel.html': 'hotels',
+    'sitemap.xml': 'seo',
+    'robots.txt': 'seo',
+}
+
+LIVERELOAD_PATH = '/__livereload'
+LIVERELOAD_SNIPPET = (
+    "<script>new EventSource('" + LIVERELOAD_PATH + "')"
+    ".onmessage = function () { location.reload(); };</script>"
+)
+
+
+def _is_ignored(path):
+    """Archivos temporales de editores, de escrituras atómicas y el snapshot."""
+    name = os.path.basename(path)
+    if name.startswith('.') or name.endswith(('~', '.tmp', '.swp', '.swx')):
+        return True
+    return Path(path) == SNAPSHOT_PATH
+
+
+class InotifyWatcher:
+    """Vigilancia recursiva con inotify a través de ctypes (sin dependencias)."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, roots=WATCH_ROOTS):
+        libc_name = ctypes.util.find_library('c')
+        if not sys.platform.startswith('linux') or not libc_name:
+            raise OSError(errno.ENOSYS, 'inotify no disponible')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+        self._dirs = {}
+        for root in roots:
+            if Path(root).is_dir():
+                self._add_tree(str(root))
+
+    def _add_tree(self, top):
+        for directory, subdirs, _ in os.walk(top):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f'inotify_add_watch {directory}')
+            self._dirs[wd] = directory
+            subdirs[:] = [d for d in subdirs if not d.startswith('.')]
+
+    def _read_events(self):
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+                offset += self.EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+                offset += length
+                directory = self._dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        self._add_tree(path)
+                    continue
+                if not _is_ignored(path):
+                    changed.add(path)
+
+    def wait(self):
+        """Bloquea hasta el siguiente lote de cambios y devuelve sus rutas."""
+        while True:
+            select.select([self._fd], [], [])
+            changed = self._read_events()
+            # Agrupar los eventos que llegan casi a la vez
+            while select.select([self._fd], [], [], DEBOUNCE_SECONDS)[0]:
+                changed |= self._read_events()
+            if changed:
+                return changed
+
+
+class PollingWatcher:
+    """Alternativa portable: compara (mtime, tamaño) de los árboles vigilados."""
+
+    def __init__(self, roots=WATCH_ROOTS):
+        self._roots = [str(root) for root in roots]
+        self._state = self._scan()
+
+    def _scan(self):
+        state = {}
+        pending = [root for root in self._roots if os.path.isdir(root)]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file() and not _is_ignored(entry.path):
+                        st = entry.stat()
+                        state[entry.path] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def wait(self):
+        """Sondea hasta detectar cambios y devuelve sus rutas."""
+        while True:
+            time.sleep(POLL_INTERVAL)
+            state = self._scan()
+            changed = {path for path in state.keys() | self._state.keys()
+                       if state.get(path) != self._state.get(path)}
+            self._state = state
+            if changed:
+                return changed
+
+
+def create_watcher(roots=WATCH_ROOTS):
+    """inotify si está disponible; si no, sondeo."""
+    try:
+        watcher = InotifyWatcher(roots)
+        print("👀 Vigilando cambios con inotify")
+    except (OSError, AttributeError) as e:
+        watcher = PollingWatcher(roots)
+        print(f"👀 Vigilando cambios por sondeo cada {POLL_INTERVAL}s ({e})")
+    return watcher
+
+
+class LiveReload:
+    """Versión del sitio compartida con las conexiones de recarga (SSE)."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.version = 0
+
+    def notify(self):
+        with self._cond:
+            self.version += 1
+            self._cond.notify_all()
+
+    def wait(self, version, timeout=15):
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """Sirve dist/ inyectando el script de recarga en las páginas HTML."""
+
+    livereload = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == LIVERELOAD_PATH:
+            return self._serve_events()
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            path = os.path.join(path, 'index.html')
+        if path.endswith('.html') and os.path.isfile(path) and self.path.endswith(('/', '.html')):
+            return self._serve_html(path)
+        return super().do_GET()
+
+    def end_headers(self):
+        self.send_header('Cache-Control', 'no-store')
+        super().end_headers()
+
+    def _serve_html(self, path):
+        with open(path, 'rb') as f:
+            body = f.read()
+        snippet = LIVERELOAD_SNIPPET.encode()
+        if b'</body>' in body:
+            body = body.replace(b'</body>', snippet + b'</body>', 1)
+        else:
+            body += snippet
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        version = self.livereload.version
+        try:
+            while True:
+                new_version = self.livereload.wait(version)
+                # Comentario SSE como latido para detectar conexiones cerradas
+                self.wfile.write(b'data: reload\n\n' if new_version != version else b': ping\n\n')
+                self.wfile.flush()
+                version = new_version
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def start_server(livereload, port=8000, directory=DIST_DIR):
+    """Arranca el servidor de dist/ en un hilo en segundo plano."""
+    handler = partial(type('Handler', (DevRequestHandler,), {'livereload': livereload}),
+                      directory=str(directory))
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🌐 Servidor de desarrollo en http://127.0.0.1:{port}/")
+    return server
+
+
+def template_dependents(env, templates_dir=TEMPLATES_DIR):
+    """Mapa plantilla -> páginas (PAGE_TEMPLATES) que dependen de ella."""
+    references = {}
+    for name in env.list_templates():
+        source = (Path(templates_dir) / name).read_text(encoding='utf-8')
+        references[name] = set(meta.find_referenced_templates(env.parse(source))) - {None}
+        references[name] |= {fragment for call, fragment in FRAGMENT_TEMPLATES.items()
+                             if call + '(' in source}
+
+    def closure(name, seen):
+        if name not in seen:
+            seen.add(name)
+            for child in references.get(name, ()):
+                closure(child, seen)
+        return seen
+
+    dependents = {}
+    for page in PAGE_TEMPLATES:
+        for name in closure(page, set()):
+            dependents.setdefault(name, set()).add(page)
+    return dependents
+
+
+# Campos de los que dependen las listas de cercanos y de similares de los demás hoteles
+NEIGHBOUR_FIELDS = POINT_FIELDS + (SIMILARITY_FIELDS or ())
+
+
+def _record_state(hotel):
+    """Lo que se recuerda de cada hotel entre regeneraciones.
+
+    (id, clean_id, valores de NEIGHBOUR_FIELDS, recursos estáticos que usa)
+    """
+    return (hotel.id, hotel.clean_id, tuple(getattr(hotel, field) for field in NEIGHBOUR_FIELDS),
+            tuple(hotel_asset_paths(hotel)))
+
+
+class IncrementalBuilder:
+    """Estado de la última generación y reconstrucción mínima ante cambios."""
+
+    def __init__(self, base_url=''):
+        self.base_url = base_url
+        self.env = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)))
+        # Tarjetas en memoria entre regeneraciones: solo se renderizan las que cambian
+        self.fragments = install_fragment_cache(self.env)
+        self.dependents = template_dependents(self.env)
+        self.catalog = load_catalog()
+        # Huella de cada registro del snapshot -> _record_state() del hotel
+        self.records = dict(zip(self.catalog.record_digests(), map(_record_state, self.catalog)))
+        self.reachable = self._reachable()
+
+    def _diff_records(self):
+        """Hoteles nuevos o modificados desde el snapshot anterior, decodificando solo esos.
+
+        Devuelve ({id: Hotel} cambiados, {id: estado anterior} de los registros
+        que ya no están igual, incluidos los borrados).
+        """
+        digests = self.catalog.record_digests()
+        current = set(digests)
+        previous = {}
+        for digest in self.records.keys() - current:
+            state = self.records.pop(digest)
+            previous[state[0]] = state
+        changed = {}
+        for i, digest in enumerate(digests):
+            if digest not in self.records:
+                hotel = self.catalog[i]
+                changed[hotel.id] = hotel
+                self.records[digest] = _record_state(hotel)
+        return changed, previous
+
+    def _reachable(self):
+        image_paths = {path for state in self.records.values() for path in state[3]}
+        return collect_reachable_assets(image_paths)
+
+    def rebuild(self, changed):
+        """Regenera las salidas afectadas por `changed`; devuelve cuántas escribió."""
+        from generate import generate_seo_files, write_hotel_page, write_index_page
+
+        pages = set()
+        hotel_ids = set()
+        static_changed = set()
+        for path in changed:
+            path = Path(path)
+            if DATA_DIR in path.parents and path.suffix == '.json':
+                pages.add('catalog')
+            elif TEMPLATES_DIR in path.parents:
+                name = path.relative_to(TEMPLATES_DIR).as_posix()
+                self.dependents = template_dependents(self.env)
+                pages |= {PAGE_TEMPLATES[page] for page in self.dependents.get(name, ())}
+            elif STATIC_DIR in path.parents:
+                static_changed.add(path.relative_to(STATIC_DIR).as_posix())
+
+        if 'catalog' in pages:
+            pages.discard('catalog')
+            if self.catalog.is_stale():
+                old, self.catalog = self.catalog, load_catalog()
+                old.close()
+            changed, previous = self._diff_records()
+            hotel_ids = set(changed)
+            # Páginas de hoteles borrados o cuyo clean_id (su URL) ha cambiado
+            for hotel_id, (_, clean_id, _, _) in previous.items():
+                if hotel_id not in changed or changed[hotel_id].clean_id != clean_id:
+                    shutil.rmtree(DIST_DIR / 'hotel' / clean_id, ignore_errors=True)
+            if changed or previous:
+                pages |= {'index', 'seo'}
+                static_changed.add(None)
+            # Las listas de cercanos y de similares de los demás hoteles
+            # dependen de NEIGHBOUR_FIELDS
+            for hotel_id in hotel_ids | previous.keys():
+                old = previous.get(hotel_id)
+                new = changed.get(hotel_id)
+                if (old and old[2]) != (new and _record_state(new)[2]):
+                    pages.add('hotels')
+                    break
+
+        written = 0
+        if 'hotels' in pages:
+            hotel_ids = {state[0] for state in self.records.values()}
+        if hotel_ids:
+            hotel_template = self.env.get_template('hotel.html')
+            hotel_base_dir = DIST_DIR / 'hotel'
+            hotel_base_dir.mkdir(parents=True, exist_ok=True)
+            geo_index = self.catalog.geo_index()
+            similares = self.catalog.similar() if SIMILARITY_FIELDS else None
+            for i, hotel_id in enumerate(hotel_ids):
+                hotel = self.catalog.get(hotel_id)
+                written += write_hotel_page(hotel_template, hotel, self.base_url, hotel_base_dir, i,
+                                            geo_index.nearby(hotel),
+                                            similares.get(hotel_id) if similares else ())
+        if 'index' in pages:
+            self.fragments.reset_stats()
+            write_index_page(self.env.get_template('index.html'), self.catalog, self.base_url, DIST_DIR,
+                             self.catalog.aggregates())
+            self.fragments.prune()
+            written += 1
+        if 'seo' in pages:
+            generate_seo_files(self.catalog, self.base_url)
+            written += 2
+        if static_changed:
+            written += self._sync_static(static_changed - {None})
+        return written
+
+    def _sync_static(self, changed):
+        """Copia los recursos cambiados y ajusta dist/static al nuevo cierre."""
+        reachable = self._reachable()
+        dest = DIST_DIR / 'static'
+        count = 0
+        for path in (set(changed) & reachable) | (reachable - self.reachable):
+            (dest / path).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(STATIC_DIR / path, dest / path)
+            count += 1
+        for path in (self.reachable - reachable) | (set(changed) - reachable):
+            try:
+                (dest / path).unlink()
+                count += 1
+            except FileNotFoundError:
+                pass
+        self.reachable = reachable
+        return count
+
+
+def watch(port=8000):
+    """Generación completa inicial, servidor con recarga y bucle de vigilancia."""
+    from generate import generate_site
+
+    # Sin service worker: serviría CSS y JS desde su precache en lugar de los editados
+    if not generate_site(service_worker=False):
+        return False
+    builder = IncrementalBuilder(os.environ.get('BASE_URL', ''))
+    livereload = LiveReload()
+    start_server(livereload, port)
+    watcher = create_watcher()
+    print("✏️  Edita data/, templates/ o static/ (Ctrl+C para salir)")
+    try:
+        while True:
+            changed = watcher.wait()
+            start = time.perf_counter()
+            try:
+                written = builder.rebuild(changed)
+            except Exception as e:
+                print(f"❌ Error en la reconstrucción: {e}")
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            livereload.notify()
+            names = ', '.join(sorted(os.path.relpath(path) for path in changed))
+            print(f"🔄 {names}: {written} salidas regeneradas en {elapsed:.0f} ms")
+    except KeyboardInterrupt:
+        print("\n👋 Modo watch detenido")
+    return True
@@ -44,6 +44,96 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
+// Full-text search (only rendered when the API is served)
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.search-form').forEach(form => {
+        const input = form.querySelector('input[name="q"]');
+        const results = form.querySelector('.search-results');
+        const base = form.dataset.searchUrl.replace(/\/api\/search$/, '');
+        let timer = null;
+        let latest = 0;
+
+        const render = data => {
+            results.innerHTML = '';
+            data.resultados.forEach(hotel => {
+                const item = document.createElement('li');
+                const link = document.createElement('a');
+                link.href = `${base}/hotel/${hotel.clean_id}/`;
+                link.textContent = hotel.nombre;
+                const detail = document.createElement('span');
+                detail.textContent = [hotel.ubicacion, hotel.pelicula].filter(Boolean).join(' · ');
+                item.append(link, detail);
+                results.appendChild(item);
+            });
+            if (!data.resultados.length) {
+                const empty = document.createElement('li');
+                empty.textContent = 'Sin resultados';
+                results.appendChild(empty);
+            }
+        };
+
+        input.addEventListener('input', function() {
+            clearTimeout(timer);
+            const query = this.value;
+            if (!query.trim()) {
+                results.innerHTML = '';
+                return;
+            }
+            timer = setTimeout(() => {
+                const request = ++latest;
+                fetch(form.dataset.searchUrl + '?' + new URLSearchParams({ q: query, k: 8 }))
+                    .then(response => response.json())
+                    .then(data => {
+                        // Only the most recent query updates the list
+                        if (request === latest && data.resultados) {
+                            render(data);
+                        }
+                    })
+                    .catch(() => {
+                        results.innerHTML = '';
+                    });
+            }, 150);
+        });
+
+        form.addEventListener('submit', e => e.preventDefault());
+    });
+});
+
+// Availability and price quotes (only rendered when the API is served)
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.quote-form').forEach(form => {
+        const result = form.querySelector('.quote-result');
+        const money = value => '$' + value.toLocaleString('es-ES', { maximumFractionDigits: 2 });
+
+        form.addEventListener('submit', function(e) {
+            e.preventDefault();
+            const params = new URLSearchParams(new FormData(form));
+            result.className = 'quote-result';
+            result.textContent = 'Consultando disponibilidad...';
+
+            fetch(form.dataset.quoteUrl + '?' + params)
+                .then(response => response.json())
+                .then(quote => {
+                    if (quote.error) {
+                        result.classList.add('unavailable');
+                        result.textContent = quote.error;
+                    } else if (quote.disponible) {
+                        result.classList.add('available');
+                        result.textContent = `Disponible: ${quote.noches} noches, ${quote.habitaciones} ` +
+                            `habitación(es) por ${money(quote.total)} (${money(quote.precio_medio_noche)}/noche)`;
+                    } else {
+                        result.classList.add('unavailable');
+                        result.textContent = `Sin disponibilidad para esas fechas ` +
+                            `(${quote.habitaciones_libres} habitación(es) libres)`;
+                    }
+                })
+                .catch(() => {
+                    result.textContent = 'No se pudo consultar la disponibilidad';
+                });
+        });
+    });
+});
+
 // Play button functionality (demo)
 document.querySelectorAll('.play-button').forEach(button => {
     button.addEventListener('click', function() {
@@ -0,0 +1,95 @@
+// Service worker generado por scripts/generate.py - no editar dist/sw.js
+// Versión del precache: {{ version }}
+
+const BASE_PATH = {{ base_path|tojson }};
+const PRECACHE = 'precache-{{ version }}';
+const PAGES_CACHE = 'paginas';
+const IMAGES_CACHE = 'imagenes';
+const MAX_PAGES = {{ max_pages }};
+const MAX_IMAGES = {{ max_images }};
+
+// Recursos del shell con su hash de contenido (precache-manifest.json)
+const PRECACHE_MANIFEST = {{ manifest|tojson }};
+const PRECACHE_URLS = PRECACHE_MANIFEST.map(entry => entry.url);
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(PRECACHE)
+            .then(cache => cache.addAll(PRECACHE_URLS.map(url => new Request(url, { cache: 'reload' }))))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    // Borrar los precaches de versiones anteriores
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(
+                keys.filter(key => key.startsWith('precache-') && key !== PRECACHE)
+                    .map(key => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+// Expulsa las entradas más antiguas (orden de inserción) por encima del límite
+async function trimCache(cacheName, maxEntries) {
+    const cache = await caches.open(cacheName);
+    const keys = await cache.keys();
+    for (let i = 0; i < keys.length - maxEntries; i++) {
+        await cache.delete(keys[i]);
+    }
+}
+
+// stale-while-revalidate: responde con la copia en caché y la actualiza en segundo plano
+async function staleWhileRevalidate(event, cacheName, maxEntries) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(event.request);
+    const network = fetch(event.request)
+        .then(async response => {
+            if (response.ok || response.type === 'opaque') {
+                // Reinsertar mueve la entrada al final: la expulsión es LRU
+                await cache.delete(event.request);
+                await cache.put(event.request, response.clone());
+                await trimCache(cacheName, maxEntries);
+            }
+            return response;
+        });
+    if (cached) {
+        event.waitUntil(network.catch(() => undefined));
+        return cached;
+    }
+    return network;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+    const url = new URL(request.url);
+    const sameOrigin = url.origin === self.location.origin;
+
+    // Shell precacheado: cache-first (el hash del manifest invalida el precache)
+    if (sameOrigin && PRECACHE_URLS.includes(url.pathname)) {
+        event.respondWith(
+            caches.match(url.pathname, { cacheName: PRECACHE })
+                .then(cached => cached || fetch(request))
+        );
+        return;
+    }
+
+    // Páginas de hotel: stale-while-revalidate; sin red ni copia, el índice
+    if (request.mode === 'navigate' && sameOrigin) {
+        event.respondWith(
+            staleWhileRevalidate(event, PAGES_CACHE, MAX_PAGES)
+                .catch(() => caches.match(BASE_PATH + '/', { cacheName: PRECACHE }))
+        );
+        return;
+    }
+
+    // Imágenes (propias y externas): stale-while-revalidate con límite de entradas
+    if (request.destination === 'image') {
+        event.respondWith(staleWhileRevalidate(event, IMAGES_CACHE, MAX_IMAGES));
+    }
+});